@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+from typing import Awaitable, Optional, TypeVar
 
 import redis.asyncio as aioredis
 from fastapi import Header, Request, Depends
 
 from config import settings
 from app.security.session_manager import SessionManager, Session
-from app.utils.exceptions import SessionExpiredError
+from app.utils.exceptions import ClientDisconnectedError, SessionExpiredError
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("deps")
+
+T = TypeVar("T")
 
 
 # ── Global singletons (initialized in main.py startup) ───
@@ -59,6 +66,32 @@ async def get_session(
     return session
 
 
+async def cancel_on_disconnect(request: Request, work: Awaitable[T], route: str) -> T:
+    """Await `work`, cancelling its whole task tree if the client disconnects.
+
+    Cancellation reaches queued and in-flight OpenRouter calls, so closing the
+    tab stops paying for an analysis nobody will read.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                m.REQUESTS_CANCELLED.labels(route=route).inc()
+                log.info("client_disconnected", route=route)
+                raise ClientDisconnectedError(route)
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 def set_globals(redis_client: aioredis.Redis, session_manager: SessionManager) -> None:
     """Called during startup to set global instances."""
     global _redis_client, _session_mgr
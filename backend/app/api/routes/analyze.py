@@ -5,9 +5,10 @@ from __future__ import annotations
 import time
 from typing import Optional
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Request, Response
 
-from app.api.deps import get_session, get_session_manager
+from config import settings
+from app.api.deps import cancel_on_disconnect, get_session, get_session_manager
 from app.models.responses import AnalysisResponse
 from app.security.session_manager import Session
 from app.security.file_validator import FileValidator
@@ -18,6 +19,7 @@ from app.services.ollama_client import OllamaClient
 from app.services.rag_pipeline import RAGPipeline
 from app.services.blindspot_analyzer import BlindspotAnalyzer
 from app.services.risk_scorer import RiskScorer
+from app.utils.deadline import deadline_scope
 from app.utils.logger import get_logger
 from app.utils import metrics as m
 
@@ -27,6 +29,8 @@ log = get_logger("analyze_route")
 
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze_contract(
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     file: Optional[UploadFile] = File(None),
     text: Optional[str] = Form(None),
@@ -60,15 +64,22 @@ async def analyze_contract(
     embedder = EmbeddingService()
     vs = VectorStore()
     ollama = OllamaClient()
-    rag = RAGPipeline(vs, embedder, ollama)
+    rag = RAGPipeline(vs, embedder, ollama, session_key=session.encryption_key)
 
-    # 4. Ingest document
-    ingestion = await rag.ingest_document(session.id, parsed_doc)
+    async def run_pipeline():
+        # 4. Ingest document
+        ingestion = await rag.ingest_document(session.id, parsed_doc)
 
-    # 5. Run risk scoring (includes blindspot analysis)
-    blindspot = BlindspotAnalyzer(rag)
-    scorer = RiskScorer(rag, blindspot)
-    result = await scorer.score(session.id, contract_type, language)
+        # 5. Run risk scoring (includes blindspot analysis)
+        blindspot = BlindspotAnalyzer(rag)
+        scorer = RiskScorer(rag, blindspot)
+        return ingestion, await scorer.score(session.id, contract_type, language)
+
+    with deadline_scope(settings.REQUEST_DEADLINE_SECONDS) as deadline:
+        ingestion, result = await cancel_on_disconnect(request, run_pipeline(), "analyze")
+
+    if deadline.skipped:
+        response.headers["X-Skipped-Stages"] = ",".join(deadline.skipped)
 
     # 6. Enrich result
     result.contract_text = parsed_doc.text
@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Request, Response
 
-from app.api.deps import get_session
+from config import settings
+from app.api.deps import cancel_on_disconnect, get_session
 from app.models.responses import RedlineReport
 from app.security.session_manager import Session
 from app.services.document_parser import DocumentParser
@@ -14,12 +15,15 @@ from app.services.ollama_client import OllamaClient
 from app.services.rag_pipeline import RAGPipeline
 from app.services.redline_comparator import RedlineComparator
 from app.security.file_validator import FileValidator
+from app.utils.deadline import deadline_scope
 
 router = APIRouter()
 
 
 @router.post("/compare", response_model=RedlineReport)
 async def compare_drafts(
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     draft1: UploadFile = File(...),
     draft2: UploadFile = File(...),
@@ -38,9 +42,16 @@ async def compare_drafts(
     embedder = EmbeddingService()
     vs = VectorStore()
     ollama = OllamaClient()
-    rag = RAGPipeline(vs, embedder, ollama)
+    rag = RAGPipeline(vs, embedder, ollama, session_key=session.encryption_key)
 
     comparator = RedlineComparator(rag)
-    report = await comparator.compare(doc1.text, doc2.text, session.id, language)
+    with deadline_scope(settings.REQUEST_DEADLINE_SECONDS) as deadline:
+        report = await cancel_on_disconnect(
+            request,
+            comparator.compare(doc1.text, doc2.text, session.id, language),
+            "compare",
+        )
+    if deadline.skipped:
+        response.headers["X-Skipped-Stages"] = ",".join(deadline.skipped)
 
     return report
@@ -10,6 +10,8 @@ from app.models.responses import PushbackEmail
 from app.security.session_manager import Session
 from app.services.ollama_client import OllamaClient
 from app.services.pushback_generator import PushbackGenerator
+from app.services.llm_scheduler import priority_scope, PRIORITY_INTERACTIVE
+from app.services.llm_usage import contract_type_scope
 from app.utils.exceptions import http_404
 
 router = APIRouter()
@@ -41,12 +43,14 @@ async def generate_pushback(
 
     ollama = OllamaClient()
     generator = PushbackGenerator(ollama)
-    email = await generator.generate(
-        red_flags=red_flags,
-        recipient_type=body.recipient_type,
-        tone=body.tone,
-        language=body.language,
-        sender_name=body.sender_name,
-    )
+    with priority_scope(PRIORITY_INTERACTIVE), contract_type_scope(result.get("contract_type")):
+        email = await generator.generate(
+            red_flags=red_flags,
+            recipient_type=body.recipient_type,
+            tone=body.tone,
+            language=body.language,
+            sender_name=body.sender_name,
+            session_key=session.encryption_key,
+        )
 
     return email
@@ -2,14 +2,23 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+
 from fastapi import APIRouter, Depends, Form
+from fastapi.responses import StreamingResponse
 
+from config import settings
 from app.api.deps import get_session
 from app.security.session_manager import Session
 from app.services.embedder import EmbeddingService
 from app.services.vector_store import VectorStore
 from app.services.ollama_client import LLMClient
 from app.services.rag_pipeline import RAGPipeline
+from app.services.llm_scheduler import priority_scope, PRIORITY_INTERACTIVE
+from app.services.llm_usage import contract_type_scope
+from app.utils.deadline import deadline_scope
+from app.utils.exceptions import DeadlineExceededError
 from app.utils.logger import get_logger
 from pydantic import BaseModel
 from typing import Optional
@@ -24,6 +33,25 @@ class QueryResponse(BaseModel):
     sources: list = []
 
 
+def _build_system_prompt(contract_type: str, language: str, compact: bool = False) -> str:
+    from app.services.indian_acts_lookup import get_acts_context_for_prompt
+
+    acts_context = get_acts_context_for_prompt(contract_type, compact=compact)
+    return (
+        "You are LegalSaathi, an Indian legal expert. "
+        "Answer the user's question ONLY based on the contract context provided. "
+        "If the answer is not in the context, say 'This is not covered in the uploaded contract.' "
+        f"\n\n{acts_context}\n\n"
+        "Cite specific clauses and Indian law sections where applicable. "
+        f"Respond in {'Hindi' if language == 'hi' else 'English'}. "
+        "Keep your answer clear, concise, and useful."
+    )
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.post("/query", response_model=QueryResponse)
 async def query_contract(
     session: Session = Depends(get_session),
@@ -32,32 +60,26 @@ async def query_contract(
     contract_type: str = Form("loan"),
 ):
     """Ask a question about the uploaded contract using RAG."""
-    from app.services.indian_acts_lookup import get_acts_context_for_prompt
-
     embedder = EmbeddingService()
     vs = VectorStore()
     llm = LLMClient()
-    rag = RAGPipeline(vs, embedder, llm)
+    rag = RAGPipeline(vs, embedder, llm, session_key=session.encryption_key)
 
-    acts_context = get_acts_context_for_prompt(contract_type)
+    system_prompt = _build_system_prompt(contract_type, language)
 
-    # Build system prompt
-    system_prompt = (
-        "You are LegalSaathi, an Indian legal expert. "
-        "Answer the user's question ONLY based on the contract context provided. "
-        "If the answer is not in the context, say 'This is not covered in the uploaded contract.' "
-        f"\n\n{acts_context}\n\n"
-        "Cite specific clauses and Indian law sections where applicable. "
-        f"Respond in {'Hindi' if language == 'hi' else 'English'}. "
-        "Keep your answer clear, concise, and useful."
-    )
-
-    # Use RAG to answer
-    answer = await rag.query(
-        session_id=session.id,
-        question=question,
-        system_prompt=system_prompt,
-    )
+    # Use RAG to answer — chat traffic jumps ahead of bulk analysis
+    with (
+        priority_scope(PRIORITY_INTERACTIVE),
+        deadline_scope(settings.REQUEST_DEADLINE_SECONDS),
+        contract_type_scope(contract_type),
+    ):
+        answer = await rag.query(
+            session_id=session.id,
+            question=question,
+            system_prompt=system_prompt,
+            compact_system_prompt=_build_system_prompt(contract_type, language, compact=True),
+            cache_answer=True,
+        )
 
     log.info("query_answered", session_id=session.id[:8], question_len=len(question))
 
@@ -66,3 +88,66 @@ async def query_contract(
         session_id=session.id,
         sources=[],
     )
+
+
+@router.post("/query/stream")
+async def query_contract_stream(
+    session: Session = Depends(get_session),
+    question: str = Form(...),
+    language: str = Form("en"),
+    contract_type: str = Form("loan"),
+):
+    """Streaming variant of /query over Server-Sent Events.
+
+    Events: `sources` (retrieved chunk metadata), `token` (answer text with
+    thinking blocks removed), `done`, or `error`. The stream shares /query's
+    deadline and ends with an `error` event when it runs out.
+    """
+    embedder = EmbeddingService()
+    vs = VectorStore()
+    llm = LLMClient()
+    rag = RAGPipeline(vs, embedder, llm, session_key=session.encryption_key)
+
+    system_prompt = _build_system_prompt(contract_type, language)
+    compact_system_prompt = _build_system_prompt(contract_type, language, compact=True)
+
+    async def event_stream():
+        try:
+            with (
+                deadline_scope(settings.REQUEST_DEADLINE_SECONDS) as deadline,
+                contract_type_scope(contract_type),
+            ):
+                events = rag.stream_query(
+                    session_id=session.id,
+                    question=question,
+                    system_prompt=system_prompt,
+                    priority=PRIORITY_INTERACTIVE,
+                    compact_system_prompt=compact_system_prompt,
+                    cache_answer=True,
+                )
+                try:
+                    while True:
+                        # Streamed tokens never check the deadline, so each step is bounded
+                        # here (not across the yield, which would cancel the send instead).
+                        try:
+                            async with asyncio.timeout(deadline.remaining()):
+                                event = await anext(events, None)
+                        except TimeoutError as e:
+                            raise DeadlineExceededError("query_stream") from e
+                        if event is None:
+                            break
+                        yield _sse(event["event"], event["data"])
+                finally:
+                    await events.aclose()
+        except DeadlineExceededError as e:
+            log.warning("query_stream_deadline_exceeded", session_id=session.id[:8], stage=e.stage)
+            yield _sse("error", {"detail": e.message})
+        except Exception as e:
+            log.error("query_stream_error", session_id=session.id[:8], error=str(e))
+            yield _sse("error", {"detail": "Failed to generate an answer."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
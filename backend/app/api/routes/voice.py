@@ -14,6 +14,7 @@ from app.services.embedder import EmbeddingService
 from app.services.vector_store import VectorStore
 from app.services.ollama_client import OllamaClient
 from app.services.rag_pipeline import RAGPipeline
+from app.services.llm_scheduler import priority_scope, PRIORITY_INTERACTIVE
 from app.utils import metrics as m
 
 router = APIRouter()
@@ -37,14 +38,15 @@ async def voice_query(
         embedder = EmbeddingService()
         vs = VectorStore()
         ollama = OllamaClient()
-        rag = RAGPipeline(vs, embedder, ollama)
-
-    result = await voice_svc.process_voice_query(
-        audio_path=validated.path,
-        session_id=session.id,
-        rag_pipeline=rag,
-        hint_language=hint_language,
-    )
+        rag = RAGPipeline(vs, embedder, ollama, session_key=session.encryption_key)
+
+    with priority_scope(PRIORITY_INTERACTIVE):
+        result = await voice_svc.process_voice_query(
+            audio_path=validated.path,
+            session_id=session.id,
+            rag_pipeline=rag,
+            hint_language=hint_language,
+        )
 
     m.VOICE_QUERIES.labels(language=result.get("detected_language", "unknown")).inc()
 
@@ -11,6 +11,9 @@ import redis.asyncio as aioredis
 
 from config import settings
 from app.security.session_manager import SessionManager
+from app.services.answer_cache import get_answer_cache
+from app.services.lexical_index import get_lexical_indexes
+from app.services.llm_cache import get_response_cache
 from app.utils.helpers import secure_delete, utcnow, generate_id
 from app.utils.logger import get_logger
 from app.utils import metrics as m
@@ -48,6 +51,10 @@ class AutoWipeService:
             except Exception:
                 log.debug("chromadb_collection_not_found", collection=collection_name)
 
+        # 1b. Drop the in-memory BM25 index and cached answers (both hold contract text)
+        get_lexical_indexes().drop(session_id)
+        get_answer_cache().invalidate(session_id)
+
         # 2. Delete upload files (secure overwrite + delete)
         upload_dir = Path(settings.TEMP_UPLOAD_DIR) / session_id
         report.files_deleted += self._secure_delete_dir(upload_dir)
@@ -56,7 +63,12 @@ class AutoWipeService:
         audio_dir = Path(settings.TEMP_AUDIO_DIR) / session_id
         report.files_deleted += self._secure_delete_dir(audio_dir)
 
-        # 4. Invalidate session in Redis
+        # 4. Evict plaintext LLM responses cached in-process under the session key
+        session = await self.session_mgr.get_session(session_id)
+        if session is not None:
+            get_response_cache().evict_session(session.encryption_key)
+
+        # 5. Invalidate session in Redis
         redis_result = await self.session_mgr.invalidate_session(session_id)
         report.redis_keys_deleted = redis_result.get("redis_keys_deleted", 0)
 
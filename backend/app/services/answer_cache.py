@@ -0,0 +1,129 @@
+"""Per-session semantic answer cache — repeated or paraphrased questions reuse an earlier answer."""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+from config import settings
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("answer_cache")
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: List[dict]
+    vector: np.ndarray = field(repr=False)
+
+
+@dataclass
+class _SessionAnswers:
+    created_at: float = field(default_factory=time.monotonic)
+    entries: "OrderedDict[str, List[CachedAnswer]]" = field(default_factory=OrderedDict)  # scope → LRU list
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.entries.values())
+
+
+def answer_scope(*parts) -> str:
+    """Hash of everything besides the question that shapes an answer (system prompt, call site, ...)."""
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+
+
+class SemanticAnswerCache:
+    """Process-local answers by session, matched on question-embedding cosine similarity.
+
+    Bounded per session (LRU) and in sessions (LRU), expiring with the
+    session TTL. Answers are only reused within the same scope, so a
+    Hindi answer is never served for an English request. Ingesting into a
+    session invalidates its answers.
+    """
+
+    def __init__(self, max_sessions: int, max_entries: int, ttl_seconds: float, threshold: float):
+        self.max_sessions = max_sessions
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._sessions: "OrderedDict[str, _SessionAnswers]" = OrderedDict()
+
+    def _session(self, session_id: str) -> Optional[_SessionAnswers]:
+        answers = self._sessions.get(session_id)
+        if answers is None:
+            return None
+        if time.monotonic() - answers.created_at > self.ttl_seconds:
+            self.invalidate(session_id)
+            return None
+        self._sessions.move_to_end(session_id)
+        return answers
+
+    def lookup(self, session_id: str, scope: str, vector: np.ndarray) -> Optional[CachedAnswer]:
+        """Best cached answer above the similarity threshold, or None."""
+        answers = self._session(session_id)
+        candidates = answers.entries.get(scope) if answers is not None else None
+        if not candidates:
+            m.ANSWER_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+        query = np.asarray(vector, dtype=np.float32)
+        # Embeddings are L2-normalized, so the dot product is the cosine similarity.
+        sims = np.stack([c.vector for c in candidates]) @ query
+        best = int(np.argmax(sims))
+        m.ANSWER_CACHE_SIMILARITY.observe(float(sims[best]))
+        if sims[best] < self.threshold:
+            m.ANSWER_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+        hit = candidates.pop(best)
+        candidates.append(hit)
+        m.ANSWER_CACHE_LOOKUPS.labels(result="hit").inc()
+        log.debug("answer_cache_hit", session_id=session_id[:8], similarity=round(float(sims[best]), 4))
+        return hit
+
+    def store(
+        self,
+        session_id: str,
+        scope: str,
+        question: str,
+        vector: np.ndarray,
+        answer: str,
+        sources: Optional[List[dict]] = None,
+    ) -> None:
+        answers = self._session(session_id)
+        if answers is None:
+            answers = self._sessions[session_id] = _SessionAnswers()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        candidates = answers.entries.setdefault(scope, [])
+        answers.entries.move_to_end(scope)
+        candidates.append(CachedAnswer(question, answer, sources or [], np.asarray(vector, dtype=np.float32)))
+        # Evict least recently used answers, oldest scope first.
+        while len(answers) > self.max_entries:
+            oldest_scope, oldest = next(iter(answers.entries.items()))
+            oldest.pop(0)
+            if not oldest:
+                del answers.entries[oldest_scope]
+
+    def invalidate(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+_cache: SemanticAnswerCache | None = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    global _cache
+    if _cache is None:
+        _cache = SemanticAnswerCache(
+            settings.ANSWER_CACHE_MAX_SESSIONS,
+            settings.ANSWER_CACHE_MAX_ENTRIES,
+            settings.SESSION_TTL_SECONDS,
+            settings.ANSWER_CACHE_THRESHOLD,
+        )
+    return _cache
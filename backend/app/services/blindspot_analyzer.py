@@ -2,18 +2,18 @@
 
 from __future__ import annotations
 
-import json
-from pathlib import Path
 from typing import List
 
 from app.models.responses import MissingClause
+from config import settings
+from app.services.law_database import blindspot_question, load_law_database
 from app.services.rag_pipeline import RAGPipeline
+from app.utils.deadline import current_deadline
+from app.utils.exceptions import DeadlineExceededError
 from app.utils.logger import get_logger
 
 log = get_logger("blindspot")
 
-_LAWS_DIR = Path(__file__).resolve().parent.parent / "data" / "indian_laws"
-
 
 class BlindspotAnalyzer:
     """Detects missing clauses by comparing against Indian law standard clauses."""
@@ -24,17 +24,7 @@ class BlindspotAnalyzer:
 
     def _load_law_database(self) -> dict:
         """Load all JSON law files keyed by contract type."""
-        db = {}
-        if not _LAWS_DIR.exists():
-            log.warning("law_dir_missing", path=str(_LAWS_DIR))
-            return db
-        for f in _LAWS_DIR.glob("*.json"):
-            try:
-                data = json.loads(f.read_text(encoding="utf-8"))
-                ctype = data.get("contract_type", f.stem)
-                db[ctype] = data.get("standard_clauses", [])
-            except Exception as e:
-                log.error("law_file_load_error", file=f.name, error=str(e))
+        db = load_law_database()
         log.info("law_database_loaded", types=list(db.keys()), total_clauses=sum(len(v) for v in db.values()))
         return db
 
@@ -45,24 +35,41 @@ class BlindspotAnalyzer:
             clauses = self.law_db.get("general", [])
 
         missing: List[MissingClause] = []
-
-        for clause in clauses:
+        deadline = current_deadline()
+        checked = 0
+
+        sys_prompt = (
+            "You are a legal document reviewer. You must answer ONLY 'YES' or 'NO'. "
+            "NO other text. Check if the contract has a clause covering the asked topic."
+        )
+        questions = [blindspot_question(clause) for clause in clauses]
+
+        # Retrieval for every clause up front: one batched embed + one vector query.
+        try:
+            retrieved = await self.rag.retrieve_many(session_id, questions, self.rag.candidate_count())
+        except DeadlineExceededError:
+            if deadline is not None:
+                deadline.skip("blindspot")
+            retrieved = []
+        except Exception as e:
+            # Still one check per clause: query() retrieves for each on its own.
+            log.warning("blindspot_retrieval_error", error=str(e), fallback="per_clause")
+            retrieved = [None] * len(questions)
+
+        for clause, question, chunks in zip(clauses, questions, retrieved):
+            if deadline is not None and not deadline.has_time_for(settings.LLM_DEADLINE_MIN_SECONDS):
+                deadline.skip("blindspot")
+                break
             clause_name = clause.get("clause_name", "")
-            keywords = clause.get("keywords_to_detect", [])
-
-            question = (
-                f"Does this contract contain a clause about '{clause_name}'? "
-                f"Look for any mention of: {', '.join(keywords)}. "
-                f"Answer with ONLY 'YES' or 'NO'."
-            )
-
-            sys_prompt = (
-                "You are a legal document reviewer. You must answer ONLY 'YES' or 'NO'. "
-                "NO other text. Check if the contract has a clause covering the asked topic."
-            )
 
             try:
-                answer = await self.rag.query(session_id=session_id, question=question, system_prompt=sys_prompt)
+                answer = await self.rag.query(
+                    session_id=session_id,
+                    question=question,
+                    system_prompt=sys_prompt,
+                    call_site="blindspot",
+                    chunks=chunks,
+                )
                 answer_clean = answer.strip().upper()
 
                 if "NO" in answer_clean and "YES" not in answer_clean:
@@ -75,8 +82,19 @@ class BlindspotAnalyzer:
                         suggested_clause=clause.get("template_clause", ""),
                     ))
 
+            except DeadlineExceededError:
+                if deadline is not None:
+                    deadline.skip("blindspot")
+                break
             except Exception as e:
                 log.warning("blindspot_check_error", clause=clause_name, error=str(e))
-
-        log.info("blindspot_analysis_complete", session_id=session_id[:8], missing=len(missing), total_checked=len(clauses))
+            checked += 1
+
+        log.info(
+            "blindspot_analysis_complete",
+            session_id=session_id[:8],
+            missing=len(missing),
+            total_checked=checked,
+            total_clauses=len(clauses),
+        )
         return missing
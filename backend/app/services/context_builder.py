@@ -0,0 +1,202 @@
+"""Context packing — merge overlapping chunks, drop repeated sentences, compress to a token budget."""
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Sequence, TypeVar
+
+from config import settings
+from app.services.lexical_index import BM25Index
+from app.utils.helpers import estimate_tokens
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("context_builder")
+
+# Same boundary the chunker splits on, so its sentence overlap lines up.
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+C = TypeVar("C")  # RetrievedChunk (a pydantic model with text / clause_number / metadata)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+def _chunk_index(chunk) -> Optional[int]:
+    index = (chunk.metadata or {}).get("index")
+    return int(index) if index is not None and index != "" else None
+
+
+def _document(chunk) -> str:
+    # Chunk indexes restart per ingested document, so adjacency only holds within one.
+    return str((chunk.metadata or {}).get("document_id") or "")
+
+
+def _merge_adjacent(chunks: Sequence[C]) -> List[List[C]]:
+    """Group consecutive pieces of the same clause and document; groups keep their best member's rank."""
+    parent = list(range(len(chunks)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    seen: dict[tuple[str, str, int], int] = {}
+    for i, chunk in enumerate(chunks):
+        idx = _chunk_index(chunk)
+        if idx is None:
+            continue
+        key = (_document(chunk), chunk.clause_number or "")
+        for neighbour in (idx - 1, idx + 1):
+            j = seen.get((*key, neighbour))
+            if j is not None:
+                parent[find(i)] = find(j)
+        seen.setdefault((*key, idx), i)
+
+    groups: dict[int, List[C]] = {}
+    for i, chunk in enumerate(chunks):
+        groups.setdefault(find(i), []).append(chunk)
+    return list(groups.values())  # insertion order = each group's best-ranked member
+
+
+def strip_overlap(chunks: Sequence[C]) -> List[C]:
+    """Drop the leading sentences each chunk repeats from its predecessor (the chunker's overlap).
+
+    Chunks are kept in the given (document) order; only consecutive pieces
+    of the same clause in the same document are compared, so the result is
+    deterministic.
+    """
+    out: List[C] = []
+    prev = None
+    for chunk in chunks:
+        current = chunk
+        if prev is not None and _continues(prev, chunk):
+            tail = {_normalize(s) for s in split_sentences(prev.text)}
+            sentences = split_sentences(chunk.text)
+            k = 0
+            while k < len(sentences) and _normalize(sentences[k]) in tail:
+                k += 1
+            if k == len(sentences):
+                prev = current
+                continue
+            if k:
+                chunk = chunk.model_copy(update={"text": " ".join(sentences[k:])})
+        out.append(chunk)
+        prev = current
+    return out
+
+
+def _continues(prev, chunk) -> bool:
+    idx, prev_idx = _chunk_index(chunk), _chunk_index(prev)
+    return (
+        idx is not None
+        and prev_idx is not None
+        and idx == prev_idx + 1
+        and chunk.clause_number == prev.clause_number
+        and _document(chunk) == _document(prev)
+    )
+
+
+def pack_context(
+    question: str,
+    chunks: List[C],
+    budget_tokens: Optional[int] = None,
+    call_site: str = "query",
+) -> List[C]:
+    """Return chunks ready for the prompt: merged, deduplicated and, if needed, compressed.
+
+    1. Consecutive chunks of the same clause and document become one (best rank, document order).
+    2. Sentences already present earlier in the context are dropped.
+    3. Over `budget_tokens` (default CONTEXT_TOKEN_BUDGET), each piece keeps
+       its sentence most similar to the question (BM25), then the next most
+       similar sentences overall fill the remaining budget, in original order.
+    Chunks whose text is unchanged are passed through as-is.
+    """
+    if not chunks:
+        return chunks
+    budget = budget_tokens if budget_tokens is not None else settings.CONTEXT_TOKEN_BUDGET
+    original_tokens = sum(estimate_tokens(c.text) for c in chunks)
+
+    # 1-2. Merge + dedupe into (lead chunk, sentences, changed?) pieces.
+    seen: set[str] = set()
+    pieces: List[tuple[C, List[str], bool]] = []
+    for group in _merge_adjacent(chunks):
+        ordered = sorted(group, key=lambda c: _chunk_index(c) or 0)
+        sentences, changed = [], len(group) > 1
+        for member in ordered:
+            for sentence in split_sentences(member.text):
+                key = _normalize(sentence)
+                if key in seen:
+                    changed = True
+                    continue
+                seen.add(key)
+                sentences.append(sentence)
+        if sentences:
+            pieces.append((group[0], sentences, changed))
+
+    deduped_tokens = sum(estimate_tokens(" ".join(s)) for _, s, _ in pieces)
+
+    # 3. Extractive compression when still over budget.
+    if deduped_tokens > budget:
+        pieces = _compress(question, pieces, budget)
+    packed_tokens = sum(estimate_tokens(" ".join(s)) for _, s, _ in pieces)
+
+    packed = [
+        lead.model_copy(update={"text": " ".join(sentences)}) if changed else lead
+        for lead, sentences, changed in pieces
+    ]
+    dedup_saved = max(original_tokens - deduped_tokens, 0)
+    compress_saved = max(deduped_tokens - packed_tokens, 0)
+    if dedup_saved:
+        m.CONTEXT_TOKENS_SAVED.labels(call_site=call_site, stage="dedup").inc(dedup_saved)
+    if compress_saved:
+        m.CONTEXT_TOKENS_SAVED.labels(call_site=call_site, stage="compress").inc(compress_saved)
+    if dedup_saved or compress_saved:
+        log.debug(
+            "context_packed",
+            call_site=call_site,
+            chunks_in=len(chunks),
+            chunks_out=len(packed),
+            tokens_in=original_tokens,
+            tokens_out=packed_tokens,
+        )
+    return packed
+
+
+def _compress(question: str, pieces: List[tuple], budget: int) -> List[tuple]:
+    """Keep the sentences most similar to the question that fit in `budget` tokens."""
+    flat = [(p, s) for p, (_, sentences, _) in enumerate(pieces) for s in range(len(sentences))]
+    ids = [f"{p}:{s}" for p, s in flat]
+    index = BM25Index(ids, [pieces[p][1][s] for p, s in flat], kind="context")
+    scores = dict(index.search(question, len(ids)))
+    ranked = sorted(flat, key=lambda ps: (-scores.get(f"{ps[0]}:{ps[1]}", 0.0), ps))
+
+    keep: set[tuple[int, int]] = set()
+    used = 0
+    # Evidence first: the best sentence of every piece, in rank order of pieces.
+    for p in range(len(pieces)):
+        best = next(ps for ps in ranked if ps[0] == p)
+        cost = estimate_tokens(pieces[p][1][best[1]])
+        if used + cost <= budget or not keep:
+            keep.add(best)
+            used += cost
+    for ps in ranked:
+        if ps in keep:
+            continue
+        cost = estimate_tokens(pieces[ps[0]][1][ps[1]])
+        if used + cost <= budget:
+            keep.add(ps)
+            used += cost
+
+    compressed = []
+    for p, (lead, sentences, _) in enumerate(pieces):
+        kept = [s for i, s in enumerate(sentences) if (p, i) in keep]
+        if kept:
+            compressed.append((lead, kept, True))
+    return compressed
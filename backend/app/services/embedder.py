@@ -2,18 +2,67 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import time
-from typing import List
+from typing import Awaitable, List, Optional, Sequence
+
+import numpy as np
 
 from config import settings
+from app.services.embedding_backends import embedding_model_id, load_onnx_model, load_torch_model
+from app.services.embedding_bundle import get_bundle
+from app.services.embedding_cache import EmbeddingCache, cache_dir
+from app.services.embedding_executor import EmbeddingExecutor, Kind
+from app.utils.deadline import current_deadline
+from app.utils.helpers import estimate_tokens
 from app.utils.logger import get_logger
+from app.utils.singleflight import AsyncSingleFlight, SingleFlight
 from app.utils import metrics as m
 
 log = get_logger("embedder")
 
+_query_flights = SingleFlight("embed_query")
+_texts_flights = SingleFlight("embed_texts")
+_aquery_flights = AsyncSingleFlight("aembed_query")
+_atexts_flights = AsyncSingleFlight("aembed_texts")
+
+
+def _flight_key(prefix: str, texts: List[str]) -> str:
+    h = hashlib.sha256(prefix.encode("utf-8"))
+    for t in texts:
+        h.update(b"\x00")
+        h.update(t.encode("utf-8"))
+    return h.hexdigest()
+
+
+def length_buckets(lengths: Sequence[int], max_tokens: int, max_batch: int) -> List[List[int]]:
+    """Group indices longest-first into batches whose padded size (count × longest) fits `max_tokens`.
+
+    A text longer than the budget still gets a batch of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # Sorted longest-first, so current[0] sets the padded length of the batch.
+        if current and (len(current) >= max_batch or (len(current) + 1) * lengths[current[0]] > max_tokens):
+            buckets.append(current)
+            current = []
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
 
 class EmbeddingService:
-    """Singleton embedding — model loaded once, reused for all requests."""
+    """Singleton embedding — model loaded once, reused for all requests.
+
+    Async code should use the `aembed_*` methods: they run the model on the
+    executor thread, micro-batched with other requests, instead of blocking
+    the event loop. The sync methods encode on the calling thread (scripts,
+    startup).
+    """
 
     _instance = None
 
@@ -21,38 +70,293 @@ class EmbeddingService:
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._model = None
+            cls._instance._backend = None  # set by load_model(); "torch" after a fallback
+            cls._instance._executor = None
+            cls._instance._cache = None
+            cls._instance._seconds_per_text = 0.0  # EWMA, for the cache's time-saved metric
         return cls._instance
 
     def load_model(self) -> None:
-        """Load sentence-transformer model (call at startup)."""
-        from sentence_transformers import SentenceTransformer
+        """Load sentence-transformer model (call at startup).
 
-        log.info("loading_embedding_model", model=settings.EMBEDDING_MODEL)
+        EMBEDDING_BACKEND selects PyTorch or an exported ONNX model; an ONNX
+        model that fails to load or to match PyTorch falls back to PyTorch.
+        """
+        backend = settings.EMBEDDING_BACKEND
+        log.info("loading_embedding_model", model=settings.EMBEDDING_MODEL, backend=backend)
         start = time.time()
-        self._model = SentenceTransformer(
-            settings.EMBEDDING_MODEL,
-            device=settings.EMBEDDING_DEVICE,
-        )
+        if backend != "torch":
+            try:
+                self._model = load_onnx_model()
+            except Exception as e:
+                log.warning("embedding_backend_fallback", backend=backend, error=str(e))
+                m.EMBEDDING_BACKEND_FALLBACKS.labels(backend=backend).inc()
+                backend = "torch"
+        if backend == "torch":
+            self._model = load_torch_model()
+        self._model.max_seq_length = settings.EMBEDDING_MAX_SEQ_LENGTH
+        self._backend = backend
+        if self._cache is not None and self._cache.model_id != self.model_id:
+            self._cache = None  # opened before the load under the configured backend's id
+        m.EMBEDDING_BACKEND.labels(backend=backend).set(1)
         elapsed = time.time() - start
-        log.info("embedding_model_loaded", model=settings.EMBEDDING_MODEL, seconds=round(elapsed, 2))
+        log.info("embedding_model_loaded", model=settings.EMBEDDING_MODEL, backend=backend, seconds=round(elapsed, 2))
+
+    @property
+    def model_id(self) -> str:
+        """Id of the loaded model (the configured one until loaded) — keys the cache and bundle."""
+        return embedding_model_id(self._backend)
+
+    @staticmethod
+    def _check_deadline(stage: str) -> None:
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(stage)
 
     def _ensure_loaded(self) -> None:
         if self._model is None:
             self.load_model()
 
-    def embed_texts(self, texts: List[str], prefix: str = "passage: ") -> List[List[float]]:
-        """Batch embed documents. E5 models require 'passage: ' prefix for docs."""
-        self._ensure_loaded()
+    def embed_texts(self, texts: List[str], prefix: str = "passage: ") -> np.ndarray:
+        """Batch embed documents. E5 models require 'passage: ' prefix for docs.
+
+        Returns one contiguous float32 row per text; Chroma and the caches
+        take it as is, so no per-float Python objects are created. Texts in
+        the embedding bundle (fixed questions, template clauses) skip the model.
+        """
+        rows = self._bundled(texts, prefix)
+        todo = [i for i, v in enumerate(rows) if v is None]
+        encoded = None
+        if todo:
+            self._check_deadline("embed_texts")
+            self._ensure_loaded()
+            missing = [texts[i] for i in todo]
+            encoded = _texts_flights.do(_flight_key(prefix, missing), lambda: self._encode_texts(missing, prefix))
+        return self._fill(rows, todo, encoded)
+
+    def _encode_texts(self, texts: List[str], prefix: str) -> np.ndarray:
         prefixed = [f"{prefix}{t}" for t in texts]
         start = time.time()
-        embeddings = self._model.encode(prefixed, normalize_embeddings=True, show_progress_bar=False)
+        embeddings = self._encode_cached(prefixed)
         m.EMBEDDING_DURATION.observe(time.time() - start)
-        return embeddings.tolist()
+        return embeddings
+
+    def _get_cache(self) -> Optional[EmbeddingCache]:
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return None
+        if self._cache is None:
+            model_id = self.model_id
+            self._cache = EmbeddingCache(
+                cache_dir(settings.EMBEDDING_CACHE_DIR, model_id),
+                model_id,
+                memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+                disk_entries=settings.EMBEDDING_CACHE_DISK_ENTRIES,
+            )
+        return self._cache
+
+    def _encode_cached(self, prefixed: List[str]) -> np.ndarray:
+        """_encode_bucketed for texts not already in the content-hash cache (each distinct text once)."""
+        cache = self._get_cache()
+        if cache is None or not prefixed:
+            return self._encode_bucketed(prefixed)
+        keys = [cache.key(t) for t in prefixed]
+        rows = cache.get_many(keys)
+        todo: List[int] = []  # first position of each distinct missing text
+        missing: set[bytes] = set()
+        for i, row in enumerate(rows):
+            if row is None and keys[i] not in missing:
+                missing.add(keys[i])
+                todo.append(i)
+        hits = sum(v is not None for v in rows)
+        if hits and self._seconds_per_text:
+            m.EMBEDDING_CACHE_SECONDS_SAVED.inc(hits * self._seconds_per_text)
+        if todo:
+            start = time.perf_counter()
+            fresh = self._encode_bucketed([prefixed[i] for i in todo])
+            per_text = (time.perf_counter() - start) / len(todo)
+            previous = self._seconds_per_text
+            self._seconds_per_text = 0.8 * previous + 0.2 * per_text if previous else per_text
+            cache.put_many([keys[i] for i in todo], fresh)
+            encoded = dict(zip((keys[i] for i in todo), fresh))
+            rows = [encoded[k] if v is None else v for k, v in zip(keys, rows)]
+        return np.stack(rows).astype(np.float32, copy=False)
+
+    def _token_lengths(self, prefixed: List[str]) -> List[int]:
+        """Tokens per text after truncation to EMBEDDING_MAX_SEQ_LENGTH (counts truncated texts)."""
+        max_len = settings.EMBEDDING_MAX_SEQ_LENGTH
+        tokenizer = getattr(self._model, "tokenizer", None)
+        if tokenizer is None:
+            lengths = [estimate_tokens(t) + 2 for t in prefixed]  # + [CLS]/[SEP]
+        else:
+            encoded = tokenizer(prefixed, add_special_tokens=True, truncation=False, verbose=False)
+            lengths = [len(ids) for ids in encoded["input_ids"]]
+        truncated = sum(n > max_len for n in lengths)
+        if truncated:
+            m.EMBEDDING_TRUNCATED.inc(truncated)
+        return [min(n, max_len) for n in lengths]
+
+    def _encode_bucketed(self, prefixed: List[str]) -> np.ndarray:
+        """encode() in token-budget batches of similar length, rows returned in input order.
+
+        `encode` itself length-sorts, but by characters and in fixed
+        batch_size groups; here each forward pass is sized so that
+        count × longest stays within EMBEDDING_BATCH_TOKENS, so a batch of
+        clause headers is wide and a batch of full clauses is narrow.
+        """
+        if not prefixed:
+            return np.empty((0, 0), dtype=np.float32)
+        lengths = self._token_lengths(prefixed)
+        buckets = length_buckets(lengths, settings.EMBEDDING_BATCH_TOKENS, settings.EMBEDDING_BATCH_SIZE)
+        if len(buckets) == 1:
+            buckets = [list(range(len(prefixed)))]  # one pass: order does not change the padding
+
+        out = None
+        real = padded = 0
+        for bucket in buckets:
+            vectors = np.asarray(
+                self._model.encode(
+                    [prefixed[i] for i in bucket],
+                    batch_size=len(bucket),
+                    normalize_embeddings=True,
+                    show_progress_bar=False,
+                ),
+                dtype=np.float32,
+            )
+            if out is None:
+                out = np.empty((len(prefixed), vectors.shape[1]), dtype=np.float32)
+            out[bucket] = vectors
+            real += sum(lengths[i] for i in bucket)
+            padded += len(bucket) * max(lengths[i] for i in bucket)
+        m.EMBEDDING_PADDING_EFFICIENCY.observe(real / padded)
+        m.EMBEDDING_FORWARD_PASSES.inc(len(buckets))
+        return out
 
-    def embed_query(self, query: str) -> List[float]:
+    def embed_query(self, query: str) -> np.ndarray:
         """Embed a single query. E5 models require 'query: ' prefix."""
+        bundled = self._bundled([query], "query: ")[0]
+        if bundled is not None:
+            return bundled
+        self._check_deadline("embed_query")
         self._ensure_loaded()
+        return _query_flights.do(_flight_key("query: ", [query]), lambda: self._encode_query(query))
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed several queries in one batched forward pass (bundled ones are free)."""
+        return self.embed_texts(queries, prefix="query: ")
+
+    @staticmethod
+    def _fill(rows: List[Optional[np.ndarray]], todo: List[int], encoded: Optional[np.ndarray]) -> np.ndarray:
+        """Bundled rows plus freshly encoded ones (at `todo`) as one (n, dim) float32 array."""
+        if encoded is not None and len(todo) == len(rows):
+            return encoded
+        if not rows:
+            return np.empty((0, 0), dtype=np.float32)
+        dim = encoded.shape[1] if encoded is not None else len(next(r for r in rows if r is not None))
+        out = np.empty((len(rows), dim), dtype=np.float32)
+        for i, row in enumerate(rows):
+            if row is not None:
+                out[i] = row
+        if encoded is not None:
+            out[todo] = encoded
+        return out
+
+    def _bundled(self, texts: List[str], prefix: str) -> List[Optional[np.ndarray]]:
+        """Precomputed vectors for fixed questions / template clauses (see embedding_bundle); None where absent."""
+        bundle = get_bundle(self.model_id)
+        kind = {"query: ": "query", "passage: ": "passage"}.get(prefix)
+        if bundle is None or kind is None:
+            return [None] * len(texts)
+        lookup = bundle.query_vector if kind == "query" else bundle.passage_vector
+        vectors = [lookup(t) for t in texts]
+        hits = sum(v is not None for v in vectors)
+        if hits:
+            m.EMBEDDING_BUNDLE_HITS.labels(kind=kind).inc(hits)
+        return vectors
+
+    # ── Async (executor thread, micro-batched) ──
+
+    def _get_executor(self) -> EmbeddingExecutor:
+        if self._executor is None:
+            self._executor = EmbeddingExecutor(
+                self._encode_batch,
+                max_batch=settings.EMBEDDING_MICROBATCH_MAX,
+                max_wait=settings.EMBEDDING_MICROBATCH_WAIT_MS / 1000,
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """Stop the executor thread and flush the embedding cache (call at shutdown)."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+    def _encode_batch(self, prefixed: List[str]) -> np.ndarray:
+        # Runs on the executor thread — a lazy model load happens there too.
+        self._ensure_loaded()
+        start = time.time()
+        embeddings = self._encode_cached(prefixed)
+        m.EMBEDDING_DURATION.observe(time.time() - start)
+        return embeddings
+
+    async def _submit(
+        self, prefixed: List[str], kind: Kind, slices: Optional[List[List[int]]] = None
+    ) -> np.ndarray:
+        return await asyncio.wrap_future(self._get_executor().submit(prefixed, kind, slices))
+
+    @staticmethod
+    def _plan_bulk(prefixed: List[str]) -> List[List[int]]:
+        """Token-budget batches over a whole bulk request, so executor slices are length-sorted too.
+
+        Uses the character estimate, which keeps tokenization off the event
+        loop; _encode_bucketed re-checks each slice against real token
+        counts and splits any that the estimate under-sized.
+        """
+        max_len = settings.EMBEDDING_MAX_SEQ_LENGTH
+        lengths = [min(estimate_tokens(t) + 2, max_len) for t in prefixed]
+        return length_buckets(lengths, settings.EMBEDDING_BATCH_TOKENS, settings.EMBEDDING_BATCH_SIZE)
+
+    async def aembed_texts(self, texts: List[str], prefix: str = "passage: ") -> np.ndarray:
+        """embed_texts without blocking the event loop; yields to queries between batches."""
+        rows = self._bundled(texts, prefix)
+        todo = [i for i, v in enumerate(rows) if v is None]
+        if not todo:
+            return self._fill(rows, todo, None)
+        self._check_deadline("embed_texts")
+        missing = [texts[i] for i in todo]
+
+        def submit() -> Awaitable[np.ndarray]:
+            prefixed = [f"{prefix}{t}" for t in missing]
+            return self._submit(prefixed, "bulk", self._plan_bulk(prefixed))
+
+        encoded = await _atexts_flights.do(_flight_key(prefix, missing), submit)
+        return self._fill(rows, todo, encoded)
+
+    async def aembed_query(self, query: str) -> np.ndarray:
+        """embed_query, batched with concurrent queries from other requests."""
+        bundled = self._bundled([query], "query: ")[0]
+        if bundled is not None:
+            return bundled
+        self._check_deadline("embed_query")
+        vectors = await _aquery_flights.do(
+            _flight_key("query: ", [query]), lambda: self._submit([f"query: {query}"], "query")
+        )
+        return vectors[0]
+
+    async def aembed_queries(self, queries: List[str]) -> np.ndarray:
+        """embed_queries on the executor thread (bundled ones are free)."""
+        rows = self._bundled(queries, "query: ")
+        todo = [i for i, v in enumerate(rows) if v is None]
+        encoded = None
+        if todo:
+            self._check_deadline("embed_queries")
+            encoded = await self._submit([f"query: {queries[i]}" for i in todo], "query")
+        return self._fill(rows, todo, encoded)
+
+    def _encode_query(self, query: str) -> np.ndarray:
         start = time.time()
         embedding = self._model.encode(f"query: {query}", normalize_embeddings=True, show_progress_bar=False)
         m.EMBEDDING_DURATION.observe(time.time() - start)
-        return embedding.tolist()
+        return np.asarray(embedding, dtype=np.float32)
@@ -0,0 +1,132 @@
+"""Embedding model backends — PyTorch, ONNX Runtime, or ONNX with dynamic int8 quantization."""
+
+from __future__ import annotations
+
+import re
+import time
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from config import settings
+from app.utils.logger import get_logger
+
+log = get_logger("embedding_backends")
+
+# Fixed sample for the parity check — contract language in the scripts we serve.
+PARITY_TEXTS = [
+    "passage: The Tenant shall pay a monthly rent of INR 25,000 on or before the 5th day of each month.",
+    "passage: The security deposit of INR 1,50,000 shall be refunded within 30 days of vacating the premises.",
+    "passage: Either party may terminate this Agreement by giving two months' written notice.",
+    "passage: The Employee shall not join any competitor for a period of two years after leaving.",
+    "passage: किरायेदार हर महीने की 5 तारीख तक किराया जमा करेगा।",
+    "passage: Disputes shall be referred to arbitration under the Arbitration and Conciliation Act, 1996.",
+    "query: what is the notice period?",
+    "query: is the non-compete clause enforceable in India?",
+]
+_PARITY_FILE = "parity_reference.npy"
+
+
+class EmbeddingParityError(RuntimeError):
+    """An exported model's embeddings drifted too far from the PyTorch reference."""
+
+
+def embedding_model_id(backend: str | None = None) -> str:
+    """Model name plus non-default backend — keys anything derived from embeddings (e.g. the bundle).
+
+    `backend` defaults to EMBEDDING_BACKEND; pass the one that actually
+    loaded (see EmbeddingService.model_id) once a fallback is possible.
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "torch":
+        return settings.EMBEDDING_MODEL
+    if backend == "onnx-int8":
+        return f"{settings.EMBEDDING_MODEL}-onnx-qint8-{settings.EMBEDDING_QUANTIZATION}"
+    return f"{settings.EMBEDDING_MODEL}-onnx"
+
+
+def onnx_model_dir() -> Path:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", settings.EMBEDDING_MODEL).strip("_")
+    return Path(settings.EMBEDDING_ONNX_DIR) / slug
+
+
+def onnx_file_name() -> str:
+    if settings.EMBEDDING_BACKEND == "onnx-int8":
+        return f"onnx/model_qint8_{settings.EMBEDDING_QUANTIZATION}.onnx"
+    return "onnx/model.onnx"
+
+
+def min_cosine(a: np.ndarray, b: np.ndarray) -> float:
+    """Lowest row-wise cosine similarity between two embedding matrices."""
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    sims = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return float(sims.min())
+
+
+def encode_parity_sample(model, texts: Sequence[str] = PARITY_TEXTS) -> np.ndarray:
+    return np.asarray(model.encode(list(texts), normalize_embeddings=True, show_progress_bar=False), dtype=np.float32)
+
+
+def load_torch_model():
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(settings.EMBEDDING_MODEL, device=settings.EMBEDDING_DEVICE)
+
+
+def export_onnx_model(target: Path) -> None:
+    """Export the model to ONNX (and its int8 variant when selected), with a PyTorch parity reference.
+
+    One-time and slow: loads the PyTorch model once to record reference
+    embeddings for PARITY_TEXTS next to the exported files.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    start = time.time()
+    target.mkdir(parents=True, exist_ok=True)
+    if not (target / _PARITY_FILE).exists():
+        reference = encode_parity_sample(load_torch_model())
+        np.save(target / _PARITY_FILE, reference)
+
+    if not (target / "onnx" / "model.onnx").exists():
+        onnx_model = SentenceTransformer(settings.EMBEDDING_MODEL, device=settings.EMBEDDING_DEVICE, backend="onnx")
+        onnx_model.save_pretrained(str(target))
+    if settings.EMBEDDING_BACKEND == "onnx-int8" and not (target / onnx_file_name()).exists():
+        onnx_model = SentenceTransformer(str(target), device=settings.EMBEDDING_DEVICE, backend="onnx")
+        export_dynamic_quantized_onnx_model(onnx_model, settings.EMBEDDING_QUANTIZATION, str(target))
+    log.info("embedding_onnx_exported", path=str(target), seconds=round(time.time() - start, 2))
+
+
+def load_onnx_model():
+    """Load the exported ONNX model (exporting on first use) and verify it against PyTorch.
+
+    Raises EmbeddingParityError when the lowest cosine similarity to the
+    reference embeddings is under EMBEDDING_PARITY_MIN_COSINE, and
+    ImportError when the optional ONNX packages are not installed.
+    """
+    try:
+        import onnxruntime  # noqa: F401
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"{settings.EMBEDDING_BACKEND} needs `pip install -r requirements-onnx.txt`") from e
+    from sentence_transformers import SentenceTransformer
+
+    target = onnx_model_dir()
+    file_name = onnx_file_name()
+    if not (target / file_name).exists() or not (target / _PARITY_FILE).exists():
+        export_onnx_model(target)
+
+    model = SentenceTransformer(
+        str(target),
+        device=settings.EMBEDDING_DEVICE,
+        backend="onnx",
+        model_kwargs={"file_name": file_name},
+    )
+    similarity = min_cosine(encode_parity_sample(model), np.load(target / _PARITY_FILE))
+    log.info("embedding_parity_checked", backend=settings.EMBEDDING_BACKEND, min_cosine=round(similarity, 5))
+    if similarity < settings.EMBEDDING_PARITY_MIN_COSINE:
+        raise EmbeddingParityError(
+            f"{file_name}: min cosine {similarity:.4f} < {settings.EMBEDDING_PARITY_MIN_COSINE}"
+        )
+    return model
@@ -0,0 +1,143 @@
+"""Precomputed embeddings for fixed questions and law template clauses — built once, memory-mapped."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+
+from config import settings
+from app.services.embedding_backends import embedding_model_id
+from app.services.law_database import fixed_questions, law_database_hash, load_law_database, template_clauses
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+if TYPE_CHECKING:
+    from app.services.embedder import EmbeddingService
+
+log = get_logger("embedding_bundle")
+
+
+class EmbeddingBundle:
+    """Read-only float32 vectors for known query and passage strings.
+
+    Rows are queries first, then passages, as listed in the sidecar index.
+    """
+
+    def __init__(self, vectors: np.ndarray, queries: List[str], passages: List[str]):
+        if vectors.shape[0] != len(queries) + len(passages):
+            raise ValueError("Bundle vectors do not match its index")
+        self.vectors = vectors
+        self._queries = {q: i for i, q in enumerate(queries)}
+        self._passages = {p: len(queries) + i for i, p in enumerate(passages)}
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def query_vector(self, text: str) -> Optional[np.ndarray]:
+        i = self._queries.get(text)
+        return None if i is None else self.vectors[i]
+
+    def passage_vector(self, text: str) -> Optional[np.ndarray]:
+        i = self._passages.get(text)
+        return None if i is None else self.vectors[i]
+
+
+def bundle_path(model_name: str, law_hash: str) -> Path:
+    """Bundle file for a model + law-DB version; a new hash means a new file."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", model_name).strip("_")
+    return Path(settings.EMBEDDING_BUNDLE_DIR) / f"{slug}-{law_hash[:16]}.npy"
+
+
+def load_bundle(path: Path) -> Optional[EmbeddingBundle]:
+    """Memory-map an existing bundle; None if absent or unreadable."""
+    index_path = path.with_suffix(".json")
+    if not path.exists() or not index_path.exists():
+        return None
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        vectors = np.load(path, mmap_mode="r")
+        return EmbeddingBundle(vectors, index["queries"], index["passages"])
+    except Exception as e:
+        log.warning("embedding_bundle_unreadable", path=str(path), error=str(e))
+        return None
+
+
+def build_bundle(embedder: "EmbeddingService", path: Path) -> Optional[EmbeddingBundle]:
+    """Embed every fixed question and template clause and write the bundle atomically."""
+    db = load_law_database()
+    queries, passages = fixed_questions(db), template_clauses(db)
+    if not queries and not passages:
+        log.warning("embedding_bundle_empty")
+        return None
+    start = time.time()
+    parts = []
+    if queries:
+        parts.append(embedder.embed_texts(queries, prefix="query: "))
+    if passages:
+        parts.append(embedder.embed_texts(passages, prefix="passage: "))
+    vectors = np.concatenate(parts).astype(np.float32, copy=False)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npy")
+    np.save(tmp, vectors)
+    path.with_suffix(".json").write_text(
+        json.dumps({"model": embedder.model_id, "queries": queries, "passages": passages}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)  # the .npy appearing last marks the bundle complete
+    _remove_stale(path)
+    log.info(
+        "embedding_bundle_built",
+        path=str(path),
+        queries=len(queries),
+        passages=len(passages),
+        seconds=round(time.time() - start, 2),
+    )
+    return load_bundle(path)
+
+
+def _remove_stale(current: Path) -> None:
+    """Drop bundles for the same model built from older law files."""
+    prefix = current.name.rsplit("-", 1)[0] + "-"
+    for old in current.parent.glob(f"{prefix}*"):
+        if not old.name.startswith(current.stem):
+            old.unlink(missing_ok=True)
+
+
+# ── Process-wide bundle ──────────────────────────────────
+_bundle: Optional[EmbeddingBundle] = None
+_bundle_checked = False
+_bundle_model: Optional[str] = None
+
+
+def get_bundle(model_id: Optional[str] = None) -> Optional[EmbeddingBundle]:
+    """The bundle for `model_id` (default: the configured model) and the law files, if one has been built."""
+    global _bundle, _bundle_checked, _bundle_model
+    if not settings.EMBEDDING_BUNDLE_ENABLED:
+        return None
+    model_id = model_id or embedding_model_id()
+    if not _bundle_checked or _bundle_model != model_id:
+        _bundle_checked, _bundle_model = True, model_id
+        _bundle = load_bundle(bundle_path(model_id, law_database_hash()))
+    return _bundle
+
+
+def ensure_bundle(embedder: "EmbeddingService", rebuild: bool = False) -> Optional[EmbeddingBundle]:
+    """Load the current bundle, building it first if the law files changed (call at startup)."""
+    global _bundle, _bundle_checked, _bundle_model
+    if not settings.EMBEDDING_BUNDLE_ENABLED:
+        return None
+    path = bundle_path(embedder.model_id, law_database_hash())
+    bundle = None if rebuild else load_bundle(path)
+    if bundle is None:
+        bundle = build_bundle(embedder, path)
+    _bundle, _bundle_checked, _bundle_model = bundle, True, embedder.model_id
+    m.EMBEDDING_BUNDLE_SIZE.set(len(bundle) if bundle is not None else 0)
+    log.info("embedding_bundle_ready", path=str(path), vectors=len(bundle) if bundle is not None else 0)
+    return bundle
@@ -0,0 +1,198 @@
+"""Content-hash embedding cache — LRU in memory over an LRU memory-mapped float32 file on disk."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+try:  # exclusive use of the disk tier by one process
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+log = get_logger("embedding_cache")
+
+_KEY_BYTES = 32
+
+
+class EmbeddingCache:
+    """Vectors by SHA-256 of (model, prefixed text with whitespace collapsed).
+
+    Only hashes and vectors are kept, never the text. The disk tier is a
+    fixed-capacity slot file: `vectors.f32` (capacity × dim), `keys.bin`
+    (capacity × 32 bytes) and `ticks.u64` (last use per slot; 0 = empty),
+    so the least recently used slots are reused first. Only the process
+    holding `lock` writes it; others fall back to the memory tier.
+    """
+
+    def __init__(self, directory: Path, model_id: str, memory_entries: int, disk_entries: int):
+        self.directory = Path(directory)
+        self.model_id = model_id
+        self.memory_entries = memory_entries
+        self.capacity = disk_entries
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._slots: dict[bytes, int] = {}
+        self._tick = 0
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._ticks: Optional[np.memmap] = None
+        self._lock_file = None
+        self._disk_ok = disk_entries > 0 and self._acquire_dir()
+        if self._disk_ok:
+            self._open_existing()
+
+    def key(self, prefixed: str) -> bytes:
+        h = hashlib.sha256(self.model_id.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(" ".join(prefixed.split()).encode("utf-8"))
+        return h.digest()
+
+    # ── Disk tier ──
+
+    def _acquire_dir(self) -> bool:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._lock_file = open(self.directory / "lock", "a+")
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError as e:
+            log.warning("embedding_cache_disk_unavailable", path=str(self.directory), error=str(e))
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            return False
+
+    def _meta_path(self) -> Path:
+        return self.directory / "meta.json"
+
+    def _open_existing(self) -> None:
+        try:
+            meta = json.loads(self._meta_path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if meta.get("model") != self.model_id or meta.get("capacity") != self.capacity:
+            log.info("embedding_cache_reset", path=str(self.directory), reason="model or capacity changed")
+            self._meta_path().unlink(missing_ok=True)
+            return
+        try:
+            self._map(int(meta["dim"]), "r+")
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("embedding_cache_unreadable", path=str(self.directory), error=str(e))
+            self._vectors = self._keys = self._ticks = None
+            return
+        used = np.nonzero(self._ticks)[0]
+        self._slots = {self._keys[i].tobytes(): int(i) for i in used}
+        self._tick = int(self._ticks.max()) if len(used) else 0
+        m.EMBEDDING_CACHE_DISK_ENTRIES.set(len(self._slots))
+        log.info("embedding_cache_opened", path=str(self.directory), entries=len(self._slots))
+
+    def _map(self, dim: int, mode: str) -> None:
+        d = self.directory
+        self._vectors = np.memmap(d / "vectors.f32", dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        self._keys = np.memmap(d / "keys.bin", dtype=np.uint8, mode=mode, shape=(self.capacity, _KEY_BYTES))
+        self._ticks = np.memmap(d / "ticks.u64", dtype=np.uint64, mode=mode, shape=(self.capacity,))
+
+    def _create(self, dim: int) -> None:
+        self._map(dim, "w+")
+        self._meta_path().write_text(
+            json.dumps({"model": self.model_id, "dim": dim, "capacity": self.capacity}), encoding="utf-8"
+        )
+
+    def _next_tick(self) -> int:
+        self._tick += 1
+        return self._tick
+
+    # ── Lookup / insert ──
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        out: List[Optional[np.ndarray]] = []
+        memory = disk = 0
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    memory += 1
+                else:
+                    slot = self._slots.get(key)
+                    if slot is not None:
+                        vector = np.array(self._vectors[slot])
+                        self._ticks[slot] = self._next_tick()
+                        self._remember(key, vector)
+                        disk += 1
+                out.append(vector)
+        m.EMBEDDING_CACHE_LOOKUPS.labels(result="memory").inc(memory)
+        m.EMBEDDING_CACHE_LOOKUPS.labels(result="disk").inc(disk)
+        m.EMBEDDING_CACHE_LOOKUPS.labels(result="miss").inc(len(keys) - memory - disk)
+        return out
+
+    def put_many(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._remember(key, vector)
+            if self._disk_ok:
+                self._write_disk(keys, vectors)
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _write_disk(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        if self._vectors is None:
+            self._create(vectors.shape[1])
+        elif self._vectors.shape[1] != vectors.shape[1]:
+            return
+        new: List[int] = []
+        seen: set[bytes] = set()
+        for i, key in enumerate(keys):
+            if key not in self._slots and key not in seen:
+                seen.add(key)
+                new.append(i)
+        new = new[: self.capacity]
+        if not new:
+            return
+        # Least recently used slots first; empty slots have tick 0 and go before any entry.
+        if len(new) < self.capacity:
+            slots = np.argpartition(self._ticks, len(new) - 1)[: len(new)]
+        else:
+            slots = np.arange(self.capacity)
+        for i, slot in zip(new, slots):
+            if self._ticks[slot]:
+                self._slots.pop(self._keys[slot].tobytes(), None)
+            self._vectors[slot] = vectors[i]
+            self._keys[slot] = np.frombuffer(keys[i], dtype=np.uint8)
+            self._ticks[slot] = self._next_tick()
+            self._slots[keys[i]] = int(slot)
+        m.EMBEDDING_CACHE_DISK_ENTRIES.set(len(self._slots))
+
+    def close(self) -> None:
+        with self._lock:
+            for arr in (self._vectors, self._keys, self._ticks):
+                if arr is not None:
+                    arr.flush()
+            self._vectors = self._keys = self._ticks = None
+            self._slots.clear()
+            self._disk_ok = False
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+
+def cache_dir(root: str, model_id: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", model_id).strip("_")
+    return Path(root) / slug
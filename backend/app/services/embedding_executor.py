@@ -0,0 +1,176 @@
+"""Embedding executor — micro-batches encode calls from concurrent requests on one dedicated thread."""
+
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, List, Literal, Optional, Sequence
+
+import numpy as np
+
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("embedding_executor")
+
+Kind = Literal["query", "bulk"]
+_PRIORITY = {"query": 0, "bulk": 1}
+_STOP_PRIORITY = 99
+
+
+class _Request:
+    __slots__ = ("kind", "texts", "slices", "future", "enqueued_at", "taken", "next_slice", "done_rows", "out")
+
+    def __init__(self, kind: Kind, texts: List[str], slices: Optional[List[List[int]]] = None):
+        self.kind = kind
+        self.texts = texts
+        self.slices = slices  # caller-planned batches (row indices), or None for contiguous slices
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.taken = 0  # rows handed to a batch so far
+        self.next_slice = 0
+        self.done_rows = 0
+        self.out: Optional[np.ndarray] = None
+
+
+class EmbeddingExecutor:
+    """One worker thread owns every forward pass, so the event loop never runs the model.
+
+    The worker takes the highest-priority request (queries before bulk
+    passages), waits up to `max_wait` seconds for more, and encodes up to
+    `max_batch` texts in one call. A large request is consumed a slice at a
+    time, so queries queued behind an ingestion wait for at most one batch.
+    A request submitted with `slices` is consumed one planned slice per
+    call instead, each run on its own (the caller sized it, e.g. by token
+    budget over the whole request). submit() returns a concurrent Future
+    (await it with asyncio.wrap_future).
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch: int, max_wait: float):
+        self._encode = encode
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self._queue: "queue.PriorityQueue[tuple[int, int, Optional[_Request]]]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, texts: List[str], kind: Kind = "query", slices: Optional[List[List[int]]] = None) -> Future:
+        """Queue already-prefixed texts; the Future resolves to a float32 array, one row per text.
+
+        `slices`, if given, must partition range(len(texts)).
+        """
+        request = _Request(kind, list(texts), slices)
+        if not request.texts:
+            request.future.set_result(np.empty((0, 0), dtype=np.float32))
+            return request.future
+        self._ensure_started()
+        self._put(request, next(self._seq))
+        m.EMBEDDING_QUEUE_DEPTH.inc()
+        return request.future
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the worker after the queued work is done."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put((_STOP_PRIORITY, next(self._seq), None))
+            thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-executor", daemon=True)
+                self._thread.start()
+
+    def _put(self, request: _Request, seq: int) -> None:
+        self._queue.put((_PRIORITY[request.kind], seq, request))
+
+    def _run(self) -> None:
+        while True:
+            priority, seq, request = self._queue.get()
+            if request is None:
+                return
+            batch = self._gather(seq, request)
+            if batch:
+                self._execute(batch)
+
+    def _gather(self, seq: int, request: _Request) -> List[tuple[_Request, Sequence[int]]]:
+        """Fill one batch: this request, then whatever arrives within max_wait (up to max_batch texts)."""
+        batch: List[tuple[_Request, Sequence[int]]] = []
+        size = 0
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            if request.future.done():  # cancelled by its caller, or failed in an earlier slice
+                m.EMBEDDING_QUEUE_DEPTH.dec()
+            elif request.slices is not None and batch:
+                self._put(request, seq)  # a planned slice runs on its own, next time round
+                break
+            else:
+                if request.taken == 0:
+                    m.EMBEDDING_QUEUE_WAIT.labels(kind=request.kind).observe(time.monotonic() - request.enqueued_at)
+                if request.slices is not None:
+                    rows: Sequence[int] = request.slices[request.next_slice]
+                    request.next_slice += 1
+                    size = self.max_batch
+                else:
+                    take = min(len(request.texts) - request.taken, self.max_batch - size)
+                    rows = range(request.taken, request.taken + take)
+                    size += take
+                batch.append((request, rows))
+                request.taken += len(rows)
+                if request.taken < len(request.texts):
+                    self._put(request, seq)  # keeps its place ahead of later requests
+                    break
+                m.EMBEDDING_QUEUE_DEPTH.dec()
+                if size >= self.max_batch:
+                    break
+            try:
+                remaining = deadline - time.monotonic()
+                priority, seq, request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put((priority, seq, None))
+                break
+        return batch
+
+    def _execute(self, batch: List[tuple[_Request, Sequence[int]]]) -> None:
+        texts = [request.texts[i] for request, rows in batch for i in rows]
+        start = time.perf_counter()
+        try:
+            vectors = np.asarray(self._encode(texts), dtype=np.float32)
+        except BaseException as e:
+            log.warning("embedding_batch_failed", texts=len(texts), error=str(e))
+            for request, _ in batch:
+                _settle(request.future, exception=e)
+            return
+        elapsed = time.perf_counter() - start
+        m.EMBEDDING_BATCH_SIZE.observe(len(texts))
+        m.EMBEDDING_TEXTS.inc(len(texts))
+        if elapsed > 0:
+            m.EMBEDDING_THROUGHPUT.set(len(texts) / elapsed)
+
+        offset = 0
+        for request, rows in batch:
+            if request.out is None:
+                request.out = np.empty((len(request.texts), vectors.shape[1]), dtype=np.float32)
+            request.out[rows] = vectors[offset : offset + len(rows)]
+            request.done_rows += len(rows)
+            offset += len(rows)
+            if request.done_rows == len(request.texts):
+                _settle(request.future, result=request.out)
+
+
+def _settle(future: Future, result=None, exception: Optional[BaseException] = None) -> None:
+    # The caller may have cancelled in the meantime; nobody is waiting then.
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
@@ -141,8 +141,12 @@ def get_relevant_acts_for_contract(contract_type: str) -> List[dict]:
     return matched
 
 
-def get_acts_context_for_prompt(contract_type: str) -> str:
-    """Generate a context string of relevant Indian acts for LLM prompts."""
+def get_acts_context_for_prompt(contract_type: str, compact: bool = False) -> str:
+    """Generate a context string of relevant Indian acts for LLM prompts.
+
+    `compact` drops ministry and reference URL lines — they cost tokens on
+    every call without helping the model cite sections.
+    """
     relevant = get_relevant_acts_for_contract(contract_type)
 
     if not relevant:
@@ -156,6 +160,11 @@ def get_acts_context_for_prompt(contract_type: str) -> str:
         ministry = act.get("ministry", "")
         url = act.get("url", "")
 
+        if compact:
+            # Titles already carry the year; skip summaries that just repeat them
+            lines.append(f"• {title} — {summary}" if summary and summary != title else f"• {title}")
+            continue
+
         lines.append(f"• {title} ({year}) — {summary}")
         if ministry:
             lines.append(f"  Ministry: {ministry}")
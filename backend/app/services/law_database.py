@@ -0,0 +1,78 @@
+"""Indian law standard-clause database — loading, content hash, and the fixed questions built from it."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import List
+
+from app.utils.logger import get_logger
+
+log = get_logger("law_database")
+
+LAWS_DIR = Path(__file__).resolve().parent.parent / "data" / "indian_laws"
+
+
+def load_law_database(laws_dir: Path = LAWS_DIR) -> dict:
+    """Load all JSON law files as {contract_type: [standard clause, ...]}."""
+    db = {}
+    if not laws_dir.exists():
+        log.warning("law_dir_missing", path=str(laws_dir))
+        return db
+    for f in sorted(laws_dir.glob("*.json")):
+        try:
+            data = json.loads(f.read_text(encoding="utf-8"))
+            ctype = data.get("contract_type", f.stem)
+            db[ctype] = data.get("standard_clauses", [])
+        except Exception as e:
+            log.error("law_file_load_error", file=f.name, error=str(e))
+    return db
+
+
+def law_database_hash(laws_dir: Path = LAWS_DIR) -> str:
+    """SHA-256 over the law JSON files (names + bytes) — changes whenever any file does."""
+    h = hashlib.sha256()
+    for f in sorted(laws_dir.glob("*.json")):
+        h.update(f.name.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+# ── Fixed questions (identical for every contract of a type) ──
+def blindspot_question(clause: dict) -> str:
+    return (
+        f"Does this contract contain a clause about '{clause.get('clause_name', '')}'? "
+        f"Look for any mention of: {', '.join(clause.get('keywords_to_detect', []))}. "
+        f"Answer with ONLY 'YES' or 'NO'."
+    )
+
+
+def red_flag_question(contract_type: str) -> str:
+    return (
+        f"This is a {contract_type} contract. Analyze ALL clauses for violations "
+        f"of Indian law. Look for illegal terms, unfair clauses, and rights violations. "
+        f"Cite specific Indian Acts and their sections. "
+        f"Return the red flags as a JSON array."
+    )
+
+
+def safe_clause_question(contract_type: str) -> str:
+    return f"Find the clauses in this {contract_type} contract that are fair and protect the weaker party."
+
+
+def fixed_questions(db: dict) -> List[str]:
+    """Every question the analysis pipeline asks regardless of the contract's text."""
+    questions: List[str] = []
+    for contract_type, clauses in db.items():
+        questions.append(red_flag_question(contract_type))
+        questions.append(safe_clause_question(contract_type))
+        questions.extend(blindspot_question(c) for c in clauses)
+    return list(dict.fromkeys(questions))
+
+
+def template_clauses(db: dict) -> List[str]:
+    """Suggested replacement clause texts from the law database."""
+    texts = (c.get("template_clause", "") for clauses in db.values() for c in clauses)
+    return list(dict.fromkeys(t for t in texts if t))
@@ -0,0 +1,142 @@
+"""Per-session BM25 lexical index and reciprocal rank fusion for hybrid retrieval."""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import settings
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("lexical_index")
+
+# Words plus joined forms like "lock-in", "12.3", "s.27" kept whole.
+_TOKEN_RE = re.compile(r"\w+(?:[-./]\w+)*", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens; joined forms are also split so "lock-in" matches "lock in"."""
+    tokens: List[str] = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        tokens.append(tok)
+        parts = re.split(r"[-./]", tok)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over one session's chunks.
+
+    Keeps postings per term so a query only scores chunks sharing a term with it.
+    `kind` labels the timing metrics, so short-lived indexes (context
+    packing builds one per question) don't skew the session index figures.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[dict]] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        kind: str = "session",
+    ):
+        start = time.perf_counter()
+        self.kind = kind
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.metadatas = list(metadatas) if metadatas is not None else [{} for _ in self.ids]
+        self.k1 = k1
+        self.b = b
+        self.created_at = time.monotonic()
+        self._position = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        for i, text in enumerate(self.texts):
+            counts = Counter(tokenize(text))
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[i] = tf
+        n = len(self.texts)
+        self._avg_len = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log((n - len(docs) + 0.5) / (len(docs) + 0.5) + 1.0)
+            for term, docs in self._postings.items()
+        }
+        m.BM25_BUILD_DURATION.labels(kind=kind).observe(time.perf_counter() - start)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (chunk id, score), best first; chunks with no query term are omitted."""
+        start = time.perf_counter()
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            docs = self._postings.get(term)
+            if not docs:
+                continue
+            idf = self._idf[term]
+            for i, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_len or 1.0))
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        m.BM25_QUERY_DURATION.labels(kind=self.kind).observe(time.perf_counter() - start)
+        return [(self.ids[i], score) for i, score in best]
+
+    def document(self, chunk_id: str) -> Tuple[str, dict]:
+        i = self._position[chunk_id]
+        return self.texts[i], self.metadatas[i]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Fuse ranked id lists: score(d) = Σ 1 / (k + rank). Ties keep first-seen order."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda cid: scores[cid], reverse=True)
+
+
+class LexicalIndexStore:
+    """Process-local BM25 indexes by session — bounded LRU, expiring with the session TTL."""
+
+    def __init__(self, max_sessions: int, ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[BM25Index]:
+        index = self._indexes.get(session_id)
+        if index is None:
+            return None
+        if time.monotonic() - index.created_at > self.ttl_seconds:
+            self.drop(session_id)
+            return None
+        self._indexes.move_to_end(session_id)
+        return index
+
+    def put(self, session_id: str, index: BM25Index) -> None:
+        self._indexes[session_id] = index
+        self._indexes.move_to_end(session_id)
+        while len(self._indexes) > self.max_sessions:
+            self._indexes.popitem(last=False)
+
+    def drop(self, session_id: str) -> None:
+        self._indexes.pop(session_id, None)
+
+
+_store: LexicalIndexStore | None = None
+
+
+def get_lexical_indexes() -> LexicalIndexStore:
+    global _store
+    if _store is None:
+        _store = LexicalIndexStore(settings.BM25_MAX_SESSIONS, settings.SESSION_TTL_SECONDS)
+    return _store
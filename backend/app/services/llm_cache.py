@@ -0,0 +1,238 @@
+"""Content-addressed LLM response cache — in-process LRU + Redis tier."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+import redis.asyncio as aioredis
+
+from config import settings
+from app.security.encryption import EncryptionService
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("llm_cache")
+
+_REDIS_PREFIX = "llmcache:"
+_LOCK_PREFIX = "llmflight:"
+
+
+def request_fingerprint(
+    model: str,
+    system_prompt: str,
+    prompt: str,
+    temperature: float,
+    json_mode: bool,
+    max_tokens: int,
+    thinking: bool = True,
+) -> str:
+    """SHA-256 over everything that determines the completion."""
+    raw = json.dumps(
+        [model, system_prompt, prompt, round(float(temperature), 4), bool(json_mode), int(max_tokens), bool(thinking)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier response cache.
+
+    The in-process tier is a bounded LRU (entries + bytes) keyed by session,
+    so a session wipe can evict its plaintext entries (evict_session). The
+    Redis tier only ever holds entries encrypted with the caller's session
+    key, so no plaintext contract data leaves the process and entries become
+    unreadable once the session key is wiped.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        ttl_seconds: int | None = None,
+    ):
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_BYTES
+        self.ttl = ttl_seconds or settings.LLM_CACHE_TTL_SECONDS
+        self._lru: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._bytes = 0
+        self._redis: Optional[aioredis.Redis] = None
+
+    def set_redis(self, client: Optional[aioredis.Redis]) -> None:
+        self._redis = client
+
+    # ── In-process tier ──────────────────────────────────
+    @staticmethod
+    def _scope(session_key: str | None) -> str:
+        """Per-session namespace shared by both tiers ("-" for session-less prompts)."""
+        if not session_key:
+            return "-"
+        return hashlib.sha256(session_key.encode()).hexdigest()[:16]
+
+    @classmethod
+    def scoped_key(cls, key: str, session_key: str | None) -> str:
+        """`key` within its session's namespace, e.g. for in-process single-flight."""
+        return f"{cls._scope(session_key)}:{key}"
+
+    def _lru_get(self, key: str) -> str | None:
+        item = self._lru.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            self._lru_pop(key)
+            return None
+        self._lru.move_to_end(key)
+        return value
+
+    def _lru_pop(self, key: str) -> None:
+        value, _ = self._lru.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+
+    def _lru_set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._lru:
+            self._lru_pop(key)
+        self._lru[key] = (value, time.monotonic() + self.ttl)
+        self._bytes += size
+        while len(self._lru) > self.max_entries or self._bytes > self.max_bytes:
+            self._lru_pop(next(iter(self._lru)))
+        m.LLM_CACHE_BYTES.set(self._bytes)
+
+    # ── Redis tier ───────────────────────────────────────
+    @classmethod
+    def _redis_key(cls, key: str, session_key: str) -> str:
+        # Namespace by session so each entry decrypts with exactly one key.
+        return f"{_REDIS_PREFIX}{cls._scope(session_key)}:{key}"
+
+    async def _redis_get(self, key: str, session_key: str) -> str | None:
+        try:
+            raw = await self._redis.get(self._redis_key(key, session_key))
+            if raw is None:
+                return None
+            blob = base64.b64decode(raw)
+            return EncryptionService(session_key).decrypt(blob).decode("utf-8")
+        except Exception as e:
+            log.debug("llm_cache_redis_get_failed", error=str(e))
+            return None
+
+    async def _redis_set(self, key: str, value: str, session_key: str) -> None:
+        try:
+            blob = EncryptionService(session_key).encrypt(value.encode("utf-8"))
+            await self._redis.setex(
+                self._redis_key(key, session_key),
+                self.ttl,
+                base64.b64encode(blob).decode("ascii"),
+            )
+        except Exception as e:
+            log.debug("llm_cache_redis_set_failed", error=str(e))
+
+    # ── Public API ───────────────────────────────────────
+    async def get(self, key: str, session_key: str | None = None) -> str | None:
+        value = self._lru_get(self.scoped_key(key, session_key))
+        if value is not None:
+            m.LLM_CACHE_HITS.labels(tier="memory").inc()
+            m.LLM_CACHE_BYTES_SERVED.inc(len(value.encode("utf-8")))
+            return value
+
+        if self._redis is not None and session_key:
+            value = await self._redis_get(key, session_key)
+            if value is not None:
+                m.LLM_CACHE_HITS.labels(tier="redis").inc()
+                m.LLM_CACHE_BYTES_SERVED.inc(len(value.encode("utf-8")))
+                self._lru_set(self.scoped_key(key, session_key), value)
+                return value
+
+        m.LLM_CACHE_MISSES.inc()
+        return None
+
+    async def set(self, key: str, value: str, session_key: str | None = None) -> None:
+        self._lru_set(self.scoped_key(key, session_key), value)
+        if self._redis is not None and session_key:
+            await self._redis_set(key, value, session_key)
+
+    async def fill(
+        self,
+        key: str,
+        session_key: str | None,
+        produce: Callable[[], Awaitable[str]],
+    ) -> str:
+        """Run `produce` at most once across processes for the same key.
+
+        The first worker takes a short Redis lock and computes; the others
+        poll the Redis tier for its result. Falls back to computing locally
+        if Redis is unavailable or the leader does not finish in time.
+        `produce` is expected to store its result via set().
+        """
+        if not (settings.LLM_SINGLEFLIGHT_REDIS and self._redis is not None and session_key):
+            return await produce()
+
+        lock_key = self._redis_key(key, session_key).replace(_REDIS_PREFIX, _LOCK_PREFIX, 1)
+        token = uuid.uuid4().hex
+        ttl = settings.LLM_SINGLEFLIGHT_LOCK_TTL_SECONDS
+        give_up_at = time.monotonic() + ttl
+        collapsed = False
+
+        while True:
+            try:
+                acquired = await self._redis.set(lock_key, token, nx=True, ex=ttl)
+            except Exception as e:
+                log.debug("llm_flight_lock_failed", error=str(e))
+                return await produce()
+
+            if acquired:
+                try:
+                    return await produce()
+                finally:
+                    try:
+                        if await self._redis.get(lock_key) == token:
+                            await self._redis.delete(lock_key)
+                    except Exception:
+                        pass
+
+            if not collapsed:
+                m.SINGLEFLIGHT_COLLAPSED.labels(kind="llm_redis").inc()
+                collapsed = True
+            await asyncio.sleep(settings.LLM_SINGLEFLIGHT_POLL_SECONDS)
+            value = await self._redis_get(key, session_key)
+            if value is not None:
+                self._lru_set(self.scoped_key(key, session_key), value)
+                return value
+            if time.monotonic() > give_up_at:
+                return await produce()
+
+    def evict_session(self, session_key: str) -> int:
+        """Drop a session's in-process entries (its Redis entries die with the key)."""
+        prefix = f"{self._scope(session_key)}:"
+        stale = [k for k in self._lru if k.startswith(prefix)]
+        for k in stale:
+            self._lru_pop(k)
+        m.LLM_CACHE_BYTES.set(self._bytes)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._lru.clear()
+        self._bytes = 0
+        m.LLM_CACHE_BYTES.set(0)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._lru), "bytes": self._bytes, "redis": self._redis is not None}
+
+
+_cache: LLMResponseCache | None = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMResponseCache()
+    return _cache
@@ -0,0 +1,163 @@
+"""LLM cassettes — record chat completions to a file and replay them offline.
+
+Set LLM_CASSETTE_MODE=record to capture every successful chat-completions
+exchange (with its latency) to LLM_CASSETTE_PATH, then LLM_CASSETTE_MODE=replay
+to serve them back without network. Requests are matched by a hash of the
+prompt (messages + JSON/stream mode), so a replay run must send the same
+prompts as the recording; repeated prompts replay their recordings in order.
+Replay sleeps for the recorded latency, or LLM_CASSETTE_LATENCY seconds when
+set, so perf runs of scoring, redlining and /query stay comparable.
+
+Tip: set LLM_CACHE_ENABLED=false for perf runs, or cached answers will skip
+the cassette entirely.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+
+import httpx
+
+from config import settings
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("llm_cassette")
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+
+def prompt_hash(body: dict) -> str:
+    """Match key for a chat-completions body — model and sampling knobs are ignored."""
+    key = {
+        "messages": body.get("messages", []),
+        "json": (body.get("response_format") or {}).get("type") == "json_object",
+        "stream": bool(body.get("stream")),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class Cassette:
+    """Recorded exchanges from a JSONL file, grouped by prompt hash."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: dict[str, list[dict]] = defaultdict(list)
+        self._cursor: dict[str, int] = defaultdict(int)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]].append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def next(self, key: str) -> dict | None:
+        """The next recording for `key`; the last one repeats once all were served."""
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+        i = self._cursor[key]
+        self._cursor[key] = i + 1
+        return entries[min(i, len(entries) - 1)]
+
+    def append(self, entry: dict) -> None:
+        self._entries[entry["key"]].append(entry)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records through `inner`, or replays from the cassette.
+
+    Sitting below LLMClient keeps the scheduler, breakers, hedging, usage
+    accounting and JSON repair all on the measured path.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str,
+        inner: httpx.AsyncBaseTransport | None = None,
+        latency: float | None = None,
+    ):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        if mode == MODE_RECORD and inner is None:
+            raise ValueError("Record mode needs a real transport to record through")
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner
+        self.latency = latency
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/chat/completions"):
+            if self.mode == MODE_REPLAY:
+                return httpx.Response(200, json={"data": []})  # e.g. health_check's /models
+            return await self.inner.handle_async_request(request)
+
+        key = prompt_hash(json.loads(request.content or b"{}"))
+        if self.mode == MODE_REPLAY:
+            return await self._replay(key)
+        return await self._record(key, request)
+
+    async def _replay(self, key: str) -> httpx.Response:
+        entry = self.cassette.next(key)
+        if entry is None:
+            m.LLM_CASSETTE_REQUESTS.labels(mode=MODE_REPLAY, outcome="miss").inc()
+            log.warning("llm_cassette_miss", key=key[:12])
+            return httpx.Response(404, json={"error": {"message": f"No cassette recording for prompt {key[:12]}"}})
+        m.LLM_CASSETTE_REQUESTS.labels(mode=MODE_REPLAY, outcome="hit").inc()
+        await asyncio.sleep(self.latency if self.latency is not None else entry["latency"])
+        return httpx.Response(
+            entry["status"],
+            headers={"Content-Type": entry["content_type"]},
+            content=entry["body"].encode("utf-8"),
+        )
+
+    async def _record(self, key: str, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        resp = await self.inner.handle_async_request(request)
+        try:
+            body = await resp.aread()  # decoded and whole, streams included
+        finally:
+            await resp.aclose()
+        latency = time.perf_counter() - start
+        content_type = resp.headers.get("Content-Type", "application/json")
+
+        if resp.status_code < 400:
+            self.cassette.append({
+                "key": key,
+                "status": resp.status_code,
+                "content_type": content_type,
+                "body": body.decode("utf-8", errors="replace"),
+                "latency": round(latency, 4),
+                "recorded_at": int(time.time()),
+            })
+            m.LLM_CASSETTE_REQUESTS.labels(mode=MODE_RECORD, outcome="recorded").inc()
+        # Content-Encoding is dropped: the body above is already decoded.
+        return httpx.Response(resp.status_code, headers={"Content-Type": content_type}, content=body)
+
+    async def aclose(self) -> None:
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+def cassette_transport(http2: bool, limits: httpx.Limits) -> CassetteTransport | None:
+    """Transport for the shared LLM pool per LLM_CASSETTE_MODE; None when cassettes are off."""
+    mode = settings.LLM_CASSETTE_MODE
+    if not mode:
+        return None
+    cassette = Cassette(settings.LLM_CASSETTE_PATH)
+    inner = httpx.AsyncHTTPTransport(http2=http2, limits=limits) if mode == MODE_RECORD else None
+    log.info("llm_cassette_enabled", mode=mode, path=settings.LLM_CASSETTE_PATH, recordings=len(cassette))
+    return CassetteTransport(cassette, mode, inner=inner, latency=settings.LLM_CASSETTE_LATENCY)
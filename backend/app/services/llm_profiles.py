@@ -0,0 +1,42 @@
+"""Named generation profiles — which model and sampling settings each LLM call site uses."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from config import settings
+from app.utils.logger import get_logger
+
+log = get_logger("llm_profiles")
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    name: str
+    model: str
+    max_tokens: int
+    temperature: float
+    thinking: bool
+    timeout: float
+
+
+def get_profile(name: str) -> GenerationProfile:
+    """Resolve a profile from LLM_PROFILES; unknown names fall back to LLM_DEFAULT_PROFILE."""
+    spec = settings.LLM_PROFILES.get(name)
+    if spec is None:
+        log.warning("llm_profile_unknown", profile=name, fallback=settings.LLM_DEFAULT_PROFILE)
+        name = settings.LLM_DEFAULT_PROFILE
+        spec = settings.LLM_PROFILES.get(name, {})
+    return GenerationProfile(
+        name=name,
+        model=spec.get("model") or settings.OPENROUTER_MODEL,
+        max_tokens=int(spec.get("max_tokens", settings.LLM_MAX_TOKENS)),
+        temperature=float(spec.get("temperature", settings.LLM_TEMPERATURE)),
+        thinking=bool(spec.get("thinking", True)),
+        timeout=float(spec.get("timeout", settings.LLM_TIMEOUT)),
+    )
+
+
+def profile_for(call_site: str) -> GenerationProfile:
+    """The profile LLM_CALL_SITE_PROFILES assigns to `call_site`."""
+    return get_profile(settings.LLM_CALL_SITE_PROFILES.get(call_site, settings.LLM_DEFAULT_PROFILE))
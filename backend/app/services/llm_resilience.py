@@ -0,0 +1,165 @@
+"""Resilience primitives for LLM calls — circuit breaker, adaptive timeouts, retry budget."""
+
+from __future__ import annotations
+
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Callable
+
+from config import settings
+from app.utils.helpers import clamp, utcnow
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("llm_resilience")
+
+STATE_CLOSED = "closed"
+STATE_HALF_OPEN = "half_open"
+STATE_OPEN = "open"
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+
+class CircuitBreaker:
+    """Fails fast while the provider is degraded.
+
+    closed → open after `failure_threshold` consecutive failures; open →
+    half-open after `reset_seconds`; half-open lets one probe through every
+    `probe_interval` seconds and closes on the first success.
+    """
+
+    def __init__(
+        self,
+        name: str = "openrouter",
+        failure_threshold: int | None = None,
+        reset_seconds: float | None = None,
+        probe_interval: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.LLM_BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.LLM_BREAKER_RESET_SECONDS
+        self.probe_interval = probe_interval if probe_interval is not None else settings.LLM_BREAKER_PROBE_INTERVAL
+        self._clock = clock
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._last_probe = float("-inf")
+
+    @property
+    def state(self) -> str:
+        if self._state == STATE_OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._set_state(STATE_HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            log.warning("llm_circuit_state", breaker=self.name, state=state, failures=self._failures)
+        self._state = state
+        m.LLM_CIRCUIT_STATE.labels(backend=self.name).set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN:
+            now = self._clock()
+            if now - self._last_probe >= self.probe_interval:
+                self._last_probe = now
+                return True
+        m.LLM_CIRCUIT_REJECTIONS.labels(backend=self.name).inc()
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._state != STATE_CLOSED:
+            self._set_state(STATE_CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+            self._set_state(STATE_OPEN)
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies per call site → adaptive timeouts."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+
+    def observe(self, call_site: str, seconds: float) -> None:
+        self._samples.setdefault(call_site, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, call_site: str, q: float) -> float | None:
+        samples = self._samples.get(call_site)
+        if not samples or len(samples) < settings.LLM_TIMEOUT_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        idx = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[idx]
+
+    def timeout_for(self, call_site: str, ceiling: float | None = None) -> float:
+        """p(LLM_TIMEOUT_PERCENTILE) × multiplier, clamped; `ceiling` (default LLM_TIMEOUT) until warmed up."""
+        ceiling = float(ceiling if ceiling is not None else settings.LLM_TIMEOUT)
+        p = self.percentile(call_site, settings.LLM_TIMEOUT_PERCENTILE)
+        if p is None:
+            return ceiling
+        return float(clamp(p * settings.LLM_TIMEOUT_MULTIPLIER, min(settings.LLM_TIMEOUT_MIN, ceiling), ceiling))
+
+
+class RetryBudget:
+    """Caps retries to a fraction of request volume so they can't amplify an outage."""
+
+    def __init__(self, ratio: float | None = None, reserve: float | None = None, denied_metric=None):
+        self.ratio = ratio if ratio is not None else settings.LLM_RETRY_BUDGET_RATIO
+        self.reserve = float(reserve if reserve is not None else settings.LLM_RETRY_BUDGET_RESERVE)
+        self._denied = denied_metric if denied_metric is not None else m.LLM_RETRIES_DENIED
+        self._balance = self.reserve
+
+    def record_request(self) -> None:
+        self._balance = min(self.reserve, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._balance >= 1.0:
+            self._balance -= 1.0
+            return True
+        self._denied.inc()
+        return False
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After header → seconds (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - utcnow()).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Full-jitter exponential backoff; honours Retry-After plus a little jitter."""
+    base = settings.LLM_BACKOFF_BASE_SECONDS
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(settings.LLM_BACKOFF_MAX_SECONDS, base * (2 ** attempt)))
+
+
+# ── Process-wide instances ───────────────────────────────
+# Breakers and latency trackers live on each backend (see llm_router).
+_budget: RetryBudget | None = None
+
+
+def get_retry_budget() -> RetryBudget:
+    global _budget
+    if _budget is None:
+        _budget = RetryBudget()
+    return _budget
@@ -0,0 +1,140 @@
+"""Multi-backend routing for LLM calls — health-scored fallback order and hedging budget."""
+
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+from config import settings
+from app.services.llm_resilience import STATE_OPEN, CircuitBreaker, LatencyTracker, RetryBudget
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("llm_router")
+
+
+class Backend:
+    """One OpenAI-compatible chat-completions endpoint and its live health stats.
+
+    `health` is an EWMA of call outcomes (1 = success, 0 = failure) that
+    drifts back toward 1 while no call fails (LLM_BACKEND_HEALTH_HALF_LIFE_SECONDS),
+    so a demoted backend that only sees hedges is tried first again once
+    it has been quiet long enough. Each backend also keeps its own circuit
+    breaker and per-call-site latencies.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        api_key: str = "",
+        models: dict[str, str] | None = None,
+        alpha: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.models = models or {}
+        self.alpha = alpha
+        self._clock = clock
+        self._health = 1.0
+        self._health_updated = clock()
+        self.breaker = CircuitBreaker(name, clock=clock)
+        self.latency = LatencyTracker()
+        m.LLM_BACKEND_HEALTH.labels(backend=name).set(self._health)
+
+    @property
+    def health(self) -> float:
+        half_life = settings.LLM_BACKEND_HEALTH_HALF_LIFE_SECONDS
+        if half_life <= 0:
+            return self._health
+        elapsed = self._clock() - self._health_updated
+        return 1.0 - (1.0 - self._health) * 0.5 ** (elapsed / half_life)
+
+    def model_for(self, model: str) -> str:
+        """Map a profile's model id to this backend's name for it."""
+        return self.models.get(model, model)
+
+    def headers(self) -> dict[str, str]:
+        """Per-request auth header; none for keyless backends such as a local stub."""
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def record_success(self, call_site: str | None = None, seconds: float | None = None) -> None:
+        self.breaker.record_success()
+        self._update_health(1.0)
+        if call_site is not None and seconds is not None:
+            self.latency.observe(call_site, seconds)
+            m.LLM_BACKEND_LATENCY.labels(backend=self.name).observe(seconds)
+
+    def record_failure(self) -> None:
+        self.breaker.record_failure()
+        self._update_health(0.0)
+        m.LLM_BACKEND_ERRORS.labels(backend=self.name).inc()
+
+    def _update_health(self, outcome: float) -> None:
+        health = self.health
+        self._health = health + self.alpha * (outcome - health)
+        self._health_updated = self._clock()
+        m.LLM_BACKEND_HEALTH.labels(backend=self.name).set(self._health)
+
+    def hedge_delay(self, call_site: str) -> float | None:
+        """How long to wait on this backend before hedging; None until warmed up."""
+        return self.latency.percentile(call_site, settings.LLM_HEDGE_PERCENTILE)
+
+
+class BackendRouter:
+    """Orders backends for each attempt.
+
+    Configured order is the preference; backends with an open breaker are
+    skipped and those whose health dropped below LLM_BACKEND_MIN_HEALTH (or
+    that just failed this request) move to the back.
+    """
+
+    def __init__(self, backends: list[Backend]):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends = backends
+        self.hedge_budget = RetryBudget(
+            ratio=settings.LLM_HEDGE_BUDGET_RATIO,
+            reserve=settings.LLM_HEDGE_BUDGET_RESERVE,
+            denied_metric=m.LLM_HEDGES_DENIED,
+        )
+
+    @property
+    def primary(self) -> Backend:
+        return self.backends[0]
+
+    def ranked(self, avoid: Backend | None = None) -> list[Backend]:
+        available = [b for b in self.backends if b.breaker.state != STATE_OPEN]
+        return sorted(
+            available,
+            key=lambda b: (b.health < settings.LLM_BACKEND_MIN_HEALTH, b is avoid, self.backends.index(b)),
+        )
+
+
+def _configured_backends() -> list[Backend]:
+    """LLM_BACKENDS entries, or just OpenRouter when none are configured."""
+    specs = settings.LLM_BACKENDS or [
+        {"name": "openrouter", "base_url": settings.OPENROUTER_BASE_URL, "api_key": settings.OPENROUTER_API_KEY}
+    ]
+    return [
+        Backend(
+            name=spec.get("name") or f"backend{i}",
+            base_url=spec["base_url"],
+            api_key=spec.get("api_key", ""),
+            models=spec.get("models"),
+        )
+        for i, spec in enumerate(specs)
+    ]
+
+
+_router: BackendRouter | None = None
+
+
+def get_router() -> BackendRouter:
+    global _router
+    if _router is None:
+        _router = BackendRouter(_configured_backends())
+        log.info("llm_backends_configured", backends=[b.name for b in _router.backends])
+    return _router
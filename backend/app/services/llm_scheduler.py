@@ -0,0 +1,243 @@
+"""Priority-aware concurrency scheduler for outbound LLM calls."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Iterator
+
+from config import settings
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("llm_scheduler")
+
+# ── Priority classes (highest first) ─────────────────────
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_ANALYSIS = "analysis"
+PRIORITY_BACKGROUND = "background"
+PRIORITY_ORDER = (PRIORITY_INTERACTIVE, PRIORITY_ANALYSIS, PRIORITY_BACKGROUND)
+
+_current_priority: ContextVar[str] = ContextVar("llm_priority", default=PRIORITY_ANALYSIS)
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    """Run all LLM calls made inside this block at the given priority."""
+    if priority not in PRIORITY_ORDER:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """Reservation-style token bucket — paces requests to the provider's rate limit."""
+
+    def __init__(self, rate_per_minute: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token can be taken without waiting (0.0 = now)."""
+        now = self._clock()
+        blocked = self._blocked_until - now
+        if not self.enabled:
+            return max(blocked, 0.0)
+        self._refill(now)
+        deficit_wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+        return max(deficit_wait, blocked, 0.0)
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        now = self._clock()
+        if not self.enabled:
+            return max(self._blocked_until - now, 0.0)
+        self._refill(now)
+        self._tokens -= 1
+        deficit_wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        return max(deficit_wait, self._blocked_until - now, 0.0)
+
+    def refund(self) -> None:
+        if self.enabled:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds` (e.g. after a 429 Retry-After)."""
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+
+class LLMScheduler:
+    """Global concurrency cap with strict-priority queues and token-bucket pacing.
+
+    Interactive chat always gets the next rate-limit token and the next
+    free slot; analysis and background work soak up whatever capacity is
+    left. Tokens are taken before slots, so a paced caller never sits on a
+    slot, and are handed out one at a time as the bucket refills rather
+    than reserved ahead, so a background backlog cannot book the bucket's
+    future ahead of a chat request.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        rate_per_minute: float | None = None,
+        burst: int | None = None,
+    ):
+        self.max_concurrency = max(max_concurrency or settings.LLM_MAX_CONCURRENCY, 1)
+        self.bucket = TokenBucket(
+            rate_per_minute if rate_per_minute is not None else settings.LLM_RATE_LIMIT_RPM,
+            burst if burst is not None else settings.LLM_RATE_LIMIT_BURST,
+        )
+        self._active = 0
+        self._queues: dict[str, deque[asyncio.Future]] = {p: deque() for p in PRIORITY_ORDER}
+        self._token_queues: dict[str, deque[asyncio.Future]] = {p: deque() for p in PRIORITY_ORDER}
+        self._pacer: asyncio.Task | None = None
+
+    # ── Slot management ──────────────────────────────────
+    def _has_waiters(self) -> bool:
+        return any(self._queues.values())
+
+    def _wake_next(self) -> None:
+        for priority in PRIORITY_ORDER:
+            queue = self._queues[priority]
+            while queue:
+                fut = queue.popleft()
+                m.LLM_QUEUE_DEPTH.labels(priority=priority).set(len(queue))
+                if not fut.done():
+                    self._active += 1
+                    fut.set_result(None)
+                    return
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._wake_next()
+
+    async def _acquire_slot(self, priority: str) -> None:
+        if self._active < self.max_concurrency and not self._has_waiters():
+            self._active += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        queue = self._queues[priority]
+        queue.append(fut)
+        m.LLM_QUEUE_DEPTH.labels(priority=priority).set(len(queue))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was handed over just as we were cancelled — pass it on.
+                self._release()
+            elif fut in queue:
+                queue.remove(fut)
+                m.LLM_QUEUE_DEPTH.labels(priority=priority).set(len(queue))
+            raise
+
+    # ── Rate-limit tokens ────────────────────────────────
+    def _next_token_waiter(self) -> asyncio.Future | None:
+        for queue in self._token_queues.values():
+            while queue:
+                fut = queue.popleft()
+                if not fut.done():
+                    return fut
+        return None
+
+    async def _pace(self) -> None:
+        """Hand out one token at a time, highest priority first, as the bucket allows."""
+        while any(self._token_queues.values()):
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)  # re-checked: a 429 pause may have moved it
+                continue
+            fut = self._next_token_waiter()
+            if fut is not None:
+                self.bucket.reserve()
+                fut.set_result(None)
+
+    async def _acquire_token(self, priority: str) -> None:
+        if not any(self._token_queues.values()) and self.bucket.wait_time() == 0:
+            self.bucket.reserve()
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        queue = self._token_queues[priority]
+        queue.append(fut)
+        if self._pacer is None or self._pacer.done():
+            self._pacer = asyncio.create_task(self._pace())
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.bucket.refund()
+            elif fut in queue:
+                queue.remove(fut)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, priority: str | None = None) -> AsyncIterator[None]:
+        """Hold one rate-limit token, then one concurrency slot, for the block."""
+        priority = priority or current_priority()
+        if priority not in self._queues:
+            raise ValueError(f"Unknown LLM priority: {priority}")
+
+        start = time.monotonic()
+        await self._acquire_token(priority)
+        try:
+            await self._acquire_slot(priority)
+        except BaseException:
+            self.bucket.refund()
+            raise
+
+        m.LLM_QUEUE_WAIT.labels(priority=priority).observe(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def throttle(self, seconds: float) -> None:
+        """Back off every caller after the provider signals rate limiting."""
+        self.bucket.pause(seconds)
+        log.warning("llm_scheduler_throttled", seconds=round(seconds, 2))
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queued": {p: len(q) for p, q in self._queues.items()},
+            "pacing": {p: len(q) for p, q in self._token_queues.items()},
+        }
+
+
+# ── Process-wide instance (one per event loop) ───────────
+_scheduler: LLMScheduler | None = None
+_scheduler_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler, _scheduler_loop
+    loop = asyncio.get_running_loop()
+    if _scheduler is None or _scheduler_loop is not loop:
+        _scheduler = LLMScheduler()
+        _scheduler_loop = loop
+    return _scheduler
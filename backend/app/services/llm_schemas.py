@@ -0,0 +1,74 @@
+"""Schemas for structured LLM output — validated once per response, compiled once per process."""
+
+from __future__ import annotations
+
+from typing import Annotated, Any, Optional
+
+from pydantic import BaseModel, BeforeValidator, ConfigDict, TypeAdapter
+
+
+class _Draft(BaseModel):
+    """Lenient base: unknown keys are ignored, missing ones take the caller's defaults."""
+
+    model_config = ConfigDict(extra="ignore", coerce_numbers_to_str=True)
+
+
+class RedFlagDraft(_Draft):
+    clause_title: str = "Unknown Clause"
+    quoted_text: str = ""
+    violation_type: str = ""
+    law_reference: str = ""
+    severity: str = "medium"
+    plain_explanation: str = ""
+    recommendation: str = ""
+    replacement_clause: Optional[str] = None
+
+
+class SafeClauseDraft(_Draft):
+    clause_title: str = ""
+    quoted_text: str = ""
+    explanation: str = ""
+
+
+class ChangeClassification(_Draft):
+    clause_title: str = "Unknown"
+    change_type: str = "modified"
+    severity: str = "medium"
+    impact_explanation: str = ""
+    favorable_to: str = "neutral"
+
+
+class PushbackDraft(_Draft):
+    subject: str = "Re: Concerns Regarding Draft Agreement"
+    body: str
+
+
+def _list_under(item: type[BaseModel], *keys: str):
+    """Accept a bare list, a list wrapped under one of `keys`, or a single `item` object.
+
+    Non-object entries are dropped, but a non-empty list with no objects at
+    all is rejected: it is almost always stray bracketed prose, not an answer.
+    """
+
+    def unwrap(value: Any) -> Any:
+        if isinstance(value, dict):
+            for key in keys:
+                if isinstance(value.get(key), list):
+                    value = value[key]
+                    break
+            else:
+                value = [value] if value.keys() & item.model_fields.keys() else []
+        if isinstance(value, list):
+            entries = [entry for entry in value if isinstance(entry, dict)]
+            if value and not entries:
+                raise ValueError(f"expected {item.__name__} objects, got none")
+            return entries
+        return value
+
+    return BeforeValidator(unwrap)
+
+
+RED_FLAGS = TypeAdapter(Annotated[list[RedFlagDraft], _list_under(RedFlagDraft, "red_flags", "flags")])
+SAFE_CLAUSES = TypeAdapter(Annotated[list[SafeClauseDraft], _list_under(SafeClauseDraft, "safe_clauses", "clauses")])
+CHANGE_CLASSIFICATION = TypeAdapter(ChangeClassification)
+PUSHBACK_EMAIL = TypeAdapter(PushbackDraft)
@@ -0,0 +1,83 @@
+"""Token accounting for LLM calls — usage capture, cost metrics and prompt estimates."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from config import settings
+from app.utils.helpers import estimate_tokens
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("llm_usage")
+
+# Chat templates add a few tokens of framing per message.
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_contract_type: ContextVar[str] = ContextVar("llm_contract_type", default="unknown")
+
+
+@contextmanager
+def contract_type_scope(contract_type: str | None) -> Iterator[None]:
+    """Attribute LLM usage inside the block to `contract_type`."""
+    token = _contract_type.set(contract_type or "unknown")
+    try:
+        yield
+    finally:
+        _contract_type.reset(token)
+
+
+def current_contract_type() -> str:
+    return _contract_type.get()
+
+
+def estimate_prompt_tokens(messages: list[dict]) -> int:
+    """Local estimate of the prompt tokens a chat payload will be billed for."""
+    return sum(estimate_tokens(msg.get("content", "")) + _MESSAGE_OVERHEAD_TOKENS for msg in messages)
+
+
+def record_usage(
+    call_site: str,
+    usage: dict | None,
+    estimated_prompt_tokens: int,
+    estimated_completion_tokens: int,
+    profile: str = "default",
+) -> tuple[int, int, float]:
+    """Record billed tokens and cost for one completion.
+
+    Prefers the `usage` block OpenRouter returns (including `cost` when the
+    request asked for it); falls back to local estimates and the configured
+    per-million prices. Returns (prompt_tokens, completion_tokens, cost_usd).
+    """
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens")
+    completion_tokens = usage.get("completion_tokens")
+    if prompt_tokens is None:
+        prompt_tokens = estimated_prompt_tokens
+    if completion_tokens is None:
+        completion_tokens = estimated_completion_tokens
+
+    cost = usage.get("cost")
+    if cost is None:
+        cost = (
+            prompt_tokens * settings.LLM_PRICE_PROMPT_PER_MTOK
+            + completion_tokens * settings.LLM_PRICE_COMPLETION_PER_MTOK
+        ) / 1_000_000
+
+    contract_type = current_contract_type()
+    m.LLM_TOKENS.labels(call_site=call_site, contract_type=contract_type, kind="prompt").inc(prompt_tokens)
+    m.LLM_TOKENS.labels(call_site=call_site, contract_type=contract_type, kind="completion").inc(completion_tokens)
+    m.LLM_COST_USD.labels(call_site=call_site, contract_type=contract_type).inc(float(cost))
+    m.LLM_PROFILE_TOKENS.labels(profile=profile, kind="prompt").inc(prompt_tokens)
+    m.LLM_PROFILE_TOKENS.labels(profile=profile, kind="completion").inc(completion_tokens)
+
+    if usage.get("prompt_tokens") is not None and estimated_prompt_tokens:
+        log.debug(
+            "llm_prompt_estimate",
+            call_site=call_site,
+            estimated=estimated_prompt_tokens,
+            actual=prompt_tokens,
+        )
+    return int(prompt_tokens), int(completion_tokens), float(cost)
@@ -2,36 +2,275 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import time
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
 import httpx
+from pydantic import TypeAdapter, ValidationError
 
 from config import settings
-from app.utils.exceptions import OllamaError
+from app.services.llm_cache import get_response_cache, request_fingerprint
+from app.services.llm_cassette import cassette_transport
+from app.services.llm_resilience import backoff_delay, get_retry_budget, parse_retry_after
+from app.services.llm_router import Backend, get_router
+from app.services.llm_profiles import GenerationProfile, get_profile, profile_for
+from app.services.llm_scheduler import get_scheduler
+from app.services.llm_usage import estimate_prompt_tokens, record_usage
+from app.utils.deadline import current_deadline
+from app.utils.exceptions import DeadlineExceededError, LLMCircuitOpenError, OllamaError
+from app.utils.singleflight import AsyncSingleFlight
+from app.utils.helpers import estimate_tokens
+from app.utils.json_repair import repair_json
 from app.utils.logger import get_logger
 from app.utils import metrics as m
 
 log = get_logger("llm_client")
 
+# Identical concurrent generate() calls share one upstream request.
+_llm_flights = AsyncSingleFlight("llm")
+
+
+# ── Shared connection pool ───────────────────────────────
+# One pooled AsyncClient per process (per event loop — Celery tasks spin up
+# their own loop), opened and closed by the FastAPI lifespan in main.py.
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+_in_flight = 0
+# httpcore queues for a pooled connection inside post() where it cannot be
+# timed, so requests take one of LLM_MAX_CONNECTIONS slots here first.
+_pool_gate: asyncio.Semaphore | None = None
+_pool_gate_loop: asyncio.AbstractEventLoop | None = None
+_pool_waiting = 0
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 needs the optional `h2` package (httpx[http2])."""
+    if not settings.LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        log.warning("http2_unavailable", hint="pip install 'httpx[http2]'")
+        return False
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    http2 = _http2_enabled()
+    limits = httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=10.0, pool=settings.LLM_POOL_TIMEOUT),
+        limits=limits,
+        transport=cassette_transport(http2, limits),  # None unless LLM_CASSETTE_MODE is set
+        # Authorization is per backend (see llm_router.Backend.headers).
+        headers={
+            "HTTP-Referer": "https://legalsaathi.in",
+            "X-Title": "LegalSaathi",
+            "Content-Type": "application/json",
+        },
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client, creating it lazily if needed."""
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        if _http_client is not None and not _http_client.is_closed:
+            _close_stale_client(_http_client, _http_client_loop)
+        _http_client = _build_http_client()
+        _http_client_loop = loop
+    return _http_client
+
+
+def _close_stale_client(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop | None) -> None:
+    """Close a client left behind by another event loop instead of leaking its sockets.
+
+    Its connections belong to `loop`, so the close runs there when that loop
+    is still alive; otherwise it is attempted on the current loop.
+    """
+    log.warning("llm_pool_loop_changed", hint="call close_http_pool() before closing an event loop")
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        return
+
+    async def _close() -> None:
+        try:
+            await client.aclose()
+        except Exception as e:  # the owning loop is gone; sockets close with the transports
+            log.debug("llm_pool_stale_close_failed", error=str(e))
+
+    asyncio.get_running_loop().create_task(_close())
+
+
+async def open_http_pool() -> httpx.AsyncClient:
+    """Open the shared pool (call at startup)."""
+    client = get_http_client()
+    log.info(
+        "llm_pool_opened",
+        http2=_http2_enabled(),
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    return client
+
+
+async def close_http_pool() -> None:
+    """Close the shared pool (call at shutdown)."""
+    global _http_client, _http_client_loop
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        log.info("llm_pool_closed")
+    _http_client = None
+    _http_client_loop = None
+    _reset_pool_gate()
+    m.LLM_POOL_OPEN_CONNECTIONS.set(0)
+
+
+def _get_pool_gate() -> asyncio.Semaphore:
+    """The slot semaphore for the current event loop (like the client, one per loop)."""
+    global _pool_gate, _pool_gate_loop
+    loop = asyncio.get_running_loop()
+    if _pool_gate is None or _pool_gate_loop is not loop:
+        _pool_gate = asyncio.Semaphore(settings.LLM_MAX_CONNECTIONS)
+        _pool_gate_loop = loop
+    return _pool_gate
+
+
+def _reset_pool_gate() -> None:
+    global _pool_gate, _pool_gate_loop
+    _pool_gate = None
+    _pool_gate_loop = None
+
+
+def pool_stats() -> dict:
+    """Snapshot of the shared pool — open/idle connections, in-flight and waiting requests."""
+    stats = {"open_connections": 0, "idle_connections": 0, "in_flight": _in_flight, "waiting": _pool_waiting}
+    if _http_client is None or _http_client.is_closed:
+        return stats
+    # httpx does not expose pool state publicly; read it from httpcore defensively.
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    stats["open_connections"] = len(connections)
+    stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+    m.LLM_POOL_OPEN_CONNECTIONS.set(stats["open_connections"])
+    return stats
+
+
+class _PoolSlot:
+    """Holds one pool slot per request; times the wait for it and counts pool timeouts.
+
+    Waiting longer than LLM_POOL_TIMEOUT raises httpx.PoolTimeout, as httpx
+    itself would.
+    """
+
+    async def __aenter__(self) -> None:
+        global _in_flight, _pool_waiting
+        self._gate = _get_pool_gate()
+        start = time.perf_counter()
+        _pool_waiting += 1
+        try:
+            async with asyncio.timeout(settings.LLM_POOL_TIMEOUT):
+                await self._gate.acquire()
+        except TimeoutError:
+            m.LLM_POOL_TIMEOUTS.inc()
+            raise httpx.PoolTimeout("Timed out waiting for an LLM pool slot") from None
+        finally:
+            _pool_waiting -= 1
+            m.LLM_POOL_WAITS.observe(time.perf_counter() - start)
+        _in_flight += 1
+        m.LLM_POOL_IN_FLIGHT.set(_in_flight)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        global _in_flight
+        self._gate.release()
+        _in_flight -= 1
+        m.LLM_POOL_IN_FLIGHT.set(_in_flight)
+        if exc_type is not None and issubclass(exc_type, httpx.PoolTimeout):
+            m.LLM_POOL_TIMEOUTS.inc()
+        pool_stats()
+
+
+class ThinkingStripper:
+    """Incrementally removes <think>...</think> blocks from a token stream.
+
+    Tags may be split across chunks, so a trailing fragment that could be the
+    start of a tag is held back until the next chunk arrives.
+    """
+
+    _OPEN = "<think>"
+    _CLOSE = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+        self._started = False  # drop leading whitespace like _strip_thinking()
+
+    @staticmethod
+    def _partial_tag_len(text: str, tag: str) -> int:
+        for n in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:n]):
+                return n
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        out = []
+        while self._buffer:
+            if self._in_think:
+                end = self._buffer.find(self._CLOSE)
+                if end == -1:
+                    keep = self._partial_tag_len(self._buffer, self._CLOSE)
+                    self._buffer = self._buffer[len(self._buffer) - keep:] if keep else ""
+                    break
+                self._buffer = self._buffer[end + len(self._CLOSE):]
+                self._in_think = False
+            else:
+                start = self._buffer.find(self._OPEN)
+                if start == -1:
+                    keep = self._partial_tag_len(self._buffer, self._OPEN)
+                    cut = len(self._buffer) - keep
+                    out.append(self._buffer[:cut])
+                    self._buffer = self._buffer[cut:]
+                    break
+                out.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(self._OPEN):]
+                self._in_think = True
+        return self._visible("".join(out))
+
+    def flush(self) -> str:
+        rest = "" if self._in_think else self._buffer
+        self._buffer = ""
+        return self._visible(rest)
+
+    def _visible(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
 
 class LLMClient:
-    """Async client for OpenRouter API — OpenAI-compatible format."""
+    """Async client for OpenRouter API — OpenAI-compatible format.
+
+    Cheap to construct: all instances share one pooled HTTP client.
+    """
 
     def __init__(self):
         self.base_url = settings.OPENROUTER_BASE_URL
         self.model = settings.OPENROUTER_MODEL
         self.api_key = settings.OPENROUTER_API_KEY
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=10.0),
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "HTTP-Referer": "https://legalsaathi.in",
-                "X-Title": "LegalSaathi",
-                "Content-Type": "application/json",
-            },
-        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_http_client()
 
     async def generate(
         self,
@@ -40,10 +279,29 @@ class LLMClient:
         temperature: float | None = None,
         max_tokens: int | None = None,
         json_mode: bool = False,
+        priority: str | None = None,
+        session_key: str | None = None,
+        call_site: str = "default",
+        profile: str | None = None,
+        schema: TypeAdapter | None = None,
     ) -> str:
-        """Generate a completion via OpenRouter. Retries up to 3 times."""
-        temp = temperature if temperature is not None else settings.LLM_TEMPERATURE
-        tokens = max_tokens if max_tokens is not None else settings.LLM_MAX_TOKENS
+        """Generate a completion via OpenRouter (up to LLM_MAX_ATTEMPTS attempts).
+
+        `call_site` names the caller (e.g. "blindspot") for adaptive timeouts
+        and metrics, and picks its generation profile (model, max_tokens,
+        temperature, thinking, timeout) unless `profile` names one explicitly;
+        explicit `temperature`/`max_tokens` still win over the profile.
+        `priority` overrides the ambient priority_scope() for the scheduler.
+        Pass the session's `session_key` whenever the prompt carries session
+        data — it encrypts the shared (Redis) cache entry; without it the
+        response is only cached in-process.
+        In `json_mode`, malformed output is repaired locally and, if `schema`
+        is given, validated against it; the model is only re-asked when
+        neither works.
+        """
+        prof = get_profile(profile) if profile else profile_for(call_site)
+        temp = temperature if temperature is not None else prof.temperature
+        tokens = max_tokens if max_tokens is not None else prof.max_tokens
 
         messages = []
         if system_prompt:
@@ -54,120 +312,421 @@ class LLMClient:
         messages.append({"role": "user", "content": prompt})
 
         payload = {
-            "model": self.model,
+            "model": prof.model,
             "messages": messages,
             "temperature": temp,
             "max_tokens": tokens,
+            "usage": {"include": True},  # OpenRouter reports billed tokens + cost
         }
         if json_mode:
             payload["response_format"] = {"type": "json_object"}
+        if not prof.thinking:
+            payload["reasoning"] = {"enabled": False}
+
+        cache = get_response_cache() if self._cacheable(temp) else None
+        cache_key = None
+        if cache is not None:
+            cache_key = request_fingerprint(
+                prof.model, system_prompt, prompt, temp, json_mode, tokens, thinking=prof.thinking
+            )
+            cached = await cache.get(cache_key, session_key)
+            if cached is not None:
+                log.debug("llm_cache_hit", key=cache_key[:12])
+                return cached
+
+        if cache is None:
+            response_text, _ = await self._complete(payload, json_mode, priority, call_site, prof, schema)
+            return response_text
+
+        async def produce() -> str:
+            text, valid = await self._complete(payload, json_mode, priority, call_site, prof, schema)
+            if valid:
+                await cache.set(cache_key, text, session_key)
+            return text
+
+        # Flights are scoped like cache entries, so sessions never share a response.
+        flight_key = cache.scoped_key(cache_key, session_key)
+        return await _llm_flights.do(flight_key, lambda: cache.fill(cache_key, session_key, produce))
+
+    @staticmethod
+    def _record_cancelled(payload: dict, call_site: str, phase: str, generated: int = 0) -> None:
+        """Count a cancelled call and estimate the tokens it would have billed.
+
+        A queued call never reached the provider, so its prompt is saved too;
+        an in-flight one saves at most the unfinished completion.
+        """
+        saved = max(payload.get("max_tokens", 0) - generated, 0)
+        if phase == "queued":
+            saved += sum(estimate_tokens(msg["content"]) for msg in payload["messages"])
+        m.LLM_CALLS_CANCELLED.labels(call_site=call_site, phase=phase).inc()
+        m.LLM_TOKENS_SAVED.labels(call_site=call_site).inc(saved)
+        log.info("llm_call_cancelled", call_site=call_site, phase=phase, tokens_saved=saved)
 
+    @staticmethod
+    def _cacheable(temperature: float) -> bool:
+        return settings.LLM_CACHE_ENABLED and temperature <= settings.LLM_CACHE_MAX_TEMPERATURE
+
+    async def _complete(
+        self,
+        payload: dict,
+        json_mode: bool,
+        priority: str | None,
+        call_site: str,
+        profile: GenerationProfile,
+        schema: TypeAdapter | None = None,
+    ) -> tuple[str, bool]:
+        """POST with retries. Returns (text, valid) — `valid` is False for unparseable JSON.
+
+        Each attempt gets an adaptive timeout for its call site; retries use
+        jittered backoff (honouring Retry-After), draw from a global retry
+        budget, and are refused outright while every backend's breaker is
+        open. Retries fall back to the next healthy backend, and slow
+        attempts may be hedged (see _post_hedged).
+        Under a request deadline, timeouts shrink to the remaining budget and
+        retries stop once there is no time left for another attempt.
+        """
+        deadline = current_deadline()
+        estimated_prompt = estimate_prompt_tokens(payload["messages"])
+        if estimated_prompt > settings.LLM_PROMPT_TOKEN_BUDGET:
+            m.LLM_PROMPT_OVER_BUDGET.labels(call_site=call_site).inc()
+            log.warning(
+                "llm_prompt_over_budget",
+                call_site=call_site,
+                estimated_tokens=estimated_prompt,
+                budget=settings.LLM_PROMPT_TOKEN_BUDGET,
+            )
+        router = get_router()
+        router.hedge_budget.record_request()
+        budget = get_retry_budget()
+        budget.record_request()
+
+        attempts = settings.LLM_MAX_ATTEMPTS
         last_error = None
-        for attempt in range(3):
+        last_response: str | None = None
+        last_backend: Backend | None = None
+        delay = 0.0
+        for attempt in range(attempts):
+            if attempt > 0:
+                if deadline is not None and not deadline.has_time_for(delay + settings.LLM_DEADLINE_MIN_SECONDS):
+                    log.warning("llm_retry_skipped_for_deadline", call_site=call_site, attempt=attempt + 1)
+                    break
+                if not budget.try_spend():
+                    log.warning("llm_retry_budget_exhausted", call_site=call_site, attempt=attempt + 1)
+                    break
+                m.LLM_RETRIES.labels(call_site=call_site).inc()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            # Fall back to the next backend when the last one just failed us.
+            backends = router.ranked(avoid=last_backend)
+            if not backends:
+                raise LLMCircuitOpenError(f"All LLM backends circuit open — failing fast ({call_site})")
+
+            timeout = backends[0].latency.timeout_for(call_site, ceiling=profile.timeout)
+            phase = "queued"
+            remaining = None
+            if deadline is not None:
+                if not deadline.has_time_for(settings.LLM_DEADLINE_MIN_SECONDS):
+                    raise DeadlineExceededError(call_site)
+                remaining = deadline.remaining()
+                timeout = min(timeout, remaining)
             try:
-                start = time.time()
+                # The deadline also bounds time spent queued in the scheduler.
+                async with asyncio.timeout(remaining), get_scheduler().slot(priority):
+                    phase = "in_flight"
+                    start = time.time()
+                    backend, resp = await self._post_hedged(backends, payload, timeout, call_site)
+                    elapsed = time.time() - start
+            except TimeoutError as e:
+                raise DeadlineExceededError(call_site) from e
+            except asyncio.CancelledError:
+                self._record_cancelled(payload, call_site, phase)
+                raise
+            except LLMCircuitOpenError:
+                raise
+            except httpx.TransportError as e:
+                last_error = e
+                last_backend = backends[0]
+                delay = backoff_delay(attempt)
+                log.warning("llm_retry", attempt=attempt + 1, call_site=call_site, timeout_s=round(timeout, 1), error=str(e))
+                continue
+            last_backend = backend
+            m.INFERENCE_DURATION.observe(elapsed)
+            m.LLM_PROFILE_DURATION.labels(profile=profile.name).observe(elapsed)
+
+            if resp.status_code == 401:
+                raise OllamaError(f"LLM backend '{backend.name}' API key invalid", status_code=401)
+            if resp.status_code == 429:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                delay = backoff_delay(attempt, retry_after)
+                last_error = OllamaError("OpenRouter rate limited", status_code=429)
+                log.warning("openrouter_rate_limited", attempt=attempt + 1, retry_after=retry_after, backend=backend.name)
+                get_scheduler().throttle(delay)
+                delay = 0.0  # the scheduler's token bucket now holds everyone back
+                continue
+            if resp.status_code >= 500:
+                delay = backoff_delay(attempt)
+                last_error = OllamaError(f"OpenRouter HTTP error: {resp.status_code}", status_code=resp.status_code)
+                log.warning("llm_retry", attempt=attempt + 1, call_site=call_site, status=resp.status_code, backend=backend.name)
+                continue
+            if resp.status_code >= 400:
+                raise OllamaError(f"OpenRouter HTTP error: {resp.status_code}", status_code=resp.status_code)
+
+            data = resp.json()
+            choices = data.get("choices", [])
+            if not choices:
+                raise OllamaError("OpenRouter returned no choices")
+
+            response_text = choices[0].get("message", {}).get("content", "")
+            prompt_tokens, completion_tokens, cost = record_usage(
+                call_site, data.get("usage"), estimated_prompt, estimate_tokens(response_text), profile.name
+            )
+
+            # Strip thinking tags if present (Qwen3 thinking model)
+            response_text = self._strip_thinking(response_text)
+
+            log.info(
+                "llm_generate",
+                model=payload["model"],
+                backend=backend.name,
+                profile=profile.name,
+                call_site=call_site,
+                latency_ms=int(elapsed * 1000),
+                response_len=len(response_text),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cost_usd=round(cost, 6),
+                attempt=attempt + 1,
+            )
+
+            # Validate JSON if json_mode; only re-ask when local repair fails
+            if json_mode:
+                checked = self._check_json(response_text, schema, call_site)
+                if checked is None:
+                    if attempt < attempts - 1:
+                        log.warning("llm_invalid_json_retry", attempt=attempt + 1, call_site=call_site)
+                        delay = 0.0
+                        last_response = response_text
+                        continue
+                    return response_text, False
+                response_text = checked
+
+            return response_text, True
+
+        if last_response is not None:
+            return last_response, False
+        if deadline is not None and not deadline.has_time_for(settings.LLM_DEADLINE_MIN_SECONDS):
+            raise DeadlineExceededError(call_site)
+        raise OllamaError(f"OpenRouter failed after {attempt + 1} attempt(s): {last_error}")
+
+    @staticmethod
+    def _usable(resp: httpx.Response) -> bool:
+        """A response worth returning instead of waiting for the hedge."""
+        return resp.status_code < 500 and resp.status_code != 429
+
+    async def _send(
+        self,
+        backend: Backend,
+        payload: dict,
+        timeout: float,
+        call_site: str,
+    ) -> httpx.Response:
+        """One POST to one backend; feeds its breaker, health and latency stats."""
+        body = dict(payload, model=backend.model_for(payload["model"]))
+        start = time.time()
+        try:
+            async with _PoolSlot():
                 resp = await self.client.post(
-                    f"{self.base_url}/chat/completions",
-                    json=payload,
-                )
-                elapsed = time.time() - start
-                m.INFERENCE_DURATION.observe(elapsed)
-
-                if resp.status_code == 401:
-                    raise OllamaError("OpenRouter API key invalid")
-                if resp.status_code == 429:
-                    log.warning("openrouter_rate_limited", attempt=attempt + 1)
-                    import asyncio
-                    await asyncio.sleep(2 ** attempt)
-                    continue
-                resp.raise_for_status()
-
-                data = resp.json()
-                choices = data.get("choices", [])
-                if not choices:
-                    raise OllamaError("OpenRouter returned no choices")
-
-                response_text = choices[0].get("message", {}).get("content", "")
-
-                # Strip thinking tags if present (Qwen3 thinking model)
-                response_text = self._strip_thinking(response_text)
-
-                log.info(
-                    "llm_generate",
-                    model=self.model,
-                    latency_ms=int(elapsed * 1000),
-                    response_len=len(response_text),
-                    attempt=attempt + 1,
+                    f"{backend.base_url}/chat/completions",
+                    json=body,
+                    headers=backend.headers(),
+                    timeout=httpx.Timeout(timeout, connect=10.0, pool=settings.LLM_POOL_TIMEOUT),
                 )
+        except httpx.TransportError:
+            backend.record_failure()
+            raise
+        if resp.status_code >= 500:
+            backend.record_failure()
+        elif resp.status_code < 400:
+            backend.record_success(call_site, time.time() - start)
+        return resp
 
-                # Validate JSON if json_mode
-                if json_mode:
-                    try:
-                        json.loads(response_text)
-                    except json.JSONDecodeError:
-                        # Try to extract JSON from response
-                        response_text = self._extract_json(response_text)
-                        if attempt < 2:
-                            try:
-                                json.loads(response_text)
-                            except json.JSONDecodeError:
-                                log.warning("llm_invalid_json_retry", attempt=attempt + 1)
-                                continue
-
-                return response_text
-
-            except (httpx.TimeoutException, httpx.ConnectError) as e:
-                last_error = e
-                log.warning("llm_retry", attempt=attempt + 1, error=str(e))
-                continue
-            except httpx.HTTPStatusError as e:
-                raise OllamaError(f"OpenRouter HTTP error: {e.response.status_code}") from e
+    async def _post_hedged(
+        self,
+        backends: list[Backend],
+        payload: dict,
+        timeout: float,
+        call_site: str,
+    ) -> tuple[Backend, httpx.Response]:
+        """Send to the first backend; if it is slower than its usual tail, hedge.
+
+        After the primary's LLM_HEDGE_PERCENTILE latency for this call site, a
+        duplicate goes to the next backend (budget permitting). The first
+        usable response wins and the other request is cancelled.
+        """
+        candidates = iter(backends)
+        primary = next((b for b in candidates if b.breaker.allow()), None)
+        if primary is None:
+            raise LLMCircuitOpenError(f"All LLM backends circuit open — failing fast ({call_site})")
+        tasks = {asyncio.create_task(self._send(primary, payload, timeout, call_site)): primary}
+        try:
+            hedge_after = primary.hedge_delay(call_site) if settings.LLM_HEDGE_ENABLED else None
+            if hedge_after is not None and len(backends) > 1:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                secondary = None
+                if not done and get_router().hedge_budget.try_spend():
+                    secondary = next((b for b in candidates if b.breaker.allow()), None)
+                if secondary is not None:
+                    tasks[asyncio.create_task(self._send(secondary, payload, timeout, call_site))] = secondary
+                    m.LLM_HEDGES.labels(call_site=call_site).inc()
+                    log.info(
+                        "llm_hedged",
+                        call_site=call_site,
+                        primary=primary.name,
+                        secondary=secondary.name,
+                        after_ms=int(hedge_after * 1000),
+                    )
 
-        raise OllamaError(f"OpenRouter failed after 3 retries: {last_error}")
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and self._usable(task.result()):
+                        if len(tasks) > 1:
+                            m.LLM_HEDGE_WINS.labels(backend=tasks[task].name).inc()
+                        return tasks[task], task.result()
+
+            # Nothing usable: surface the primary's outcome (error or response).
+            first = next(iter(tasks))
+            if first.exception() is not None:
+                raise first.exception()
+            return primary, first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
 
     async def generate_streaming(
         self,
         prompt: str,
         system_prompt: str = "",
+        priority: str | None = None,
+        strip_thinking: bool = True,
+        call_site: str = "stream",
     ) -> AsyncGenerator[str, None]:
-        """Streaming response for voice/chat endpoints."""
+        """Streaming response for voice/chat endpoints.
+
+        Thinking blocks are stripped as they stream; time-to-first-token,
+        tokens/sec and token usage are recorded once the stream ends.
+        """
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        prof = profile_for(call_site)
         payload = {
-            "model": self.model,
+            "model": prof.model,
             "messages": messages,
-            "temperature": settings.LLM_TEMPERATURE,
+            "temperature": prof.temperature,
+            "max_tokens": prof.max_tokens,
             "stream": True,
+            "usage": {"include": True},  # sent on the final chunk
         }
+        if not prof.thinking:
+            payload["reasoning"] = {"enabled": False}
+
+        # Streams are not hedged; they go to the best available backend.
+        backend = next((b for b in get_router().ranked() if b.breaker.allow()), None)
+        if backend is None:
+            raise LLMCircuitOpenError("All LLM backends circuit open — failing fast (stream)")
+
+        stripper = ThinkingStripper() if strip_thinking else None
+        start = time.time()
+        first_token_at = None
+        deltas = 0
+        phase = "queued"
+        usage = None
+        raw_parts: list[str] = []
 
-        async with self.client.stream(
-            "POST",
-            f"{self.base_url}/chat/completions",
-            json=payload,
-        ) as resp:
-            resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if line.startswith("data: "):
-                    data_str = line[6:]
-                    if data_str.strip() == "[DONE]":
-                        break
-                    try:
-                        data = json.loads(data_str)
-                        delta = data.get("choices", [{}])[0].get("delta", {})
-                        text = delta.get("content", "")
+        try:
+            async with get_scheduler().slot(priority), _PoolSlot(), self.client.stream(
+                "POST",
+                f"{backend.base_url}/chat/completions",
+                json=dict(payload, model=backend.model_for(payload["model"])),
+                headers=backend.headers(),
+            ) as resp:
+                phase = "in_flight"
+                if resp.status_code >= 400:
+                    if resp.status_code >= 500:
+                        backend.record_failure()
+                    raise OllamaError(f"OpenRouter HTTP error: {resp.status_code}", status_code=resp.status_code)
+                async for line in resp.aiter_lines():
+                    if line.startswith("data: "):
+                        data_str = line[6:]
+                        if data_str.strip() == "[DONE]":
+                            break
+                        try:
+                            data = json.loads(data_str)
+                            usage = data.get("usage") or usage
+                            delta = (data.get("choices") or [{}])[0].get("delta", {})
+                            text = delta.get("content", "")
+                        except (json.JSONDecodeError, IndexError, AttributeError):
+                            continue
+                        if not text:
+                            continue
+                        deltas += 1
+                        raw_parts.append(text)
+                        if stripper is not None:
+                            text = stripper.feed(text)
                         if text:
+                            if first_token_at is None:
+                                first_token_at = time.time()
+                                m.LLM_TIME_TO_FIRST_TOKEN.observe(first_token_at - start)
                             yield text
-                    except json.JSONDecodeError:
-                        continue
+        except httpx.TransportError as e:
+            backend.record_failure()
+            raise OllamaError(f"OpenRouter stream failed: {e}") from e
+        except (asyncio.CancelledError, GeneratorExit):
+            # Listener went away mid-answer; closing the stream stops generation.
+            self._record_cancelled(payload, call_site, phase, generated=deltas)
+            raise
+        backend.record_success()  # stream durations would skew the call-site timeouts
+
+        if stripper is not None:
+            tail = stripper.flush()
+            if tail:
+                yield tail
+
+        elapsed = time.time() - start
+        if deltas and elapsed > 0:
+            m.LLM_TOKENS_PER_SECOND.observe(deltas / elapsed)
+        prompt_tokens, completion_tokens, _ = record_usage(
+            call_site,
+            usage,
+            estimate_prompt_tokens(messages),
+            estimate_tokens("".join(raw_parts)),
+            prof.name,
+        )
+        log.info(
+            "llm_stream_complete",
+            model=prof.model,
+            profile=prof.name,
+            call_site=call_site,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            ttft_ms=int((first_token_at - start) * 1000) if first_token_at else None,
+            latency_ms=int(elapsed * 1000),
+            deltas=deltas,
+        )
 
     async def health_check(self) -> bool:
-        """Check if OpenRouter API is reachable."""
+        """Check if the primary LLM backend is reachable."""
+        backend = get_router().primary
         try:
             resp = await self.client.get(
-                f"{self.base_url}/models",
+                f"{backend.base_url}/models",
+                headers=backend.headers(),
                 timeout=5.0,
             )
             return resp.status_code == 200
@@ -175,8 +734,8 @@ class LLMClient:
             return False
 
     async def close(self) -> None:
-        """Close the HTTP client."""
-        await self.client.aclose()
+        """No-op — the shared pool is closed by close_http_pool() at shutdown."""
+        return None
 
     @staticmethod
     def _strip_thinking(text: str) -> str:
@@ -187,18 +746,46 @@ class LLMClient:
         return cleaned.strip()
 
     @staticmethod
-    def _extract_json(text: str) -> str:
-        """Try to extract JSON from a response that may have extra text."""
-        # Try to find JSON array or object
-        import re
-        # Look for JSON array
-        match = re.search(r"(\[[\s\S]*\])", text)
-        if match:
-            return match.group(1)
-        # Look for JSON object
-        match = re.search(r"(\{[\s\S]*\})", text)
-        if match:
-            return match.group(1)
+    def _valid(value: Any, schema: TypeAdapter | None) -> bool:
+        if schema is None:
+            return True
+        try:
+            schema.validate_python(value)
+            return True
+        except ValidationError:
+            return False
+
+    @staticmethod
+    def _check_json(text: str, schema: TypeAdapter | None, call_site: str) -> str | None:
+        """Return `text` as valid JSON (repairing it if needed), or None if unusable.
+
+        With a `schema`, the parsed value must also validate against it.
+        """
+        repaired = False
+        try:
+            data: Any = json.loads(text)
+        except json.JSONDecodeError:
+            fixed = repair_json(text, accept=lambda value: LLMClient._valid(value, schema))
+            if fixed is None:
+                # Tell the two failures apart for the metric; only reached on the retry path.
+                parseable = schema is not None and repair_json(text) is not None
+                m.LLM_JSON_INVALID.labels(call_site=call_site, reason="schema" if parseable else "unparseable").inc()
+                if parseable:
+                    log.warning("llm_json_schema_mismatch", call_site=call_site, repaired=True)
+                return None
+            text, data, repaired = fixed, json.loads(fixed), True
+
+        if schema is not None:
+            try:
+                schema.validate_python(data)
+            except ValidationError as e:
+                m.LLM_JSON_INVALID.labels(call_site=call_site, reason="schema").inc()
+                log.warning("llm_json_schema_mismatch", call_site=call_site, errors=e.error_count())
+                return None
+
+        if repaired:
+            m.LLM_JSON_REPAIRED.labels(call_site=call_site).inc()
+            log.info("llm_json_repaired", call_site=call_site)
         return text
 
 
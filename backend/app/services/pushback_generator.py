@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-import json
 from typing import List
 
+from pydantic import ValidationError
+
 from app.models.responses import RedFlag, PushbackEmail
+from app.services.llm_schemas import PUSHBACK_EMAIL
 from app.services.ollama_client import OllamaClient
 from app.utils.logger import get_logger
 
@@ -25,6 +27,7 @@ class PushbackGenerator:
         tone: str = "firm",
         language: str = "en",
         sender_name: str | None = None,
+        session_key: str | None = None,
     ) -> PushbackEmail:
         """Generate a pushback email addressing all red flags."""
         if not sender_name:
@@ -65,20 +68,20 @@ class PushbackGenerator:
                 prompt=prompt,
                 system_prompt=sys_prompt,
                 json_mode=True,
+                session_key=session_key,
+                call_site="pushback",
+                schema=PUSHBACK_EMAIL,
             )
-            data = json.loads(response)
-
-            body = data.get("body", response)
-            subject = data.get("subject", f"Re: Concerns Regarding Draft Agreement")
+            data = PUSHBACK_EMAIL.validate_json(response)
 
             return PushbackEmail(
-                subject=subject,
-                body=body,
+                subject=data.subject,
+                body=data.body,
                 law_citations=list(set(citations)),
-                word_count=len(body.split()),
+                word_count=len(data.body.split()),
                 language=language,
             )
-        except json.JSONDecodeError:
+        except ValidationError:
             return PushbackEmail(
                 subject="Re: Concerns Regarding Draft Agreement",
                 body=response if isinstance(response, str) else "Failed to generate email.",
@@ -3,19 +3,43 @@
 from __future__ import annotations
 
 import time
-from typing import Optional
+import weakref
+from typing import AsyncGenerator, List, Optional
 
-from app.models.internal import ParsedDocument, IngestionResult, ChunkConfig
+import numpy as np
+from pydantic import TypeAdapter
+
+from config import settings
+from app.models.internal import Chunk, ParsedDocument, IngestionResult, ChunkConfig, RetrievedChunk
 from app.services.vector_store import VectorStore
+from app.services.answer_cache import CachedAnswer, answer_scope, get_answer_cache
 from app.services.embedder import EmbeddingService
 from app.services.ollama_client import OllamaClient
 from app.services.chunker import LegalTextChunker
-from app.utils.helpers import generate_id
+from app.services.context_builder import pack_context, strip_overlap
+from app.services.lexical_index import BM25Index, get_lexical_indexes, reciprocal_rank_fusion
+from app.services.reranker import get_reranker
+from app.utils.deadline import current_deadline
+from app.utils.helpers import CHARS_PER_TOKEN, estimate_tokens, generate_id
 from app.utils.logger import get_logger
+from app.utils import metrics as m
 
 log = get_logger("rag")
 
 
+def document_position(meta: dict) -> tuple:
+    """Sort key for a session's chunks in reading order: by ingested document, then chunk index.
+
+    Chunk `index` restarts at 0 for every document, so it only orders
+    chunks within one. Chunks stored before documents were tagged sort first.
+    """
+    return (int(meta.get("ingested_at") or 0), str(meta.get("document_id") or ""), int(meta.get("index") or 0))
+
+
+# whole_document() per session, keyed by its lexical index: ingesting replaces the index and so drops the entry.
+_whole_documents: "weakref.WeakKeyDictionary[BM25Index, Optional[List[RetrievedChunk]]]" = weakref.WeakKeyDictionary()
+
+
 class RAGPipeline:
     """Core RAG orchestrator — combines retrieval, prompting, and inference."""
 
@@ -24,10 +48,12 @@ class RAGPipeline:
         vector_store: VectorStore,
         embedder: EmbeddingService,
         ollama: OllamaClient,
+        session_key: Optional[str] = None,
     ):
         self.vs = vector_store
         self.embedder = embedder
         self.ollama = ollama
+        self.session_key = session_key  # encrypts shared LLM cache entries
         self.chunker = LegalTextChunker()
 
     async def query(
@@ -35,49 +61,490 @@ class RAGPipeline:
         session_id: str,
         question: str,
         system_prompt: str,
-        n_retrieve: int = 6,
+        n_retrieve: Optional[int] = None,
         json_mode: bool = False,
         metadata_filter: Optional[dict] = None,
+        call_site: str = "query",
+        compact_system_prompt: Optional[str] = None,
+        schema: Optional[TypeAdapter] = None,
+        chunks: Optional[List[RetrievedChunk]] = None,
+        cache_answer: bool = False,
     ) -> str:
-        """Full RAG cycle: embed → retrieve → prompt → generate."""
-        # 1. Embed the question
-        q_emb = self.embedder.embed_query(question)
+        """Full RAG cycle: embed → retrieve → prompt → generate.
 
-        # 2. Retrieve top-k chunks
-        chunks = await self.vs.query(
-            session_id=session_id,
-            query_embedding=q_emb,
-            n_results=n_retrieve,
-            where=metadata_filter,
-        )
+        `compact_system_prompt` is a shorter variant of `system_prompt` that
+        may be swapped in when the prompt would exceed the token budget.
+        `schema` validates JSON-mode output (see LLMClient.generate).
+        Pass `chunks` from retrieve_many(n_retrieve=candidate_count()) to
+        skip retrieval; they are still reranked. Short contracts are sent
+        whole instead (see whole_document). With `cache_answer`, a question
+        close enough to one already answered in this session returns that
+        answer (see SemanticAnswerCache).
+        """
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check(call_site)
 
-        # 3. Build context
-        context_parts = []
-        for i, c in enumerate(chunks):
-            clause_info = f" (Clause {c.clause_number})" if c.clause_number else ""
-            page_info = f" [Page {c.page}]" if c.page else ""
-            context_parts.append(f"[{i + 1}]{clause_info}{page_info}: {c.text}")
+        # 0. Semantic answer cache (user-facing questions only)
+        scope = q_emb = None
+        if cache_answer and settings.ANSWER_CACHE_ENABLED:
+            scope = answer_scope(system_prompt, call_site, json_mode, n_retrieve, metadata_filter)
+            q_emb, hit = await self._cached_answer(session_id, question, scope)
+            if hit is not None:
+                return hit.answer
 
-        context = "\n\n".join(context_parts)
+        # 1-3. Whole contract, or embed + retrieve + rerank + pack
+        mode, chunks = await self.context(
+            session_id, question, n_retrieve, metadata_filter, call_site, chunks, query_embedding=q_emb
+        )
 
-        # 4. Build final prompt
-        prompt = f"Context from the contract:\n{context}\n\n---\n\nQuestion:\n{question}"
+        # 4. Fit to the token budget + build final prompt
+        system_prompt, chunks = self.fit_to_budget(
+            question, chunks, system_prompt, compact_system_prompt, call_site
+        )
+        prompt = self.build_prompt(question, chunks)
 
         # 5. Generate response
         response = await self.ollama.generate(
             prompt=prompt,
             system_prompt=system_prompt,
             json_mode=json_mode,
+            session_key=self.session_key,
+            call_site=call_site,
+            schema=schema,
         )
+        if scope is not None and response:
+            get_answer_cache().store(session_id, scope, question, q_emb, response, self.describe_sources(chunks))
 
         log.info(
             "rag_query",
             session_id=session_id[:8],
+            mode=mode,
             chunks_retrieved=len(chunks),
             response_len=len(response),
         )
         return response
 
+    async def stream_query(
+        self,
+        session_id: str,
+        question: str,
+        system_prompt: str,
+        n_retrieve: Optional[int] = None,
+        metadata_filter: Optional[dict] = None,
+        priority: Optional[str] = None,
+        call_site: str = "query",
+        compact_system_prompt: Optional[str] = None,
+        cache_answer: bool = False,
+    ) -> AsyncGenerator[dict, None]:
+        """Streaming RAG cycle — yields a `sources` event, then `token` events, then `done`.
+
+        A semantic answer cache hit (with `cache_answer`) is replayed as one `token` event.
+        """
+        start = time.time()
+        scope = q_emb = None
+        if cache_answer and settings.ANSWER_CACHE_ENABLED:
+            scope = answer_scope(system_prompt, call_site, False, n_retrieve, metadata_filter)
+            q_emb, hit = await self._cached_answer(session_id, question, scope)
+            if hit is not None:
+                yield {"event": "sources", "data": hit.sources}
+                yield {"event": "token", "data": hit.answer}
+                elapsed_ms = int((time.time() - start) * 1000)
+                yield {"event": "done", "data": {"response_len": len(hit.answer), "time_ms": elapsed_ms}}
+                return
+
+        mode, chunks = await self.context(
+            session_id, question, n_retrieve, metadata_filter, call_site, query_embedding=q_emb
+        )
+        system_prompt, chunks = self.fit_to_budget(
+            question, chunks, system_prompt, compact_system_prompt, call_site
+        )
+        yield {"event": "sources", "data": self.describe_sources(chunks)}
+
+        prompt = self.build_prompt(question, chunks)
+        response_len = 0
+        parts: List[str] = []
+        async for text in self.ollama.generate_streaming(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            priority=priority,
+            call_site=call_site,
+        ):
+            response_len += len(text)
+            if scope is not None:
+                parts.append(text)
+            yield {"event": "token", "data": text}
+        if scope is not None and parts:
+            get_answer_cache().store(session_id, scope, question, q_emb, "".join(parts), self.describe_sources(chunks))
+
+        elapsed_ms = int((time.time() - start) * 1000)
+        log.info(
+            "rag_stream_query",
+            session_id=session_id[:8],
+            mode=mode,
+            chunks_retrieved=len(chunks),
+            response_len=response_len,
+            time_ms=elapsed_ms,
+        )
+        yield {"event": "done", "data": {"response_len": response_len, "time_ms": elapsed_ms}}
+
+    async def context(
+        self,
+        session_id: str,
+        question: str,
+        n_retrieve: Optional[int] = None,
+        metadata_filter: Optional[dict] = None,
+        call_site: str = "query",
+        chunks: Optional[List[RetrievedChunk]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> tuple[str, List[RetrievedChunk]]:
+        """Pick the context strategy for this session: (mode, chunks for the prompt).
+
+        "whole_document" sends the full contract and skips the query
+        embedding, vector search, rerank and packing; "retrieval" runs them.
+        """
+        whole = await self.whole_document(session_id, metadata_filter)
+        if whole is not None:
+            mode, chunks = "whole_document", whole
+        else:
+            mode = "retrieval"
+            keep = self.keep_count(n_retrieve)
+            if chunks is None:
+                chunks = await self.retrieve(
+                    session_id, question, self.candidate_count(keep), metadata_filter, query_embedding
+                )
+            chunks = await self.rerank(question, chunks, keep, call_site)
+            chunks = self.pack(question, chunks, call_site)
+        m.RAG_CONTEXT_MODE.labels(call_site=call_site, mode=mode).inc()
+        return mode, chunks
+
+    async def whole_document(
+        self,
+        session_id: str,
+        metadata_filter: Optional[dict] = None,
+    ) -> Optional[List[RetrievedChunk]]:
+        """The session's full contract as prompt context, if short enough to send whole.
+
+        Chunks come in document order with the chunker's overlap removed and
+        nothing question-dependent, so every call for the session shares the
+        same context prefix (and the LLM server can reuse its KV cache).
+        None when the mode is off, a metadata filter asks for a subset, or
+        the contract is over WHOLE_DOCUMENT_MAX_TOKENS. Built once per
+        session index, not per question.
+        """
+        if not settings.WHOLE_DOCUMENT_ENABLED or metadata_filter:
+            return None
+        index = await self._lexical_index(session_id)
+        if index is None:
+            return None
+        if index not in _whole_documents:
+            _whole_documents[index] = self._build_whole_document(session_id, index)
+        chunks = _whole_documents[index]
+        return list(chunks) if chunks is not None else None
+
+    @staticmethod
+    def _build_whole_document(session_id: str, index: BM25Index) -> Optional[List[RetrievedChunk]]:
+        limit = settings.WHOLE_DOCUMENT_MAX_TOKENS
+        # Overlap is a fraction of each chunk — far over the limit means retrieval, without building.
+        if sum(estimate_tokens(t) for t in index.texts) > 2 * limit:
+            return None
+        chunks = strip_overlap([
+            RetrievedChunk(
+                text=text,
+                distance=0.0,
+                chunk_id=cid,
+                clause_number=meta.get("clause_number"),
+                page=meta.get("page"),
+                metadata=meta,
+            )
+            for cid, text, meta in zip(index.ids, index.texts, index.metadatas)
+        ])
+        tokens = sum(estimate_tokens(c.text) for c in chunks)
+        if tokens > limit:
+            return None
+        m.WHOLE_DOCUMENT_TOKENS.observe(tokens)
+        log.debug("rag_whole_document", session_id=session_id[:8], chunks=len(chunks), tokens=tokens)
+        return chunks
+
+    async def retrieve(
+        self,
+        session_id: str,
+        question: str,
+        n_retrieve: Optional[int] = None,
+        metadata_filter: Optional[dict] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> List[RetrievedChunk]:
+        """Embed the question and fetch the top-k chunks for it (fused with BM25 when enabled)."""
+        n_retrieve = n_retrieve or settings.TOP_K_RETRIEVAL
+        q_emb = query_embedding if query_embedding is not None else await self.embedder.aembed_query(question)
+        dense = await self.vs.query(
+            session_id=session_id,
+            query_embedding=q_emb,
+            n_results=self._n_candidates(n_retrieve, metadata_filter),
+            where=metadata_filter,
+        )
+        fused = await self._fuse(session_id, [question], [dense], n_retrieve, metadata_filter)
+        return fused[0]
+
+    async def retrieve_many(
+        self,
+        session_id: str,
+        questions: List[str],
+        n_retrieve: Optional[int] = None,
+        metadata_filter: Optional[dict] = None,
+    ) -> List[List[RetrievedChunk]]:
+        """Retrieve for several questions at once — one batched embed, one vector query.
+
+        Returns a chunk list per question, in order, for query(chunks=...).
+        """
+        if not questions:
+            return []
+        whole = await self.whole_document(session_id, metadata_filter)
+        if whole is not None:
+            return [list(whole) for _ in questions]  # query() sends the whole contract anyway
+        n_retrieve = n_retrieve or settings.TOP_K_RETRIEVAL
+        start = time.time()
+        q_embs = await self.embedder.aembed_queries(questions)
+        dense = await self.vs.query_many(
+            session_id=session_id,
+            query_embeddings=q_embs,
+            n_results=self._n_candidates(n_retrieve, metadata_filter),
+            where=metadata_filter,
+        )
+        results = await self._fuse(session_id, questions, dense, n_retrieve, metadata_filter)
+        log.info(
+            "rag_retrieve_many",
+            session_id=session_id[:8],
+            questions=len(questions),
+            latency_ms=int((time.time() - start) * 1000),
+        )
+        return results
+
+    async def _cached_answer(
+        self, session_id: str, question: str, scope: str
+    ) -> tuple[np.ndarray, Optional[CachedAnswer]]:
+        """Embed the question (reused for retrieval on a miss) and look it up in the answer cache."""
+        q_emb = await self.embedder.aembed_query(question)
+        return q_emb, get_answer_cache().lookup(session_id, scope, q_emb)
+
+    @staticmethod
+    def keep_count(n_retrieve: Optional[int] = None) -> int:
+        """Chunks that go into the prompt — fewer when reranking picks them."""
+        if n_retrieve:
+            return n_retrieve
+        return settings.RERANK_TOP_K if settings.RERANK_ENABLED else settings.TOP_K_RETRIEVAL
+
+    @classmethod
+    def candidate_count(cls, keep: Optional[int] = None) -> int:
+        """Chunks to retrieve for a prompt keeping `keep` — over-fetched for the reranker."""
+        keep = keep or cls.keep_count()
+        return max(keep, settings.RERANK_CANDIDATES) if settings.RERANK_ENABLED else keep
+
+    async def rerank(
+        self,
+        question: str,
+        chunks: List[RetrievedChunk],
+        keep: int,
+        call_site: str = "query",
+    ) -> List[RetrievedChunk]:
+        """Cross-encoder rerank of retrieved chunks, keeping the best `keep`.
+
+        Falls back to retrieval order when reranking is off or the model is
+        unavailable. Records rerank latency and the prompt-token change
+        against sending the top TOP_K_RETRIEVAL chunks unreranked.
+        """
+        if not settings.RERANK_ENABLED or len(chunks) <= 1:
+            return chunks[:keep]
+        start = time.perf_counter()
+        scores = await get_reranker().scores(question, [c.chunk_id for c in chunks], [c.text for c in chunks])
+        if scores is None:
+            return chunks[:keep]
+        order = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)
+        kept = [chunks[i] for i in order[:keep]]
+
+        elapsed = time.perf_counter() - start
+        baseline = sum(estimate_tokens(c.text) for c in chunks[: settings.TOP_K_RETRIEVAL])
+        delta = baseline - sum(estimate_tokens(c.text) for c in kept)
+        m.RERANK_DURATION.labels(call_site=call_site).observe(elapsed)
+        m.RERANK_PROMPT_TOKEN_DELTA.labels(call_site=call_site).observe(delta)
+        log.debug(
+            "rag_reranked",
+            call_site=call_site,
+            candidates=len(chunks),
+            kept=len(kept),
+            latency_ms=int(elapsed * 1000),
+            prompt_tokens_saved=delta,
+        )
+        return kept
+
+    @staticmethod
+    def pack(question: str, chunks: List[RetrievedChunk], call_site: str = "query") -> List[RetrievedChunk]:
+        """Merge overlapping chunks and drop repeated sentences, compressing to CONTEXT_TOKEN_BUDGET."""
+        if not settings.CONTEXT_PACKING_ENABLED:
+            return chunks
+        return pack_context(question, chunks, call_site=call_site)
+
+    @staticmethod
+    def _hybrid(metadata_filter: Optional[dict]) -> bool:
+        # BM25 cannot apply Chroma `where` filters, so filtered queries stay dense-only.
+        return settings.HYBRID_RETRIEVAL_ENABLED and not metadata_filter
+
+    def _n_candidates(self, n_retrieve: int, metadata_filter: Optional[dict]) -> int:
+        """Dense hits to fetch — a wider pool when it will be fused with BM25."""
+        if self._hybrid(metadata_filter):
+            return max(n_retrieve, settings.HYBRID_CANDIDATES)
+        return n_retrieve
+
+    async def _lexical_index(self, session_id: str) -> Optional[BM25Index]:
+        """The session's BM25 index, rebuilt from Chroma if this process has none (e.g. Celery ingest).
+
+        Also serves as the session's chunk list, in document order, for whole_document.
+        """
+        store = get_lexical_indexes()
+        index = store.get(session_id)
+        if index is None:
+            ids, texts, metadatas = await self.vs.get_documents(session_id)
+            if not ids:
+                return None
+            order = sorted(range(len(ids)), key=lambda i: document_position(metadatas[i]))
+            index = BM25Index([ids[i] for i in order], [texts[i] for i in order], [metadatas[i] for i in order])
+            store.put(session_id, index)
+            log.info("bm25_index_rebuilt", session_id=session_id[:8], chunks=len(index))
+        return index
+
+    async def _fuse(
+        self,
+        session_id: str,
+        questions: List[str],
+        dense: List[List[RetrievedChunk]],
+        n_retrieve: int,
+        metadata_filter: Optional[dict],
+    ) -> List[List[RetrievedChunk]]:
+        """Reciprocal rank fusion of dense hits with BM25 hits, cut to n_retrieve per question."""
+        index = await self._lexical_index(session_id) if self._hybrid(metadata_filter) else None
+        if index is None:
+            return [hits[:n_retrieve] for hits in dense]
+
+        fused: List[List[RetrievedChunk]] = []
+        for question, hits in zip(questions, dense):
+            lexical = [cid for cid, _ in index.search(question, settings.HYBRID_CANDIDATES)]
+            by_id = {c.chunk_id: c for c in hits}
+            ranked = reciprocal_rank_fusion([list(by_id), lexical], k=settings.RRF_K)[:n_retrieve]
+            chunks = []
+            for cid in ranked:
+                if cid not in by_id:
+                    text, meta = index.document(cid)
+                    by_id[cid] = RetrievedChunk(
+                        text=text,
+                        distance=1.0,  # lexical-only hit: no dense score to report
+                        chunk_id=cid,
+                        clause_number=meta.get("clause_number"),
+                        page=meta.get("page"),
+                        metadata=meta,
+                    )
+                    m.HYBRID_LEXICAL_ONLY_HITS.inc()
+                chunks.append(by_id[cid])
+            fused.append(chunks)
+        return fused
+
+    @classmethod
+    def fit_to_budget(
+        cls,
+        question: str,
+        chunks: List[RetrievedChunk],
+        system_prompt: str,
+        compact_system_prompt: Optional[str] = None,
+        call_site: str = "query",
+    ) -> tuple[str, List[RetrievedChunk]]:
+        """Trim context until the estimated prompt fits LLM_PROMPT_TOKEN_BUDGET.
+
+        Trims in priority order: lowest-ranked chunks down to
+        LLM_MIN_CONTEXT_CHUNKS, then the compact system prompt (if given),
+        then chunks down to one, then the tail of the last chunk. The
+        question itself is never cut.
+        """
+        budget = settings.LLM_PROMPT_TOKEN_BUDGET
+
+        def size(sys_prompt: str, kept: List[RetrievedChunk]) -> int:
+            return estimate_tokens(sys_prompt) + estimate_tokens(cls.build_prompt(question, kept))
+
+        original = size(system_prompt, chunks)
+        if original <= budget:
+            return system_prompt, chunks
+
+        kept = list(chunks)
+        while len(kept) > max(settings.LLM_MIN_CONTEXT_CHUNKS, 1) and size(system_prompt, kept) > budget:
+            kept.pop()
+        if compact_system_prompt is not None and size(system_prompt, kept) > budget:
+            system_prompt = compact_system_prompt
+        while len(kept) > 1 and size(system_prompt, kept) > budget:
+            kept.pop()
+
+        over = size(system_prompt, kept) - budget
+        if over > 0 and kept:
+            last = kept[-1]
+            kept[-1] = last.model_copy(update={"text": last.text[: max(len(last.text) - over * CHARS_PER_TOKEN, 0)]})
+
+        trimmed = original - size(system_prompt, kept)
+        m.LLM_PROMPT_TOKENS_TRIMMED.labels(call_site=call_site).inc(trimmed)
+        log.info(
+            "rag_prompt_trimmed",
+            call_site=call_site,
+            tokens_trimmed=trimmed,
+            chunks_kept=len(kept),
+            chunks_retrieved=len(chunks),
+            compact_system_prompt=system_prompt is compact_system_prompt,
+        )
+        return system_prompt, kept
+
+    @staticmethod
+    def build_prompt(question: str, chunks: List[RetrievedChunk]) -> str:
+        """Number the retrieved chunks into a context block followed by the question."""
+        context_parts = []
+        for i, c in enumerate(chunks):
+            clause_info = f" (Clause {c.clause_number})" if c.clause_number else ""
+            page_info = f" [Page {c.page}]" if c.page else ""
+            context_parts.append(f"[{i + 1}]{clause_info}{page_info}: {c.text}")
+
+        context = "\n\n".join(context_parts)
+        return f"Context from the contract:\n{context}\n\n---\n\nQuestion:\n{question}"
+
+    @staticmethod
+    def describe_sources(chunks: List[RetrievedChunk]) -> List[dict]:
+        """Source metadata for clients — numbering matches the [n] markers in the prompt."""
+        return [
+            {
+                "index": i + 1,
+                "chunk_id": c.chunk_id,
+                "clause_number": c.clause_number or None,
+                "page": c.page or None,
+                "distance": round(float(c.distance), 4),
+            }
+            for i, c in enumerate(chunks)
+        ]
+
+    @staticmethod
+    def _index_lexical(session_id: str, chunks: List[Chunk], document: dict) -> None:
+        """Extend this process's index for the session with a newly stored document.
+
+        Without one (restart, Celery ingest, LRU eviction) the new chunks
+        are not the whole session, so nothing is built here: the next
+        _lexical_index() call rebuilds from Chroma, which already has them.
+        """
+        store = get_lexical_indexes()
+        previous = store.get(session_id)
+        if previous is None:
+            return
+        metadatas = [
+            {"clause_number": c.clause_number or "", "page": c.page or 0, "index": c.index, **document}
+            for c in chunks
+        ]
+        store.put(session_id, BM25Index(
+            previous.ids + [c.chunk_id for c in chunks],
+            previous.texts + [c.text for c in chunks],
+            previous.metadatas + metadatas,
+        ))
+
     async def ingest_document(
         self,
         session_id: str,
@@ -96,10 +563,18 @@ class RAGPipeline:
 
         # 2. Batch embed
         texts = [c.text for c in chunks]
-        embeddings = self.embedder.embed_texts(texts)
+        embeddings = await self.embedder.aembed_texts(texts)
+
+        # 3. Store, tagged with the document so its chunks can be put back in reading order
+        document = {"document_id": generate_id(), "ingested_at": time.time_ns()}
+        count = await self.vs.add_chunks(session_id, chunks, embeddings, document)
+
+        # 4. Lexical side index for hybrid retrieval and whole-document mode (extends this process's copy)
+        if settings.HYBRID_RETRIEVAL_ENABLED or settings.WHOLE_DOCUMENT_ENABLED:
+            self._index_lexical(session_id, chunks, document)
 
-        # 3. Store
-        count = await self.vs.add_chunks(session_id, chunks, embeddings)
+        # 5. Answers given before this document was added may now be wrong
+        get_answer_cache().invalidate(session_id)
 
         elapsed_ms = int((time.time() - start) * 1000)
         log.info(
@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 import difflib
-import json
 from typing import List
 
+from config import settings
 from app.models.responses import RedlineReport, ContractChange
+from app.services.llm_schemas import CHANGE_CLASSIFICATION
 from app.services.rag_pipeline import RAGPipeline
 from app.services.document_parser import DocumentParser
 from app.services.chunker import LegalTextChunker
+from app.utils.deadline import current_deadline
+from app.utils.exceptions import DeadlineExceededError
 from app.utils.logger import get_logger
 
 log = get_logger("redline")
@@ -36,9 +39,18 @@ class RedlineComparator:
         # Step 2: Classify changes via LLM
         changes: List[ContractChange] = []
         critical_count = 0
+        deadline = current_deadline()
 
         for diff in diffs[:20]:  # Limit to 20 most important diffs
-            change = await self._classify_change(diff, session_id)
+            if deadline is not None and not deadline.has_time_for(settings.LLM_DEADLINE_MIN_SECONDS):
+                deadline.skip("redline")
+                break
+            try:
+                change = await self._classify_change(diff, session_id)
+            except DeadlineExceededError:
+                if deadline is not None:
+                    deadline.skip("redline")
+                break
             if change:
                 changes.append(change)
                 if change.severity in ("critical", "high"):
@@ -46,6 +58,8 @@ class RedlineComparator:
 
         # Step 3: Summary
         summary = f"Found {len(changes)} differences. {critical_count} are critical."
+        if deadline is not None and "redline" in deadline.skipped:
+            summary += " Some changes were not classified before the time limit."
 
         log.info("redline_complete", changes=len(changes), critical=critical_count)
 
@@ -110,17 +124,14 @@ class RedlineComparator:
                 prompt=question,
                 system_prompt=sys_prompt,
                 json_mode=True,
+                session_key=self.rag.session_key,
+                call_site="redline",
+                schema=CHANGE_CLASSIFICATION,
             )
-            data = json.loads(response)
-            return ContractChange(
-                clause_title=data.get("clause_title", "Unknown"),
-                change_type=data.get("change_type", "modified"),
-                old_text=old_text,
-                new_text=new_text,
-                severity=data.get("severity", "medium"),
-                impact_explanation=data.get("impact_explanation", ""),
-                favorable_to=data.get("favorable_to", "neutral"),
-            )
+            data = CHANGE_CLASSIFICATION.validate_json(response)
+            return ContractChange(old_text=old_text, new_text=new_text, **data.model_dump())
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             log.warning("change_classification_error", error=str(e))
             return None
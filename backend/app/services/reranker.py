@@ -0,0 +1,94 @@
+"""Cross-encoder reranker — rescores retrieved chunks against the question on CPU (singleton)."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from config import settings
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("reranker")
+
+
+class CrossEncoderReranker:
+    """Singleton — model loaded once; scores cached by (question hash, chunk id).
+
+    Chunk ids are unique per session, so a cached score never leaks across
+    documents; the same question asked again (or by another call site) only
+    scores chunks it has not seen.
+    """
+
+    _instance = None
+
+    def __new__(cls) -> "CrossEncoderReranker":
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._model = None
+            cls._instance._load_failed = False
+            cls._instance._scores = OrderedDict()
+        return cls._instance
+
+    def load_model(self) -> None:
+        """Load the cross-encoder (call at startup, or lazily on first rerank)."""
+        from sentence_transformers import CrossEncoder
+
+        log.info("loading_rerank_model", model=settings.RERANK_MODEL)
+        start = time.time()
+        self._model = CrossEncoder(settings.RERANK_MODEL, device="cpu", max_length=settings.RERANK_MAX_LENGTH)
+        log.info("rerank_model_loaded", model=settings.RERANK_MODEL, seconds=round(time.time() - start, 2))
+
+    def _ensure_loaded(self) -> bool:
+        if self._model is None and not self._load_failed:
+            try:
+                self.load_model()
+            except Exception as e:
+                # Reranking is an optimisation — keep serving in retrieval order.
+                self._load_failed = True
+                log.warning("rerank_model_unavailable", error=str(e))
+        return self._model is not None
+
+    @staticmethod
+    def _question_key(question: str) -> str:
+        return hashlib.sha256(question.encode("utf-8")).hexdigest()[:32]
+
+    def _cached(self, key: tuple[str, str]) -> Optional[float]:
+        score = self._scores.get(key)
+        if score is not None:
+            self._scores.move_to_end(key)
+        return score
+
+    def _remember(self, key: tuple[str, str], score: float) -> None:
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        while len(self._scores) > settings.RERANK_CACHE_MAX_ENTRIES:
+            self._scores.popitem(last=False)
+
+    def _predict(self, pairs: List[tuple[str, str]]) -> List[float]:
+        scores = self._model.predict(pairs, batch_size=settings.RERANK_BATCH_SIZE, show_progress_bar=False)
+        return [float(s) for s in scores]
+
+    async def scores(self, question: str, chunk_ids: Sequence[str], texts: Sequence[str]) -> Optional[List[float]]:
+        """Relevance score per chunk (higher is better); None if no model is available."""
+        if not self._ensure_loaded():
+            return None
+        qkey = self._question_key(question)
+        result: List[Optional[float]] = [self._cached((qkey, cid)) for cid in chunk_ids]
+        todo = [i for i, s in enumerate(result) if s is None]
+        m.RERANK_SCORE_CACHE.labels(result="hit").inc(len(result) - len(todo))
+        m.RERANK_SCORE_CACHE.labels(result="miss").inc(len(todo))
+        if todo:
+            # CPU-bound: run off the event loop so other requests keep flowing.
+            fresh = await asyncio.to_thread(self._predict, [(question, texts[i]) for i in todo])
+            for i, score in zip(todo, fresh):
+                result[i] = score
+                self._remember((qkey, chunk_ids[i]), score)
+        return result
+
+
+def get_reranker() -> CrossEncoderReranker:
+    return CrossEncoderReranker()
@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
-import json
 import time
 from typing import List
 
+from pydantic import ValidationError
+
+from config import settings
 from app.models.responses import RedFlag, AnalysisResponse, MissingClause, SafeClause
 from app.services.rag_pipeline import RAGPipeline
 from app.services.blindspot_analyzer import BlindspotAnalyzer
 from app.services.indian_acts_lookup import get_acts_context_for_prompt
+from app.services.law_database import red_flag_question, safe_clause_question
+from app.services.llm_schemas import RED_FLAGS, SAFE_CLAUSES
+from app.services.llm_usage import contract_type_scope
+from app.utils.deadline import current_deadline
+from app.utils.exceptions import DeadlineExceededError
 from app.utils.helpers import generate_id, clamp, utcnow
 from app.utils.logger import get_logger
 from app.utils import metrics as m
@@ -43,15 +50,21 @@ class RiskScorer:
     ) -> AnalysisResponse:
         """Full risk scoring pipeline."""
         start = time.time()
+        deadline = current_deadline()
 
-        # ── Step 1: LLM red flag detection ────────────────
-        red_flags = await self._detect_red_flags(session_id, contract_type)
+        with contract_type_scope(contract_type):
+            # ── Step 1: LLM red flag detection ────────────
+            red_flags = await self._detect_red_flags(session_id, contract_type)
 
-        # ── Step 2: Blindspot analysis ────────────────────
-        missing_clauses = await self.blindspot.analyze(session_id, contract_type)
+            # ── Step 2: Blindspot analysis ────────────────
+            missing_clauses = await self.blindspot.analyze(session_id, contract_type)
 
-        # ── Step 3: Safe clause detection ─────────────────
-        safe_clauses = await self._detect_safe_clauses(session_id, contract_type)
+            # ── Step 3: Safe clause detection (optional) ──
+            if deadline is not None and not deadline.has_time_for(settings.OPTIONAL_STAGE_MIN_SECONDS):
+                deadline.skip("safe_clauses")
+                safe_clauses = []
+            else:
+                safe_clauses = await self._detect_safe_clauses(session_id, contract_type)
 
         # ── Step 4: Score calculation ─────────────────────
         score = 0
@@ -65,6 +78,8 @@ class RiskScorer:
 
         # ── Step 5: Summary ───────────────────────────────
         summary = self._build_summary(red_flags, missing_clauses, risk_score, risk_level)
+        if deadline is not None and deadline.skipped:
+            summary += f" Partial analysis: {', '.join(deadline.skipped)} skipped due to time limit."
 
         elapsed = int((time.time() - start) * 1000)
         analysis_id = generate_id()
@@ -98,7 +113,7 @@ class RiskScorer:
 
     async def _detect_red_flags(self, session_id: str, contract_type: str) -> List[RedFlag]:
         """Ask LLM to find red flags with Indian law violations."""
-        acts_context = get_acts_context_for_prompt(contract_type)
+        acts_context = get_acts_context_for_prompt(contract_type, compact=True)
 
         sys_prompt = (
             "You are an Indian legal expert specializing in contract law. "
@@ -114,12 +129,7 @@ class RiskScorer:
             "Return an empty array [] if no red flags found."
         )
 
-        question = (
-            f"This is a {contract_type} contract. Analyze ALL clauses for violations "
-            f"of Indian law. Look for illegal terms, unfair clauses, and rights violations. "
-            f"Cite specific Indian Acts and their sections. "
-            f"Return the red flags as a JSON array."
-        )
+        question = red_flag_question(contract_type)
 
         try:
             response = await self.rag.query(
@@ -127,36 +137,27 @@ class RiskScorer:
                 question=question,
                 system_prompt=sys_prompt,
                 json_mode=True,
+                call_site="red_flags",
+                schema=RED_FLAGS,
             )
 
-            flags_data = json.loads(response)
-            if isinstance(flags_data, dict):
-                flags_data = flags_data.get("red_flags", flags_data.get("flags", []))
-            if not isinstance(flags_data, list):
-                flags_data = []
-
             red_flags = []
-            for i, f in enumerate(flags_data):
+            for i, f in enumerate(RED_FLAGS.validate_json(response)):
                 try:
-                    red_flags.append(RedFlag(
-                        flag_id=f"rf_{i}",
-                        clause_title=f.get("clause_title", "Unknown Clause"),
-                        quoted_text=f.get("quoted_text", ""),
-                        violation_type=f.get("violation_type", ""),
-                        law_reference=f.get("law_reference", ""),
-                        severity=f.get("severity", "medium"),
-                        plain_explanation=f.get("plain_explanation", ""),
-                        recommendation=f.get("recommendation", ""),
-                        replacement_clause=f.get("replacement_clause"),
-                    ))
+                    red_flags.append(RedFlag(flag_id=f"rf_{i}", **f.model_dump()))
                 except Exception:
                     continue
 
             return red_flags
 
-        except json.JSONDecodeError:
+        except ValidationError:
             log.warning("red_flag_json_parse_error", session_id=session_id[:8])
             return []
+        except DeadlineExceededError:
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.skip("red_flags")
+            return []
         except Exception as e:
             log.error("red_flag_detection_error", error=str(e))
             return []
@@ -170,24 +171,18 @@ class RiskScorer:
             "Return max 5 safe clauses. Return empty array [] if none found."
         )
 
-        question = f"Find the clauses in this {contract_type} contract that are fair and protect the weaker party."
+        question = safe_clause_question(contract_type)
 
         try:
-            response = await self.rag.query(session_id=session_id, question=question, system_prompt=sys_prompt, json_mode=True)
-            data = json.loads(response)
-            if isinstance(data, dict):
-                data = data.get("safe_clauses", [])
-            if not isinstance(data, list):
-                data = []
-
-            return [
-                SafeClause(
-                    clause_title=c.get("clause_title", ""),
-                    quoted_text=c.get("quoted_text", ""),
-                    explanation=c.get("explanation", ""),
-                )
-                for c in data[:5]
-            ]
+            response = await self.rag.query(
+                session_id=session_id,
+                question=question,
+                system_prompt=sys_prompt,
+                json_mode=True,
+                call_site="safe_clauses",
+                schema=SAFE_CLAUSES,
+            )
+            return [SafeClause(**c.model_dump()) for c in SAFE_CLAUSES.validate_json(response)[:5]]
         except Exception:
             return []
 
@@ -5,6 +5,7 @@ from __future__ import annotations
 from typing import List, Optional
 
 import chromadb
+import numpy as np
 
 from config import settings
 from app.models.internal import Chunk, RetrievedChunk
@@ -60,9 +61,16 @@ class VectorStore:
         self,
         session_id: str,
         chunks: List[Chunk],
-        embeddings: List[List[float]],
+        embeddings: np.ndarray,
+        document: Optional[dict] = None,
     ) -> int:
-        """Batch upsert chunks + embeddings into session collection."""
+        """Batch upsert chunks + embeddings into session collection.
+
+        `embeddings` is an (n, dim) float32 array; Chroma keeps its rows as
+        numpy views, whereas lists of floats are converted element by element.
+        `document` is metadata shared by every chunk of the ingested document
+        (see RAGPipeline.ingest_document).
+        """
         collection = self.get_or_create_collection(session_id)
 
         ids = [c.chunk_id for c in chunks]
@@ -73,6 +81,7 @@ class VectorStore:
                 "page": c.page or 0,
                 "index": c.index,
                 "session_id": session_id,
+                **(document or {}),
             }
             for c in chunks
         ]
@@ -92,40 +101,66 @@ class VectorStore:
     async def query(
         self,
         session_id: str,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         n_results: int = 6,
         where: Optional[dict] = None,
     ) -> List[RetrievedChunk]:
         """Cosine similarity search in session collection."""
-        collection = self.get_or_create_collection(session_id)
+        results = await self.query_many(session_id, np.atleast_2d(query_embedding), n_results, where)
+        return results[0]
 
-        if collection.count() == 0:
+    async def query_many(
+        self,
+        session_id: str,
+        query_embeddings: np.ndarray,
+        n_results: int = 6,
+        where: Optional[dict] = None,
+    ) -> List[List[RetrievedChunk]]:
+        """One Chroma query for several embeddings (an (n, dim) array) — returns a chunk list per embedding."""
+        if len(query_embeddings) == 0:
             return []
+        collection = self.get_or_create_collection(session_id)
+
+        count = collection.count()
+        if count == 0:
+            return [[] for _ in query_embeddings]
 
         results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=min(n_results, collection.count()),
+            query_embeddings=query_embeddings,
+            n_results=min(n_results, count),
             where=where,
         )
+        return [self._to_chunks(results, q) for q in range(len(query_embeddings))]
 
+    @staticmethod
+    def _to_chunks(results: dict, q: int) -> List[RetrievedChunk]:
+        """Unpack the hits for the q-th query embedding."""
         retrieved: List[RetrievedChunk] = []
         if results and results["documents"]:
-            for i, doc in enumerate(results["documents"][0]):
-                meta = results["metadatas"][0][i] if results["metadatas"] else {}
-                dist = results["distances"][0][i] if results["distances"] else 0.0
+            for i, doc in enumerate(results["documents"][q]):
+                meta = results["metadatas"][q][i] if results["metadatas"] else {}
+                dist = results["distances"][q][i] if results["distances"] else 0.0
                 retrieved.append(
                     RetrievedChunk(
                         text=doc,
                         distance=dist,
-                        chunk_id=results["ids"][0][i] if results["ids"] else "",
+                        chunk_id=results["ids"][q][i] if results["ids"] else "",
                         clause_number=meta.get("clause_number"),
                         page=meta.get("page"),
                         metadata=meta,
                     )
                 )
-
         return retrieved
 
+    async def get_documents(self, session_id: str) -> tuple[List[str], List[str], List[dict]]:
+        """All (ids, documents, metadatas) in a session collection — for rebuilding side indexes.
+
+        Chroma returns them in no particular order; see rag_pipeline.document_position.
+        """
+        collection = self.get_or_create_collection(session_id)
+        results = collection.get(include=["documents", "metadatas"])
+        return results["ids"], results["documents"] or [], results["metadatas"] or []
+
     async def delete_collection(self, session_id: str) -> bool:
         """Delete entire session collection."""
         name = f"session_{session_id.replace('-', '_')[:48]}"
@@ -0,0 +1,73 @@
+"""Per-request deadlines carried through the pipeline via contextvars."""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from app.utils.exceptions import DeadlineExceededError
+from app.utils.logger import get_logger
+from app.utils import metrics as m
+
+log = get_logger("deadline")
+
+
+class Deadline:
+    """Absolute end-to-end time budget for one request.
+
+    Stages ask for `remaining()` to size their timeouts and retries, and call
+    `skip()` when they drop optional work so the result can report it.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.budget = seconds
+        self.expires_at = clock() + seconds
+        self.skipped: List[str] = []
+
+    def remaining(self) -> float:
+        return max(self.expires_at - self._clock(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def has_time_for(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceededError if the budget is already spent."""
+        if self.expired:
+            raise DeadlineExceededError(stage)
+
+    def skip(self, stage: str) -> None:
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+            m.STAGES_SKIPPED.labels(stage=stage).inc()
+            log.warning("stage_skipped_for_deadline", stage=stage, remaining_s=round(self.remaining(), 1))
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[Deadline]:
+    """Install a deadline for everything awaited inside the block.
+
+    A nested scope never extends an outer deadline.
+    """
+    outer = _current_deadline.get()
+    deadline = Deadline(seconds)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline.expires_at = outer.expires_at
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
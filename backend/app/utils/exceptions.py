@@ -43,11 +43,30 @@ class OllamaError(LegalSaathiError):
         self.status_code = status_code
 
 
+class LLMCircuitOpenError(OllamaError):
+    """Raised when the circuit breaker is open and the call fails fast."""
+    pass
+
+
 class OllamaModelNotFoundError(OllamaError):
     """Raised when the requested model isn't available."""
     pass
 
 
+class DeadlineExceededError(LegalSaathiError):
+    """Raised when a request's time budget runs out before a stage can run."""
+    def __init__(self, stage: str = ""):
+        super().__init__(f"Request deadline exceeded during: {stage or 'unknown stage'}")
+        self.stage = stage
+
+
+class ClientDisconnectedError(LegalSaathiError):
+    """Raised when a request is abandoned because the client went away."""
+    def __init__(self, route: str = ""):
+        super().__init__(f"Client disconnected during: {route or 'request'}")
+        self.route = route
+
+
 class RateLimitExceededError(LegalSaathiError):
     """Raised when rate limit is exceeded."""
     pass
@@ -56,6 +56,14 @@ def format_bytes(n: int) -> str:
     return f"{n:.1f} TB"
 
 
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting and metrics."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
 def clamp(value: int | float, lo: int | float, hi: int | float) -> int | float:
     """Clamp value between lo and hi."""
     return max(lo, min(hi, value))
@@ -0,0 +1,150 @@
+"""Tolerant JSON repair for LLM output — fixes common damage locally instead of re-asking the model."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Optional
+
+# Python-style literals models sometimes emit outside strings.
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+# How many times to drop a truncated trailing element before giving up.
+_MAX_ROLLBACKS = 8
+
+# How many candidate documents to try; bounds the work on bracket-heavy prose.
+_MAX_STARTS = 32
+
+
+def repair_json(text: str, accept: Optional[Callable[[Any], bool]] = None) -> Optional[str]:
+    """Best-effort repair of a JSON document embedded in LLM output.
+
+    Handles prose or code fences around the document, single-quoted strings,
+    Python literals, trailing commas, mismatched closers, and truncation
+    (unterminated strings, unclosed brackets, a half-written last element).
+    Every `{` / `[` outside an already recovered document is tried as a
+    start, and the candidate spanning the most input wins, so bracketed
+    prose such as "clause [3]" ahead of the real document is skipped.
+    With `accept`, only candidates whose parsed value it approves count.
+    Returns valid JSON text, or None if nothing acceptable could be recovered.
+    """
+    best: Optional[str] = None
+    best_span = 0
+    covered = -1  # end of the last accepted document; starts inside it are shorter nested values
+    tried = 0
+    for start in _container_starts(text):
+        if start < covered:
+            continue
+        if tried == _MAX_STARTS:
+            break
+        tried += 1
+        result = _repair_from(text, start)
+        if result is None:
+            continue
+        candidate, end = result
+        if accept is not None and not accept(json.loads(candidate)):
+            continue
+        covered = end
+        if end - start > best_span:
+            best, best_span = candidate, end - start
+    return best
+
+
+def _container_starts(text: str) -> list[int]:
+    return [i for i, ch in enumerate(text) if ch in "{["]
+
+
+def _repair_from(text: str, start: int) -> Optional[tuple[str, int]]:
+    """Repaired JSON text for the value opening at `start`, and the input index it ends at."""
+    out: list[str] = []
+    stack: list[str] = []
+    # (output length, open closers) after each top-level-safe comma, for rollback
+    checkpoints: list[tuple[int, list[str]]] = []
+    quote = ""
+    i, n = start, len(text)
+
+    while i < n:
+        ch = text[i]
+        if quote:
+            if ch == "\\" and i + 1 < n:
+                nxt = text[i + 1]
+                # \' is not a JSON escape
+                out.append("'" if nxt == "'" else ch + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = ""
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            if not stack:
+                break
+            _strip_trailing_comma(out)
+            out.append(stack.pop())
+            if not stack:
+                break  # anything after the root value is stray prose
+        elif ch == ",":
+            out.append(ch)
+            checkpoints.append((len(out) - 1, list(stack)))
+        elif ch.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if quote:
+        out.append('"')
+    end = min(i + 1, n)
+    candidate = _close(out, stack)
+    if _parses(candidate):
+        return candidate, end
+
+    # Truncated mid-element: drop back to each earlier comma and close there.
+    for pos, open_stack in reversed(checkpoints[-_MAX_ROLLBACKS:]):
+        candidate = _close(out[:pos], open_stack)
+        if _parses(candidate):
+            return candidate, end
+    return None
+
+
+def _close(out: list[str], stack: list[str]) -> str:
+    closed = list(out)
+    for closer in reversed(stack):
+        _strip_trailing_comma(closed)
+        closed.append(closer)
+    return "".join(closed)
+
+
+def _strip_trailing_comma(out: list[str]) -> None:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j:]
+
+
+def _parses(candidate: str) -> bool:
+    try:
+        json.loads(candidate)
+        return True
+    except json.JSONDecodeError:
+        return False
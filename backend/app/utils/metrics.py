@@ -14,6 +14,136 @@ SESSIONS_CREATED = Counter("legalsaathi_sessions_created_total", "Total sessions
 SESSIONS_WIPED = Counter("legalsaathi_sessions_wiped_total", "Total sessions wiped")
 FILES_PROCESSED = Counter("legalsaathi_files_processed_total", "Files processed", ["mime_type"])
 VOICE_QUERIES = Counter("legalsaathi_voice_queries_total", "Voice queries", ["language"])
+LLM_CACHE_HITS = Counter("legalsaathi_llm_cache_hits_total", "LLM response cache hits", ["tier"])
+LLM_CACHE_MISSES = Counter("legalsaathi_llm_cache_misses_total", "LLM response cache misses")
+LLM_CACHE_BYTES_SERVED = Counter("legalsaathi_llm_cache_bytes_served_total", "Response bytes served from the LLM cache")
+SINGLEFLIGHT_COLLAPSED = Counter(
+    "legalsaathi_singleflight_collapsed_total",
+    "Calls that joined an identical in-flight request instead of issuing their own",
+    ["kind"],
+)
+LLM_RETRIES = Counter("legalsaathi_llm_retries_total", "LLM call retries", ["call_site"])
+LLM_RETRIES_DENIED = Counter("legalsaathi_llm_retries_denied_total", "Retries refused by the global retry budget")
+LLM_CIRCUIT_REJECTIONS = Counter(
+    "legalsaathi_llm_circuit_rejections_total",
+    "LLM calls failed fast by an open circuit breaker",
+    ["backend"],
+)
+STAGES_SKIPPED = Counter(
+    "legalsaathi_stages_skipped_total",
+    "Pipeline stages skipped or cut short to meet the request deadline",
+    ["stage"],
+)
+LLM_POOL_TIMEOUTS = Counter(
+    "legalsaathi_llm_pool_timeouts_total",
+    "LLM requests that timed out waiting for a pooled connection",
+)
+REQUESTS_CANCELLED = Counter(
+    "legalsaathi_requests_cancelled_total",
+    "Long-running requests cancelled because the client disconnected",
+    ["route"],
+)
+LLM_CALLS_CANCELLED = Counter(
+    "legalsaathi_llm_calls_cancelled_total",
+    "LLM calls cancelled before completing (queued = never sent)",
+    ["call_site", "phase"],
+)
+LLM_TOKENS_SAVED = Counter(
+    "legalsaathi_llm_tokens_saved_total",
+    "Estimated tokens not billed because an LLM call was cancelled",
+    ["call_site"],
+)
+LLM_TOKENS = Counter(
+    "legalsaathi_llm_tokens_total",
+    "LLM tokens billed (kind = prompt | completion)",
+    ["call_site", "contract_type", "kind"],
+)
+LLM_COST_USD = Counter(
+    "legalsaathi_llm_cost_usd_total",
+    "LLM spend in USD (OpenRouter-reported, else estimated from configured prices)",
+    ["call_site", "contract_type"],
+)
+LLM_PROMPT_TOKENS_TRIMMED = Counter(
+    "legalsaathi_llm_prompt_tokens_trimmed_total",
+    "Estimated prompt tokens removed to fit the per-call token budget",
+    ["call_site"],
+)
+LLM_PROFILE_TOKENS = Counter(
+    "legalsaathi_llm_profile_tokens_total",
+    "LLM tokens billed per generation profile (kind = prompt | completion)",
+    ["profile", "kind"],
+)
+LLM_BACKEND_ERRORS = Counter(
+    "legalsaathi_llm_backend_errors_total",
+    "LLM backend failures (timeouts, connection errors, 5xx)",
+    ["backend"],
+)
+LLM_HEDGES = Counter("legalsaathi_llm_hedges_total", "Hedged duplicate LLM requests sent", ["call_site"])
+LLM_HEDGE_WINS = Counter(
+    "legalsaathi_llm_hedge_wins_total",
+    "Which backend answered first when a request was hedged",
+    ["backend"],
+)
+LLM_HEDGES_DENIED = Counter("legalsaathi_llm_hedges_denied_total", "Hedges refused by the hedging budget")
+LLM_PROMPT_OVER_BUDGET = Counter(
+    "legalsaathi_llm_prompt_over_budget_total",
+    "LLM calls sent with an estimated prompt above the token budget",
+    ["call_site"],
+)
+LLM_JSON_REPAIRED = Counter(
+    "legalsaathi_llm_json_retries_avoided_total",
+    "Malformed JSON responses repaired locally instead of re-asking the LLM",
+    ["call_site"],
+)
+LLM_CASSETTE_REQUESTS = Counter(
+    "legalsaathi_llm_cassette_requests_total",
+    "LLM requests served by the record/replay cassette",
+    ["mode", "outcome"],
+)
+EMBEDDING_BUNDLE_HITS = Counter(
+    "legalsaathi_embedding_bundle_hits_total",
+    "Embeddings served from the precomputed bundle instead of the model",
+    ["kind"],
+)
+HYBRID_LEXICAL_ONLY_HITS = Counter(
+    "legalsaathi_hybrid_lexical_only_hits_total",
+    "Retrieved chunks that only BM25 found (missed by the dense top candidates)",
+)
+RERANK_SCORE_CACHE = Counter(
+    "legalsaathi_rerank_score_cache_total",
+    "Cross-encoder scores looked up in the (question, chunk) cache",
+    ["result"],
+)
+CONTEXT_TOKENS_SAVED = Counter(
+    "legalsaathi_context_tokens_saved_total",
+    "Estimated context tokens removed by packing (stage = dedup | compress)",
+    ["call_site", "stage"],
+)
+RAG_CONTEXT_MODE = Counter(
+    "legalsaathi_rag_context_mode_total",
+    "RAG prompts by context strategy (mode = whole_document | retrieval)",
+    ["call_site", "mode"],
+)
+ANSWER_CACHE_LOOKUPS = Counter(
+    "legalsaathi_answer_cache_lookups_total",
+    "Semantic answer cache lookups by result (hit | miss)",
+    ["result"],
+)
+ANSWER_CACHE_SIMILARITY = Histogram(
+    "legalsaathi_answer_cache_similarity",
+    "Best cosine similarity to a cached question in the same session (for tuning the threshold)",
+    buckets=[0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.98, 1.0],
+)
+WHOLE_DOCUMENT_TOKENS = Histogram(
+    "legalsaathi_whole_document_tokens",
+    "Estimated tokens of contracts sent whole instead of retrieved",
+    buckets=[250, 500, 1000, 1500, 2000, 3000, 4000, 6000],
+)
+LLM_JSON_INVALID = Counter(
+    "legalsaathi_llm_json_invalid_total",
+    "JSON-mode responses that could not be repaired or failed schema validation",
+    ["call_site", "reason"],
+)
 
 # ── Histograms ───────────────────────────────────────────
 ANALYSIS_DURATION = Histogram(
@@ -26,13 +156,126 @@ INFERENCE_DURATION = Histogram(
     "Time for single Ollama inference call",
     buckets=[0.5, 1, 2, 5, 10, 30, 60],
 )
+LLM_PROFILE_DURATION = Histogram(
+    "legalsaathi_llm_profile_duration_seconds",
+    "LLM completion latency per generation profile",
+    ["profile"],
+    buckets=[0.25, 0.5, 1, 2, 5, 10, 30, 60, 120],
+)
+LLM_BACKEND_LATENCY = Histogram(
+    "legalsaathi_llm_backend_latency_seconds",
+    "Successful completion latency per LLM backend",
+    ["backend"],
+    buckets=[0.25, 0.5, 1, 2, 5, 10, 30, 60, 120],
+)
 EMBEDDING_DURATION = Histogram(
     "legalsaathi_embedding_duration_seconds",
     "Time for embedding batch",
     buckets=[0.1, 0.5, 1, 2, 5, 10],
 )
+LLM_POOL_WAITS = Histogram(
+    "legalsaathi_llm_pool_wait_seconds",
+    "Time LLM requests waited for a slot on the shared connection pool",
+    buckets=[0.001, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10],
+)
+EMBEDDING_QUEUE_WAIT = Histogram(
+    "legalsaathi_embedding_queue_wait_seconds",
+    "Time an embedding request waited for the executor thread (kind = query | bulk)",
+    ["kind"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "legalsaathi_embedding_batch_size",
+    "Texts per micro-batched encode call",
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128],
+)
+EMBEDDING_BACKEND_FALLBACKS = Counter(
+    "legalsaathi_embedding_backend_fallbacks_total",
+    "ONNX embedding backends that failed to load or the parity check, replaced by PyTorch",
+    ["backend"],
+)
+EMBEDDING_PADDING_EFFICIENCY = Histogram(
+    "legalsaathi_embedding_padding_efficiency",
+    "Real tokens / padded tokens per embedding call (1.0 = no padding)",
+    buckets=[0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0],
+)
+EMBEDDING_FORWARD_PASSES = Counter("legalsaathi_embedding_forward_passes_total", "Length-bucketed encode batches run")
+EMBEDDING_TRUNCATED = Counter(
+    "legalsaathi_embedding_truncated_total", "Texts truncated to EMBEDDING_MAX_SEQ_LENGTH before embedding"
+)
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "legalsaathi_embedding_cache_lookups_total",
+    "Content-hash embedding cache lookups (result = memory | disk | miss)",
+    ["result"],
+)
+EMBEDDING_CACHE_SECONDS_SAVED = Counter(
+    "legalsaathi_embedding_cache_seconds_saved_total",
+    "Estimated encode time avoided by embedding cache hits (hits × recent seconds per text)",
+)
+EMBEDDING_TEXTS = Counter("legalsaathi_embedding_texts_total", "Texts embedded by the executor (rate = throughput)")
+BM25_BUILD_DURATION = Histogram(
+    "legalsaathi_bm25_build_duration_seconds",
+    "Time to build a BM25 index (kind = session | context: per-query sentences for packing)",
+    ["kind"],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1],
+)
+BM25_QUERY_DURATION = Histogram(
+    "legalsaathi_bm25_query_duration_seconds",
+    "Time for one BM25 search (kind = session | context)",
+    ["kind"],
+    buckets=[0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1],
+)
+RERANK_DURATION = Histogram(
+    "legalsaathi_rerank_duration_seconds",
+    "Cross-encoder rerank latency per retrieval",
+    ["call_site"],
+    buckets=[0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2],
+)
+RERANK_PROMPT_TOKEN_DELTA = Histogram(
+    "legalsaathi_rerank_prompt_token_delta",
+    "Context tokens saved by reranking vs. the unreranked top-k (negative = more)",
+    ["call_site"],
+    buckets=[-500, -100, 0, 100, 250, 500, 1000, 2000, 4000],
+)
+LLM_QUEUE_WAIT = Histogram(
+    "legalsaathi_llm_queue_wait_seconds",
+    "Time an LLM call waited for a scheduler slot and rate-limit token",
+    ["priority"],
+    buckets=[0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30],
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "legalsaathi_llm_time_to_first_token_seconds",
+    "Time from request start to the first visible streamed token",
+    buckets=[0.25, 0.5, 1, 2, 5, 10, 30, 60],
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "legalsaathi_llm_stream_tokens_per_second",
+    "Streamed completion throughput (including hidden thinking tokens)",
+    buckets=[5, 10, 20, 40, 80, 160, 320],
+)
 
 # ── Gauges ───────────────────────────────────────────────
 ACTIVE_SESSIONS = Gauge("legalsaathi_active_sessions", "Currently active sessions")
 CHROMA_COLLECTIONS = Gauge("legalsaathi_chromadb_collections", "Active ChromaDB collections")
 TEMP_FILES_ON_DISK = Gauge("legalsaathi_temp_files_on_disk", "Temp files currently on disk")
+LLM_POOL_OPEN_CONNECTIONS = Gauge("legalsaathi_llm_pool_open_connections", "Open connections in the shared LLM pool")
+LLM_POOL_IN_FLIGHT = Gauge("legalsaathi_llm_pool_in_flight", "LLM requests currently in flight on the shared pool")
+LLM_CACHE_BYTES = Gauge("legalsaathi_llm_cache_bytes", "Bytes held in the in-process LLM response cache")
+LLM_CIRCUIT_STATE = Gauge(
+    "legalsaathi_llm_circuit_state",
+    "LLM circuit breaker state (0=closed, 1=half-open, 2=open)",
+    ["backend"],
+)
+LLM_BACKEND_HEALTH = Gauge(
+    "legalsaathi_llm_backend_health",
+    "EWMA success rate per LLM backend (1 = healthy)",
+    ["backend"],
+)
+EMBEDDING_BACKEND = Gauge("legalsaathi_embedding_backend", "Embedding backend in use (1 = active)", ["backend"])
+EMBEDDING_CACHE_DISK_ENTRIES = Gauge("legalsaathi_embedding_cache_disk_entries", "Vectors in the on-disk embedding cache")
+EMBEDDING_QUEUE_DEPTH = Gauge("legalsaathi_embedding_queue_depth", "Embedding requests waiting for the executor thread")
+EMBEDDING_THROUGHPUT = Gauge(
+    "legalsaathi_embedding_throughput_texts_per_second", "Texts per second of the last executor batch"
+)
+EMBEDDING_BUNDLE_SIZE = Gauge("legalsaathi_embedding_bundle_vectors", "Vectors in the memory-mapped embedding bundle")
+LLM_QUEUE_DEPTH = Gauge("legalsaathi_llm_queue_depth", "LLM calls waiting for a scheduler slot", ["priority"])
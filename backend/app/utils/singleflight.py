@@ -0,0 +1,92 @@
+"""Single-flight coalescing — concurrent identical calls share one execution."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from app.utils import metrics as m
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """Coroutine-level single-flight.
+
+    The first caller for a key starts the work as a task; later callers with
+    the same key await that task instead of starting their own. The work is
+    only cancelled once every waiter has gone away.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._flights: dict[str, _Flight] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+        else:
+            m.SINGLEFLIGHT_COLLAPSED.labels(kind=self.kind).inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+class SingleFlight:
+    """Thread-level single-flight for blocking work (e.g. model forward passes)."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._flights: dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            fut = self._flights.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._flights[key] = fut
+
+        if not leader:
+            m.SINGLEFLIGHT_COLLAPSED.labels(kind=self.kind).inc()
+            return fut.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
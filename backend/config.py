@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import secrets
 from pathlib import Path
-from typing import List
+from typing import List, Literal, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -49,6 +49,83 @@ class Settings(BaseSettings):
     LLM_TIMEOUT: int = 120
     LLM_MAX_TOKENS: int = 4096
     LLM_TEMPERATURE: float = 0.1
+    LLM_TIMEOUT_MIN: int = 10
+    LLM_TIMEOUT_PERCENTILE: float = 0.99
+    LLM_TIMEOUT_MULTIPLIER: float = 2.0
+    LLM_TIMEOUT_MIN_SAMPLES: int = 20
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 8.0
+    LLM_RETRY_BUDGET_RATIO: float = 0.2
+    LLM_RETRY_BUDGET_RESERVE: int = 10
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+    LLM_BREAKER_PROBE_INTERVAL: float = 5.0
+    LLM_DEADLINE_MIN_SECONDS: float = 3.0
+    LLM_HTTP2: bool = True
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_POOL_TIMEOUT: float = 10.0
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_RATE_LIMIT_RPM: float = 120
+    LLM_RATE_LIMIT_BURST: int = 10
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 2048
+    LLM_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.3
+    LLM_SINGLEFLIGHT_REDIS: bool = True
+    LLM_SINGLEFLIGHT_LOCK_TTL_SECONDS: int = 120
+    LLM_SINGLEFLIGHT_POLL_SECONDS: float = 0.25
+
+    # ── LLM cassettes (offline perf runs: "" = off, "record" or "replay") ──
+    LLM_CASSETTE_MODE: Literal["", "record", "replay"] = ""
+    LLM_CASSETTE_PATH: str = "./data/llm_cassette.jsonl"
+    LLM_CASSETTE_LATENCY: Optional[float] = None  # replay delay in seconds; None = recorded latency
+
+    # ── Token accounting (prices are USD per 1M tokens, used when OpenRouter omits cost) ──
+    LLM_PROMPT_TOKEN_BUDGET: int = 6000
+    LLM_MIN_CONTEXT_CHUNKS: int = 2
+    LLM_PRICE_PROMPT_PER_MTOK: float = 0.13
+    LLM_PRICE_COMPLETION_PER_MTOK: float = 0.60
+
+    # ── Backends & hedging (empty LLM_BACKENDS = OpenRouter only) ──
+    # [{"name": str, "base_url": str, "api_key": str, "models": {profile model: backend model}}]
+    LLM_BACKENDS: list[dict] = []
+    LLM_BACKEND_MIN_HEALTH: float = 0.5
+    LLM_BACKEND_HEALTH_HALF_LIFE_SECONDS: float = 60.0  # health lost to failures halves per interval without one
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_BUDGET_RATIO: float = 0.05
+    LLM_HEDGE_BUDGET_RESERVE: int = 5
+
+    # ── Generation profiles (empty model = OPENROUTER_MODEL) ──
+    LLM_DEFAULT_PROFILE: str = "standard"
+    LLM_PROFILES: dict[str, dict] = {
+        "deep": {"model": "", "max_tokens": 4096, "temperature": 0.1, "thinking": True, "timeout": 120},
+        "standard": {"model": "", "max_tokens": 2048, "temperature": 0.1, "thinking": False, "timeout": 90},
+        "classify": {
+            "model": "qwen/qwen3-30b-a3b", "max_tokens": 384, "temperature": 0.0, "thinking": False, "timeout": 30,
+        },
+        "yes_no": {
+            "model": "qwen/qwen3-30b-a3b", "max_tokens": 16, "temperature": 0.0, "thinking": False, "timeout": 20,
+        },
+    }
+    LLM_CALL_SITE_PROFILES: dict[str, str] = {
+        "red_flags": "deep",
+        "safe_clauses": "standard",
+        "pushback": "standard",
+        "query": "standard",
+        "redline": "classify",
+        "blindspot": "yes_no",
+    }
+
+    # ── Request deadlines (keep below nginx proxy_read_timeout) ──
+    REQUEST_DEADLINE_SECONDS: float = 110.0
+    TASK_DEADLINE_SECONDS: float = 170.0
+    OPTIONAL_STAGE_MIN_SECONDS: float = 20.0
+    DISCONNECT_POLL_SECONDS: float = 1.0
 
     # ── ChromaDB (Local Persistent) ────────────────────
     CHROMA_PERSIST_DIR: str = "./data/chromadb"
@@ -63,9 +140,43 @@ class Settings(BaseSettings):
     # ── Embeddings ───────────────────────────────────────
     EMBEDDING_MODEL: str = "intfloat/multilingual-e5-large"
     EMBEDDING_DEVICE: str = "cpu"
+    EMBEDDING_BACKEND: Literal["torch", "onnx", "onnx-int8"] = "torch"
+    EMBEDDING_QUANTIZATION: Literal["arm64", "avx2", "avx512", "avx512_vnni"] = "avx512_vnni"  # onnx-int8 only
+    EMBEDDING_ONNX_DIR: str = "./data/models/onnx"  # exported once on first load
+    EMBEDDING_PARITY_MIN_COSINE: float = 0.99  # vs PyTorch on a fixed sample; below it, fall back to torch
+    EMBEDDING_MAX_SEQ_LENGTH: int = 512  # tokens; longer passages are truncated (e5-large maximum)
+    EMBEDDING_BATCH_SIZE: int = 64  # max texts per forward pass
+    EMBEDDING_BATCH_TOKENS: int = 8192  # max padded tokens (texts × longest) per forward pass
+    EMBEDDING_CACHE_ENABLED: bool = True  # content-hash cache: SHA-256 keys + vectors only, no text
+    EMBEDDING_CACHE_DIR: str = "./data/embedding_cache"
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 20000
+    EMBEDDING_CACHE_DISK_ENTRIES: int = 100000  # × 4 KB for e5-large; 0 = memory only
+    EMBEDDING_MICROBATCH_MAX: int = 32  # query texts per encode call; bulk uses EMBEDDING_BATCH_* batches
+    EMBEDDING_MICROBATCH_WAIT_MS: float = 5.0  # how long a query waits for others to batch with
     CHUNK_SIZE: int = 800
     CHUNK_OVERLAP: int = 150
     TOP_K_RETRIEVAL: int = 6
+    HYBRID_RETRIEVAL_ENABLED: bool = True  # BM25 fused with dense hits (reciprocal rank fusion)
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+    BM25_MAX_SESSIONS: int = 256
+    RERANK_ENABLED: bool = False  # CPU cross-encoder over the retrieved candidates
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 12
+    RERANK_TOP_K: int = 4
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_MAX_LENGTH: int = 512
+    RERANK_CACHE_MAX_ENTRIES: int = 20000
+    CONTEXT_PACKING_ENABLED: bool = True  # merge overlapping chunks, drop repeated sentences
+    CONTEXT_TOKEN_BUDGET: int = 2500  # above this, keep the sentences closest to the question
+    WHOLE_DOCUMENT_ENABLED: bool = True  # short contracts skip retrieval and go into the prompt whole
+    WHOLE_DOCUMENT_MAX_TOKENS: int = 3500  # keep below LLM_PROMPT_TOKEN_BUDGET minus system prompt
+    ANSWER_CACHE_ENABLED: bool = True  # /query reuses answers to repeated or paraphrased questions
+    ANSWER_CACHE_THRESHOLD: float = 0.94  # E5 cosine scores run high; unrelated questions often reach 0.8
+    ANSWER_CACHE_MAX_ENTRIES: int = 64  # per session
+    ANSWER_CACHE_MAX_SESSIONS: int = 256
+    EMBEDDING_BUNDLE_ENABLED: bool = True
+    EMBEDDING_BUNDLE_DIR: str = "./data/embeddings"
 
     # ── Voice ────────────────────────────────────────────
     WHISPER_MODEL: str = "large-v3"
@@ -24,6 +24,8 @@ from app.utils.exceptions import (
     LegalSaathiError,
     SessionExpiredError,
     FileValidationError,
+    DeadlineExceededError,
+    ClientDisconnectedError,
 )
 from app.api.router import api_router
 from app.api import deps
@@ -54,10 +56,13 @@ async def lifespan(app: FastAPI):
         if settings.ENVIRONMENT == "production":
             raise
 
-    # 3. Initialize session manager
+    # 3. Initialize session manager + shared LLM response cache tier
     session_mgr = SessionManager(redis_client, settings.SESSION_TTL_SECONDS)
     deps.set_globals(redis_client, session_mgr)
 
+    from app.services.llm_cache import get_response_cache
+    get_response_cache().set_redis(redis_client)
+
     # 4. Initialize ChromaDB
     from app.services.vector_store import VectorStore
     vs = VectorStore()
@@ -71,9 +76,23 @@ async def lifespan(app: FastAPI):
             embedder.load_model()
         except Exception as e:
             log.warning("embedding_model_warmup_failed", error=str(e))
-
-    # 6. Check OpenRouter LLM connectivity
-    from app.services.ollama_client import LLMClient
+        else:
+            # Fixed questions + template clauses; rebuilt only when the law JSON changes
+            try:
+                from app.services.embedding_bundle import ensure_bundle
+                ensure_bundle(embedder)
+            except Exception as e:
+                log.warning("embedding_bundle_failed", error=str(e))
+        if settings.RERANK_ENABLED:
+            try:
+                from app.services.reranker import get_reranker
+                get_reranker().load_model()
+            except Exception as e:
+                log.warning("rerank_model_warmup_failed", error=str(e))
+
+    # 6. Open shared LLM connection pool + check OpenRouter connectivity
+    from app.services.ollama_client import LLMClient, open_http_pool, close_http_pool
+    await open_http_pool()
     llm = LLMClient()
     try:
         is_ready = await llm.health_check()
@@ -96,7 +115,9 @@ async def lifespan(app: FastAPI):
 
     # ── Shutdown ──────────────────────────────────────────
     log.info("shutdown_initiated")
-    await llm.close()
+    await close_http_pool()
+    from app.services.embedder import EmbeddingService
+    EmbeddingService().close()
     await redis_client.aclose()
     log.info("shutdown_complete")
 
@@ -142,6 +163,17 @@ async def file_validation_handler(request: Request, exc: FileValidationError):
     return JSONResponse(status_code=400, content={"detail": exc.message})
 
 
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+    return JSONResponse(status_code=504, content={"detail": exc.message})
+
+
+@app.exception_handler(ClientDisconnectedError)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnectedError):
+    # 499 (nginx "client closed request"); nobody is listening for the body.
+    return JSONResponse(status_code=499, content={"detail": exc.message})
+
+
 @app.exception_handler(LegalSaathiError)
 async def legalsaathi_error_handler(request: Request, exc: LegalSaathiError):
     return JSONResponse(status_code=500, content={"detail": exc.message})
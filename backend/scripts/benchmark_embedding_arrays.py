@@ -0,0 +1,85 @@
+"""Micro-benchmark: embeddings handed on as Python float lists vs float32 arrays.
+
+Usage:
+    python scripts/benchmark_embedding_arrays.py [--chunks 200] [--dim 1024] [--repeat 20] [--chroma]
+
+Compares the old path (model output → .tolist() → Chroma converts each list
+back to a float32 array) with the current one (float32 rows passed as is),
+reporting time per ingestion and peak Python allocations. With --chroma,
+also times collection.add() on an in-memory Chroma client both ways.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+import uuid
+from typing import Callable
+
+import numpy as np
+
+
+def list_path(vectors: np.ndarray) -> list:
+    lists = vectors.tolist()
+    return [np.array(v, dtype=np.float32) for v in lists]  # what Chroma does with float lists
+
+
+def array_path(vectors: np.ndarray) -> list:
+    return [row for row in vectors]  # what Chroma does with a 2-D float32 array
+
+
+def _measure(fn: Callable[[np.ndarray], object], vectors: np.ndarray, repeat: int) -> tuple[float, int]:
+    fn(vectors)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(vectors)
+    per_call = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    fn(vectors)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call, peak
+
+
+def _chroma_add(vectors: np.ndarray, as_lists: bool) -> float:
+    import chromadb
+
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"bench_{uuid.uuid4().hex[:8]}")
+    ids = [str(i) for i in range(len(vectors))]
+    start = time.perf_counter()
+    collection.add(ids=ids, embeddings=vectors.tolist() if as_lists else vectors)
+    elapsed = time.perf_counter() - start
+    client.delete_collection(collection.name)
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200, help="vectors per ingestion")
+    parser.add_argument("--dim", type=int, default=1024, help="embedding size (e5-large: 1024)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chroma", action="store_true", help="also time Chroma collection.add()")
+    args = parser.parse_args()
+
+    vectors = np.random.default_rng(0).standard_normal((args.chunks, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    print(f"{args.chunks} vectors × {args.dim} float32")
+
+    print(f"{'path':<14}{'ms/ingest':>12}{'peak KiB':>12}")
+    results = {}
+    for name, fn in (("list", list_path), ("float32 array", array_path)):
+        per_call, peak = _measure(fn, vectors, args.repeat)
+        results[name] = per_call
+        print(f"{name:<14}{per_call * 1000:>12.2f}{peak / 1024:>12.0f}")
+    print(f"speed-up: {results['list'] / results['float32 array']:.0f}x")
+
+    if args.chroma:
+        for name, as_lists in (("list", True), ("float32 array", False)):
+            print(f"chroma add ({name}): {_chroma_add(vectors, as_lists) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
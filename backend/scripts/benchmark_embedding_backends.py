@@ -0,0 +1,71 @@
+"""Benchmark embedding backends: throughput at several batch sizes and parity with PyTorch.
+
+Usage:
+    python scripts/benchmark_embedding_backends.py [--backends torch onnx onnx-int8]
+                                                   [--batch-sizes 1 8 32 64] [--texts 256]
+
+Each backend is loaded the way the API loads it (ONNX variants are exported
+to EMBEDDING_ONNX_DIR on first use). Texts are the law database's template
+clauses, cycled to --texts. Prints texts/second per batch size and the
+lowest cosine similarity to the PyTorch embeddings of the same texts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from config import settings  # noqa: E402
+from app.services.embedding_backends import load_onnx_model, load_torch_model, min_cosine  # noqa: E402
+from app.services.law_database import load_law_database, template_clauses  # noqa: E402
+
+
+def _load(backend: str):
+    settings.EMBEDDING_BACKEND = backend
+    return load_torch_model() if backend == "torch" else load_onnx_model()
+
+
+def _encode(model, texts, batch_size: int) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32), time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32, 64])
+    parser.add_argument("--texts", type=int, default=256, help="texts encoded per batch-size run")
+    args = parser.parse_args()
+
+    clauses = template_clauses(load_law_database())
+    texts = [f"passage: {t}" for t in itertools.islice(itertools.cycle(clauses), args.texts)]
+    print(f"model={settings.EMBEDDING_MODEL} device={settings.EMBEDDING_DEVICE} texts={len(texts)}")
+
+    reference = None
+    print(f"{'backend':<12}{'batch':>6}{'texts/s':>10}{'min cos':>10}")
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        try:
+            model = _load(backend)
+        except Exception as e:
+            print(f"{backend:<12} unavailable: {e}")
+            continue
+        _encode(model, texts[:8], 8)  # warm-up (lazy session init, allocator)
+        for batch_size in args.batch_sizes:
+            vectors, elapsed = _encode(model, texts, batch_size)
+            if reference is None:
+                reference = vectors
+            parity = min_cosine(vectors, reference)
+            print(f"{backend:<12}{batch_size:>6}{len(texts) / elapsed:>10.1f}{parity:>10.5f}")
+        del model
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Build the precomputed embedding bundle offline (e.g. in the Docker image build).
+
+Usage:
+    python scripts/build_embedding_bundle.py [--rebuild]
+
+Writes EMBEDDING_BUNDLE_DIR/<model>-<law hash>.npy plus its .json index. The
+API also builds it at startup when missing, so this only moves that cost out
+of the first boot after the law JSON changes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.embedder import EmbeddingService  # noqa: E402
+from app.services.embedding_bundle import ensure_bundle  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if an up-to-date bundle exists")
+    args = parser.parse_args()
+
+    bundle = ensure_bundle(EmbeddingService(), rebuild=args.rebuild)
+    print(f"{len(bundle) if bundle is not None else 0} vectors ready")
+
+
+if __name__ == "__main__":
+    main()
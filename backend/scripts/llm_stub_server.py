@@ -0,0 +1,87 @@
+"""Local OpenAI-compatible LLM stub — stands in for OpenRouter when testing routing and hedging.
+
+Usage:
+    python scripts/llm_stub_server.py --port 8089 --latency 0.5 --jitter 2.0 --error-rate 0.1
+
+Then point the app at it, e.g.
+    LLM_BACKENDS='[{"name":"openrouter","base_url":"https://openrouter.ai/api/v1","api_key":"..."},
+                   {"name":"stub","base_url":"http://localhost:8089/v1"}]'
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def build_app(latency: float, jitter: float, error_rate: float, reply: str) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+
+    def _usage(messages: list[dict], text: str) -> dict:
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4, "cost": 0.0}
+
+    def _answer(body: dict) -> str:
+        # JSON-mode callers get something parseable back.
+        if body.get("response_format", {}).get("type") == "json_object":
+            return json.dumps({"stub": True, "reply": reply})
+        return reply
+
+    @app.get("/v1/models")
+    async def models():
+        return {"data": [{"id": "stub"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        # Exponential tail: most calls take ~latency, a few take much longer.
+        await asyncio.sleep(latency + random.expovariate(1 / jitter) if jitter > 0 else latency)
+        if random.random() < error_rate:
+            return JSONResponse({"error": {"message": "stub failure"}}, status_code=503)
+
+        text = _answer(body)
+        usage = _usage(body.get("messages", []), text)
+        if not body.get("stream"):
+            return {
+                "id": f"stub-{time.time_ns()}",
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            }
+
+        async def events():
+            for word in text.split(" "):
+                chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.01)
+            yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="base response time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mean of the extra exponential delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    parser.add_argument("--reply", default="YES", help="completion text to return")
+    args = parser.parse_args()
+
+    app = build_app(args.latency, args.jitter, args.error_rate, args.reply)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
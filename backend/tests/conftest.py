@@ -3,6 +3,41 @@
 import pytest
 import pytest_asyncio
 from pathlib import Path
+from prometheus_client import REGISTRY
+
+
+class FakeClock:
+    """Monotonic clock for code that takes `clock=`; tests move it with `clock.now += seconds`."""
+
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def completion():
+    """Build an OpenAI-style chat completion body: completion(content, usage=None)."""
+
+    def build(content: str, usage: dict | None = None) -> dict:
+        body = {"choices": [{"message": {"content": content}}]}
+        if usage is not None:
+            body["usage"] = usage
+        return body
+
+    return build
+
+
+@pytest.fixture
+def metric():
+    """Current value of a Prometheus sample, 0.0 before it is first recorded: metric(name, **labels)."""
+    return lambda name, **labels: REGISTRY.get_sample_value(name, labels) or 0.0
 
 
 @pytest.fixture
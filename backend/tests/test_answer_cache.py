@@ -0,0 +1,68 @@
+"""Tests for the per-session semantic answer cache."""
+
+import time
+
+import numpy as np
+from prometheus_client import REGISTRY
+
+from app.services.answer_cache import SemanticAnswerCache, answer_scope
+
+
+def _vec(*values: float) -> np.ndarray:
+    v = np.asarray(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _cache(**kwargs) -> SemanticAnswerCache:
+    params = dict(max_sessions=4, max_entries=8, ttl_seconds=60, threshold=0.94)
+    params.update(kwargs)
+    return SemanticAnswerCache(**params)
+
+
+SCOPE = answer_scope("system prompt", "query")
+
+
+class TestSemanticAnswerCache:
+    def test_paraphrase_above_threshold_hits(self):
+        cache = _cache()
+        cache.store("s1", SCOPE, "what is the deposit?", _vec(1, 0, 0), "INR 50,000", [{"index": 1}])
+        hit = cache.lookup("s1", SCOPE, _vec(1, 0.1, 0))
+        assert hit is not None and hit.answer == "INR 50,000" and hit.sources == [{"index": 1}]
+
+    def test_dissimilar_question_misses(self):
+        cache = _cache()
+        cache.store("s1", SCOPE, "what is the deposit?", _vec(1, 0, 0), "INR 50,000")
+        before = REGISTRY.get_sample_value("legalsaathi_answer_cache_lookups_total", {"result": "miss"}) or 0.0
+        assert cache.lookup("s1", SCOPE, _vec(1, 1, 0)) is None
+        after = REGISTRY.get_sample_value("legalsaathi_answer_cache_lookups_total", {"result": "miss"})
+        assert after == before + 1
+
+    def test_answers_isolated_by_session_and_scope(self):
+        cache = _cache()
+        cache.store("s1", SCOPE, "q", _vec(1, 0), "a")
+        assert cache.lookup("s2", SCOPE, _vec(1, 0)) is None
+        assert cache.lookup("s1", answer_scope("hindi prompt", "query"), _vec(1, 0)) is None
+
+    def test_invalidate_drops_session_answers(self):
+        cache = _cache()
+        cache.store("s1", SCOPE, "q", _vec(1, 0), "a")
+        cache.invalidate("s1")
+        assert cache.lookup("s1", SCOPE, _vec(1, 0)) is None
+
+    def test_entries_and_sessions_bounded(self):
+        cache = _cache(max_sessions=2, max_entries=2)
+        cache.store("s1", SCOPE, "q1", _vec(1, 0, 0), "a1")
+        cache.store("s1", SCOPE, "q2", _vec(0, 1, 0), "a2")
+        cache.store("s1", SCOPE, "q3", _vec(0, 0, 1), "a3")
+        assert cache.lookup("s1", SCOPE, _vec(1, 0, 0)) is None  # oldest evicted
+        assert cache.lookup("s1", SCOPE, _vec(0, 0, 1)).answer == "a3"
+
+        cache.store("s2", SCOPE, "q", _vec(1, 0, 0), "a")
+        cache.store("s3", SCOPE, "q", _vec(1, 0, 0), "a")
+        assert cache.lookup("s1", SCOPE, _vec(0, 0, 1)) is None
+
+    def test_expires_with_session_ttl(self):
+        cache = _cache()
+        cache.store("s1", SCOPE, "q", _vec(1, 0), "a")
+        cache._sessions["s1"].created_at = time.monotonic() - 61
+        assert cache.lookup("s1", SCOPE, _vec(1, 0)) is None
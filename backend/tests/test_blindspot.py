@@ -1,9 +1,11 @@
-"""Tests for blindspot analyzer law database loading."""
+"""Tests for the blindspot analyzer and its law database."""
 
 import json
 from pathlib import Path
 import pytest
 
+from app.services.blindspot_analyzer import BlindspotAnalyzer
+
 
 class TestLawDatabase:
     """Test the Indian law JSON files are valid and complete."""
@@ -47,3 +49,44 @@ class TestLawDatabase:
             data = json.loads(f.read_text())
             for clause in data["standard_clauses"]:
                 assert clause["severity_if_missing"] in valid, f"Invalid severity in {f.name}: {clause['severity_if_missing']}"
+
+
+class _FakeRAG:
+    """Stand-in RAGPipeline: records query() calls and answers "NO" to every check."""
+
+    def __init__(self, retrieval_error=None):
+        self.retrieval_error = retrieval_error
+        self.chunks = []
+
+    def candidate_count(self):
+        return 4
+
+    async def retrieve_many(self, session_id, questions, n_retrieve=None):
+        if self.retrieval_error is not None:
+            raise self.retrieval_error
+        return [[f"chunks for {q}"] for q in questions]
+
+    async def query(self, session_id, question, system_prompt, call_site="query", chunks=None, **kwargs):
+        self.chunks.append(chunks)
+        return "NO"
+
+
+class TestBlindspotRetrieval:
+    @pytest.mark.asyncio
+    async def test_batched_chunks_reach_each_check(self):
+        rag = _FakeRAG()
+        analyzer = BlindspotAnalyzer(rag)
+        missing = await analyzer.analyze("blindspot-batched", "rental")
+
+        clauses = analyzer.law_db["rental"]
+        assert len(missing) == len(rag.chunks) == len(clauses)
+        assert all(chunks and chunks[0].startswith("chunks for ") for chunks in rag.chunks)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_falls_back_to_per_clause_retrieval(self):
+        rag = _FakeRAG(retrieval_error=RuntimeError("chroma unavailable"))
+        analyzer = BlindspotAnalyzer(rag)
+        missing = await analyzer.analyze("blindspot-fallback", "rental")
+
+        assert len(missing) == len(analyzer.law_db["rental"])
+        assert rag.chunks == [None] * len(missing)  # query() retrieves for itself
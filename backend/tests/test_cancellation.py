@@ -0,0 +1,79 @@
+"""Tests for cancelling work when the HTTP client disconnects."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from config import settings
+from app.api.deps import cancel_on_disconnect
+from app.services import ollama_client
+from app.services.ollama_client import LLMClient, close_http_pool
+from app.utils.exceptions import ClientDisconnectedError
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: int):
+        self.polls = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.polls += 1
+        return self.polls >= self.disconnect_after
+
+
+@pytest.fixture
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(settings, "DISCONNECT_POLL_SECONDS", 0.01)
+
+
+class TestCancelOnDisconnect:
+    @pytest.mark.asyncio
+    async def test_returns_result_when_client_stays(self, fast_poll):
+        async def work():
+            await asyncio.sleep(0.03)
+            return "report"
+
+        assert await cancel_on_disconnect(FakeRequest(disconnect_after=1000), work(), "test") == "report"
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_work(self, fast_poll, metric):
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        before = metric("legalsaathi_requests_cancelled_total", route="test_disconnect")
+        with pytest.raises(ClientDisconnectedError):
+            await cancel_on_disconnect(FakeRequest(disconnect_after=2), work(), "test_disconnect")
+        assert cancelled.is_set()
+        assert metric("legalsaathi_requests_cancelled_total", route="test_disconnect") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_llm_call_reports_tokens_saved(self, metric):
+        started = asyncio.Event()
+
+        async def handler(req):
+            started.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200)
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        before = metric("legalsaathi_llm_tokens_saved_total", call_site="test_cancel")
+        try:
+            task = asyncio.create_task(
+                LLMClient().generate("q", temperature=0.9, max_tokens=500, call_site="test_cancel")
+            )
+            await started.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        finally:
+            await close_http_pool()
+        assert metric("legalsaathi_llm_calls_cancelled_total", call_site="test_cancel", phase="in_flight") == 1
+        assert metric("legalsaathi_llm_tokens_saved_total", call_site="test_cancel") == before + 500
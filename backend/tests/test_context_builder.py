@@ -0,0 +1,122 @@
+"""Tests for context packing — chunk merging, sentence dedup and extractive compression."""
+
+from typing import Optional
+
+from pydantic import BaseModel
+from prometheus_client import REGISTRY
+
+from app.services.context_builder import pack_context, split_sentences, strip_overlap
+
+
+class _Chunk(BaseModel):
+    """Stand-in with the RetrievedChunk fields the packer reads."""
+
+    text: str
+    chunk_id: str
+    clause_number: Optional[str] = None
+    page: Optional[int] = None
+    distance: float = 0.0
+    metadata: dict = {}
+
+
+def _chunk(cid: str, text: str, clause: str | None = None, index: int | None = None, document: str = "") -> _Chunk:
+    metadata = {} if index is None else {"index": index, "document_id": document}
+    return _Chunk(text=text, chunk_id=cid, clause_number=clause, metadata=metadata)
+
+
+class TestPackContext:
+    def test_untouched_chunks_pass_through(self):
+        chunks = [_chunk("a", "Rent is INR 25,000.", "2", 1), _chunk("b", "Deposit is six months.", "3", 4)]
+        assert pack_context("rent", chunks, budget_tokens=1000) == chunks
+
+    def test_adjacent_chunks_of_a_clause_merge_without_overlap(self):
+        # Chunker overlap: the second piece repeats the first's last sentence.
+        first = _chunk("a", "The tenant pays rent. Late fees apply after 5 days.", "2", 1)
+        second = _chunk("b", "Late fees apply after 5 days. Fees are 2% per month.", "2", 2)
+        packed = pack_context("late fees", [second, first], budget_tokens=1000)
+        assert len(packed) == 1
+        assert packed[0].chunk_id == "b"  # best-ranked member leads
+        assert packed[0].text == "The tenant pays rent. Late fees apply after 5 days. Fees are 2% per month."
+
+    def test_duplicate_sentences_across_clauses_dropped(self):
+        chunks = [
+            _chunk("a", "Either party may terminate. Notice is 30 days.", "5", 1),
+            _chunk("b", "Notice is 30 days. Arbitration is in Mumbai.", "9", 7),
+        ]
+        packed = pack_context("notice", chunks, budget_tokens=1000)
+        assert [c.text for c in packed] == ["Either party may terminate. Notice is 30 days.", "Arbitration is in Mumbai."]
+
+    def test_over_budget_keeps_sentences_closest_to_question(self):
+        filler = " ".join(f"Filler sentence number {i} about nothing." for i in range(20))
+        chunks = [
+            _chunk("a", f"{filler} The security deposit shall be refunded within 30 days.", "3", 1),
+            _chunk("b", "Maintenance is the landlord's duty. Painting happens yearly.", "6", 9),
+        ]
+        before = REGISTRY.get_sample_value(
+            "legalsaathi_context_tokens_saved_total", {"call_site": "t_pack", "stage": "compress"}
+        ) or 0.0
+        packed = pack_context("when is the security deposit refunded", chunks, budget_tokens=40, call_site="t_pack")
+
+        assert "The security deposit shall be refunded within 30 days." in packed[0].text
+        assert "Filler sentence number 3" not in packed[0].text
+        assert len(packed) == 2  # every chunk keeps at least its best sentence
+        after = REGISTRY.get_sample_value(
+            "legalsaathi_context_tokens_saved_total", {"call_site": "t_pack", "stage": "compress"}
+        )
+        assert after > before
+
+    def test_compression_index_kept_out_of_session_bm25_timings(self):
+        def count(name, kind):
+            return REGISTRY.get_sample_value(f"legalsaathi_bm25_{name}_duration_seconds_count", {"kind": kind}) or 0.0
+
+        chunks = [_chunk("a", " ".join(f"Sentence {i} about rent." for i in range(30)), "1", 1)]
+        session = count("build", "session"), count("query", "session")
+        context = count("build", "context"), count("query", "context")
+
+        pack_context("rent", chunks, budget_tokens=20)
+
+        assert (count("build", "session"), count("query", "session")) == session
+        assert (count("build", "context"), count("query", "context")) == (context[0] + 1, context[1] + 1)
+
+    def test_chunks_of_different_documents_never_merge(self):
+        first = _chunk("a", "Rent is due monthly. Late fees apply.", "1", 0, document="d1")
+        second = _chunk("b", "Late fees apply. Pets are allowed.", "1", 1, document="d2")
+        packed = pack_context("late fees", [first, second], budget_tokens=1000)
+        assert [c.chunk_id for c in packed] == ["a", "b"]
+
+    def test_split_sentences(self):
+        assert split_sentences("One. Two?  Three!") == ["One.", "Two?", "Three!"]
+
+
+class TestStripOverlap:
+    def test_repeated_lead_sentences_removed_in_document_order(self):
+        chunks = [
+            _chunk("a", "Rent is due monthly. Late fees apply.", "2", 0),
+            _chunk("b", "Late fees apply. Fees are 2% per month.", "2", 1),
+            _chunk("c", "Fees are 2% per month. Disputes go to arbitration.", "7", 2),
+        ]
+        out = strip_overlap(chunks)
+        assert [c.chunk_id for c in out] == ["a", "b", "c"]
+        assert out[1].text == "Fees are 2% per month."
+        assert out[2] is chunks[2]  # different clause: not chunker overlap
+
+    def test_fully_repeated_chunk_dropped_and_output_is_stable(self):
+        chunks = [
+            _chunk("a", "One. Two.", "1", 0),
+            _chunk("b", "Two.", "1", 1),
+            _chunk("c", "Two. Three.", "1", 2),
+        ]
+        first = [c.text for c in strip_overlap(chunks)]
+        assert first == ["One. Two.", "Three."]
+        assert [c.text for c in strip_overlap(chunks)] == first
+
+    def test_index_restart_in_next_document_is_not_overlap(self):
+        chunks = [
+            _chunk("a", "Rent is due monthly. Late fees apply.", "1", 0, document="d1"),
+            _chunk("b", "Late fees apply. Fees are 2% per month.", "1", 1, document="d1"),
+            _chunk("c", "Fees are 2% per month. Pets are allowed.", "1", 2, document="d2"),
+        ]
+        chunks[2].metadata["index"] = 0  # the second document's first chunk
+        out = strip_overlap([chunks[0], chunks[1], chunks[2]])
+        assert out[1].text == "Fees are 2% per month."
+        assert out[2] is chunks[2]
@@ -0,0 +1,75 @@
+"""Tests for per-request deadline propagation."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import ollama_client
+from app.services.ollama_client import LLMClient, close_http_pool
+from app.utils.deadline import Deadline, current_deadline, deadline_scope
+from app.utils.exceptions import DeadlineExceededError
+
+
+class TestDeadline:
+    def test_remaining_counts_down(self, clock):
+        deadline = Deadline(10, clock=clock)
+        clock.now += 4
+        assert deadline.remaining() == 6
+        assert deadline.has_time_for(5)
+        assert not deadline.has_time_for(7)
+
+    def test_check_raises_once_expired(self, clock):
+        deadline = Deadline(1, clock=clock)
+        deadline.check("retrieve")
+        clock.now += 2
+        with pytest.raises(DeadlineExceededError) as exc:
+            deadline.check("retrieve")
+        assert exc.value.stage == "retrieve"
+
+    def test_skip_records_each_stage_once(self):
+        deadline = Deadline(5)
+        deadline.skip("safe_clauses")
+        deadline.skip("safe_clauses")
+        deadline.skip("blindspot")
+        assert deadline.skipped == ["safe_clauses", "blindspot"]
+
+
+class TestDeadlineScope:
+    def test_scope_sets_and_resets(self):
+        assert current_deadline() is None
+        with deadline_scope(30) as deadline:
+            assert current_deadline() is deadline
+        assert current_deadline() is None
+
+    def test_nested_scope_never_extends_outer(self):
+        with deadline_scope(5) as outer:
+            with deadline_scope(60) as inner:
+                assert inner.expires_at == outer.expires_at
+            with deadline_scope(1) as tighter:
+                assert tighter.expires_at < outer.expires_at
+
+    @pytest.mark.asyncio
+    async def test_propagates_into_tasks(self):
+        async def read():
+            return current_deadline()
+
+        with deadline_scope(30) as deadline:
+            assert await asyncio.create_task(read()) is deadline
+
+
+class TestGenerateUnderDeadline:
+    @pytest.mark.asyncio
+    async def test_exhausted_deadline_skips_the_call(self):
+        calls = []
+        ollama_client._http_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda req: calls.append(req) or httpx.Response(200))
+        )
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            with deadline_scope(0.5):
+                with pytest.raises(DeadlineExceededError):
+                    await LLMClient().generate("q", temperature=0.9, call_site="test_deadline")
+            assert calls == []
+        finally:
+            await close_http_pool()
@@ -0,0 +1,233 @@
+"""Tests for the embedding service (with a stand-in model, no weights needed)."""
+
+import asyncio
+import sys
+import threading
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+from config import settings
+import app.services.embedder as embedder_module
+from app.services.embedder import EmbeddingService, length_buckets
+from app.services.embedding_backends import EmbeddingParityError, embedding_model_id, load_onnx_model, min_cosine
+from app.services import embedding_bundle
+from app.services.embedding_bundle import bundle_path
+from app.services.law_database import law_database_hash
+
+
+class _FakeModel:
+    """Deterministic encode(): one 4-dim vector per input, seeded by text length."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, sentences, normalize_embeddings=True, show_progress_bar=False, **kwargs):
+        self.calls.append(sentences)
+        batch = [sentences] if isinstance(sentences, str) else sentences
+        out = np.array([[len(s), 1.0, 0.0, 0.0] for s in batch], dtype=np.float32)
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out[0] if isinstance(sentences, str) else out
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)  # fake vectors must not reach the disk cache
+    svc = EmbeddingService()
+    previous = svc._model, svc._backend
+    svc._model = _FakeModel()
+    yield svc
+    svc._model, svc._backend = previous
+
+
+class TestEmbedQueries:
+    def test_one_batched_encode_for_all_queries(self, embedder):
+        vectors = embedder.embed_queries(["notice period?", "security deposit?", "lock-in?"])
+        assert len(vectors) == 3
+        assert embedder._model.calls == [["query: notice period?", "query: security deposit?", "query: lock-in?"]]
+
+    def test_matches_single_query_embedding(self, embedder):
+        batched = embedder.embed_queries(["notice period?"])[0]
+        single = embedder.embed_query("notice period?")
+        assert np.allclose(batched, single)
+
+    def test_empty_input_skips_model(self, embedder):
+        assert len(embedder.embed_queries([])) == 0
+        assert embedder._model.calls == []
+
+
+class TestFloat32Arrays:
+    def test_batch_is_one_contiguous_float32_array(self, embedder):
+        vectors = embedder.embed_texts(["Rent is due.", "Deposit is refundable."])
+        assert isinstance(vectors, np.ndarray)
+        assert vectors.dtype == np.float32 and vectors.shape == (2, 4)
+        assert vectors.flags["C_CONTIGUOUS"]
+
+    def test_query_is_float32_vector(self, embedder):
+        vector = embedder.embed_query("notice period?")
+        assert isinstance(vector, np.ndarray) and vector.dtype == np.float32 and vector.shape == (4,)
+
+    @pytest.mark.asyncio
+    async def test_async_paths_return_arrays(self, embedder):
+        try:
+            texts = await embedder.aembed_texts(["a", "bb"])
+            queries = await embedder.aembed_queries(["notice period?"])
+        finally:
+            embedder.close()
+        assert texts.dtype == np.float32 and texts.shape == (2, 4)
+        assert queries.dtype == np.float32 and queries.shape == (1, 4)
+
+
+class TestAsyncEmbedding:
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_batch_off_the_loop(self, embedder, monkeypatch):
+        threads = []
+        encode = embedder._model.encode
+
+        def recording_encode(sentences, **kwargs):
+            threads.append(threading.current_thread())
+            return encode(sentences, **kwargs)
+
+        monkeypatch.setattr(embedder._model, "encode", recording_encode)
+        monkeypatch.setattr(settings, "EMBEDDING_MICROBATCH_WAIT_MS", 50.0)
+        embedder.close()
+        try:
+            vectors = await asyncio.gather(
+                embedder.aembed_query("notice period?"),
+                embedder.aembed_query("security deposit?"),
+                embedder.aembed_query("lock-in?"),
+            )
+        finally:
+            embedder.close()
+        assert embedder._model.calls == [["query: notice period?", "query: security deposit?", "query: lock-in?"]]
+        assert threads[0] is not threading.main_thread()
+        assert np.allclose(vectors[0], embedder.embed_query("notice period?"))
+
+    @pytest.mark.asyncio
+    async def test_bulk_split_into_batches_and_reassembled(self, embedder, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 2)
+        embedder.close()
+        try:
+            texts = ["a", "bb " * 10, "ccc", "dddd " * 10, "eeeee"]
+            vectors = await embedder.aembed_texts(texts)
+        finally:
+            embedder.close()
+        assert [len(c) for c in embedder._model.calls] == [2, 2, 1]
+        assert embedder._model.calls[0] == [f"passage: {texts[3]}", f"passage: {texts[1]}"]  # longest first
+        assert np.allclose(vectors, embedder.embed_texts(texts))
+
+    @pytest.mark.asyncio
+    async def test_bulk_batches_span_more_than_one_microbatch(self, embedder, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_MICROBATCH_MAX", 4)
+        monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 8)
+        embedder.close()
+        try:
+            texts = [f"clause {i} " + "x" * (i % 3) * 40 for i in range(20)]
+            vectors = await embedder.aembed_texts(texts)
+        finally:
+            embedder.close()
+        assert [len(c) for c in embedder._model.calls] == [8, 8, 4]
+        encoded = [len(t) // 40 for call in embedder._model.calls for t in call]
+        assert encoded == sorted(encoded, reverse=True)  # sorted across the whole request, not per slice
+        assert np.allclose(vectors, embedder.embed_texts(texts))
+
+    @pytest.mark.asyncio
+    async def test_encode_error_reaches_caller(self, embedder, monkeypatch):
+        def boom(sentences, **kwargs):
+            raise RuntimeError("model crashed")
+
+        monkeypatch.setattr(embedder._model, "encode", boom)
+        embedder.close()
+        try:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                await embedder.aembed_texts(["x"])
+        finally:
+            embedder.close()
+
+
+class TestEmbeddingBackends:
+    def test_onnx_failure_falls_back_to_torch(self, embedder, monkeypatch):
+        def parity_failure():
+            raise EmbeddingParityError("min cosine 0.91 < 0.99")
+
+        fallback = _FakeModel()
+        monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx-int8")
+        monkeypatch.setattr(embedder_module, "load_onnx_model", parity_failure)
+        monkeypatch.setattr(embedder_module, "load_torch_model", lambda: fallback)
+        before = REGISTRY.get_sample_value(
+            "legalsaathi_embedding_backend_fallbacks_total", {"backend": "onnx-int8"}
+        ) or 0.0
+
+        embedder.load_model()
+
+        assert embedder._model is fallback
+        after = REGISTRY.get_sample_value("legalsaathi_embedding_backend_fallbacks_total", {"backend": "onnx-int8"})
+        assert after == before + 1
+
+    def test_fallback_keys_cache_and_bundle_by_the_loaded_backend(self, embedder, monkeypatch, tmp_path):
+        def parity_failure():
+            raise EmbeddingParityError("min cosine 0.91 < 0.99")
+
+        monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx-int8")
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(embedder_module, "load_onnx_model", parity_failure)
+        monkeypatch.setattr(embedder_module, "load_torch_model", _FakeModel)
+        monkeypatch.setattr(embedder, "_cache", None)
+        embedder._backend = None
+        assert embedder.model_id == embedding_model_id("onnx-int8")
+        embedder._get_cache()  # opened before the load, under the configured id
+
+        embedder.load_model()
+
+        assert embedder.model_id == embedding_model_id("torch") == settings.EMBEDDING_MODEL
+        assert embedder._get_cache().model_id == settings.EMBEDDING_MODEL
+        requested = []
+        monkeypatch.setattr(embedding_bundle, "load_bundle", lambda path: requested.append(path))
+        monkeypatch.setattr(embedding_bundle, "_bundle_checked", False)
+        embedder.embed_query("notice period?")
+        assert requested == [bundle_path(settings.EMBEDDING_MODEL, law_database_hash())]
+
+    def test_missing_onnx_packages_name_the_requirements_file(self, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx")
+        monkeypatch.setitem(sys.modules, "onnxruntime", None)
+        with pytest.raises(ImportError, match="requirements-onnx.txt"):
+            load_onnx_model()
+
+    def test_min_cosine(self):
+        a = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+        b = np.array([[2.0, 0.0], [1.0, 1.0]], dtype=np.float32)
+        assert min_cosine(a, b) == pytest.approx(np.sqrt(0.5))
+
+    def test_model_id_separates_backends(self, monkeypatch):
+        ids = set()
+        for backend in ("torch", "onnx", "onnx-int8"):
+            monkeypatch.setattr(settings, "EMBEDDING_BACKEND", backend)
+            ids.add(embedding_model_id())
+        assert len(ids) == 3
+        monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "torch")
+        assert embedding_model_id() == settings.EMBEDDING_MODEL
+
+
+class TestLengthBuckets:
+    def test_longest_first_within_token_budget(self):
+        lengths = [10, 200, 12, 190, 11]
+        buckets = length_buckets(lengths, max_tokens=400, max_batch=64)
+        assert buckets == [[1, 3], [2, 4, 0]]
+        for bucket in buckets:
+            assert len(bucket) * max(lengths[i] for i in bucket) <= 400
+
+    def test_batch_size_cap_and_oversized_text(self):
+        assert length_buckets([5, 5, 5], max_tokens=1000, max_batch=2) == [[0, 1], [2]]
+        assert length_buckets([900, 5], max_tokens=100, max_batch=8) == [[0], [1]]
+
+    def test_bucketed_encode_restores_input_order(self, embedder, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_BATCH_TOKENS", 64)
+        texts = ["short", "a much longer clause " * 8, "mid-sized clause text", "x"]
+        vectors = embedder.embed_texts(texts)
+
+        assert len(embedder._model.calls) > 1
+        assert [c[0] for c in embedder._model.calls][0] == f"passage: {texts[1]}"  # longest first
+        for text, vector in zip(texts, vectors):
+            assert np.allclose(vector, embedder._model.encode([f"passage: {text}"])[0])
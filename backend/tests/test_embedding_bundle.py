@@ -0,0 +1,107 @@
+"""Tests for the precomputed embedding bundle of fixed questions and template clauses."""
+
+import json
+import shutil
+
+import numpy as np
+import pytest
+
+from config import settings
+from app.services import embedding_bundle, law_database
+from app.services.embedder import EmbeddingService
+from app.services.embedding_bundle import bundle_path, ensure_bundle, get_bundle
+from app.services.law_database import (
+    blindspot_question,
+    fixed_questions,
+    law_database_hash,
+    load_law_database,
+    template_clauses,
+)
+from tests.test_embedder import _FakeModel
+
+
+@pytest.fixture
+def bundle_env(tmp_path, monkeypatch):
+    """Bundle dir + a copy of the law files in tmp; a stand-in model; fresh bundle state."""
+    laws = tmp_path / "laws"
+    shutil.copytree(law_database.LAWS_DIR, laws)
+    monkeypatch.setattr(law_database, "LAWS_DIR", laws)
+    monkeypatch.setattr(embedding_bundle, "load_law_database", lambda: load_law_database(laws))
+    monkeypatch.setattr(embedding_bundle, "law_database_hash", lambda: law_database_hash(laws))
+    monkeypatch.setattr(settings, "EMBEDDING_BUNDLE_DIR", str(tmp_path / "bundles"))
+    monkeypatch.setattr(embedding_bundle, "_bundle", None)
+    monkeypatch.setattr(embedding_bundle, "_bundle_checked", False)
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+
+    svc = EmbeddingService()
+    previous = svc._model
+    svc._model = _FakeModel()
+    yield svc, laws
+    svc._model = previous
+
+
+class TestBundle:
+    def test_build_then_memory_map(self, bundle_env):
+        svc, laws = bundle_env
+        bundle = ensure_bundle(svc)
+        path = bundle_path(settings.EMBEDDING_MODEL, law_database_hash(laws))
+        assert path.exists()
+        assert bundle.vectors.dtype == np.float32
+        assert isinstance(bundle.vectors, np.memmap)
+        assert len(bundle) >= len(fixed_questions(load_law_database(laws)))
+
+    def test_fixed_questions_skip_the_model(self, bundle_env):
+        svc, laws = bundle_env
+        ensure_bundle(svc)
+        svc._model.calls.clear()
+
+        clause = load_law_database(laws)["rental"][0]
+        vectors = svc.embed_queries([blindspot_question(clause), "an ad-hoc user question"])
+        assert len(vectors) == 2
+        assert svc._model.calls == [["query: an ad-hoc user question"]]
+        assert np.allclose(svc.embed_query(blindspot_question(clause)), vectors[0])
+        assert len(svc._model.calls) == 1
+
+    def test_template_clauses_skip_the_model(self, bundle_env):
+        svc, laws = bundle_env
+        ensure_bundle(svc)
+        svc._model.calls.clear()
+
+        template = template_clauses(load_law_database(laws))[0]
+        vectors = svc.embed_texts([template, "The Tenant shall pay rent monthly."])
+        assert svc._model.calls == [["passage: The Tenant shall pay rent monthly."]]
+        assert np.allclose(vectors[0], get_bundle().passage_vector(template))
+
+    @pytest.mark.asyncio
+    async def test_async_ingestion_uses_template_vectors(self, bundle_env):
+        svc, laws = bundle_env
+        ensure_bundle(svc)
+        svc._model.calls.clear()
+        svc.close()
+        try:
+            template = template_clauses(load_law_database(laws))[0]
+            vectors = await svc.aembed_texts([template])
+        finally:
+            svc.close()
+        assert svc._model.calls == []
+        assert np.allclose(vectors[0], get_bundle().passage_vector(template))
+
+    def test_law_change_rebuilds_and_drops_stale(self, bundle_env):
+        svc, laws = bundle_env
+        ensure_bundle(svc)
+        old = bundle_path(settings.EMBEDDING_MODEL, law_database_hash(laws))
+
+        rental = laws / "rental.json"
+        data = json.loads(rental.read_text(encoding="utf-8"))
+        data["standard_clauses"][0]["clause_name"] = "Renamed Clause"
+        rental.write_text(json.dumps(data), encoding="utf-8")
+
+        bundle = ensure_bundle(svc)
+        new = bundle_path(settings.EMBEDDING_MODEL, law_database_hash(laws))
+        assert new != old and new.exists() and not old.exists()
+        assert bundle.query_vector(blindspot_question(data["standard_clauses"][0])) is not None
+
+    def test_disabled(self, bundle_env, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_BUNDLE_ENABLED", False)
+        assert ensure_bundle(bundle_env[0]) is None
+        assert get_bundle() is None
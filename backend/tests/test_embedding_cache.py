@@ -0,0 +1,89 @@
+"""Tests for the content-hash embedding cache (memory + memory-mapped disk tiers)."""
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+from config import settings
+from app.services.embedder import EmbeddingService
+from app.services.embedding_cache import EmbeddingCache
+from tests.test_embedder import _FakeModel
+
+
+def _vectors(n: int, dim: int = 4, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).random((n, dim), dtype=np.float32)
+
+
+def _cache(path, memory_entries=100, disk_entries=100, model="e5") -> EmbeddingCache:
+    return EmbeddingCache(path, model, memory_entries=memory_entries, disk_entries=disk_entries)
+
+
+class TestEmbeddingCache:
+    def test_key_covers_model_prefix_and_normalized_text(self, tmp_path):
+        cache = _cache(tmp_path)
+        assert cache.key("passage: Rent  is\n due") == cache.key("passage: Rent is due")
+        assert cache.key("passage: rent") != cache.key("query: rent")
+        assert cache.key("passage: rent") != _cache(tmp_path / "other", model="other").key("passage: rent")
+        cache.close()
+
+    def test_disk_tier_survives_restart_and_stores_no_text(self, tmp_path):
+        cache = _cache(tmp_path, memory_entries=1)
+        keys = [cache.key(f"passage: clause {i}") for i in range(3)]
+        vectors = _vectors(3)
+        cache.put_many(keys, vectors)
+        cache.close()
+
+        reopened = _cache(tmp_path, memory_entries=1)
+        rows = reopened.get_many(keys)
+        assert np.allclose(np.stack(rows), vectors)
+        reopened.close()
+        for f in tmp_path.iterdir():
+            assert b"clause" not in f.read_bytes()
+
+    def test_lru_eviction_on_disk(self, tmp_path):
+        cache = _cache(tmp_path, memory_entries=1, disk_entries=2)
+        a, b, c = (cache.key(t) for t in ("a", "b", "c"))
+        cache.put_many([a, b], _vectors(2))
+        cache.get_many([a])  # a is now more recent than b
+        cache.put_many([c], _vectors(1, seed=1))
+        cache.close()
+
+        reopened = _cache(tmp_path, memory_entries=1, disk_entries=2)
+        found = [row is not None for row in reopened.get_many([a, b, c])]
+        assert found == [True, False, True]
+        reopened.close()
+
+    def test_second_process_falls_back_to_memory(self, tmp_path):
+        owner = _cache(tmp_path)
+        other = _cache(tmp_path)
+        other.put_many([other.key("x")], _vectors(1))
+        assert other.get_many([other.key("x")])[0] is not None
+        assert not (tmp_path / "meta.json").exists()
+        other.close()
+        owner.close()
+
+
+class TestEmbeddingServiceCache:
+    @pytest.fixture
+    def cached_embedder(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", True)
+        monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", str(tmp_path))
+        svc = EmbeddingService()
+        previous = svc._model
+        monkeypatch.setattr(svc, "_cache", None)
+        svc._model = _FakeModel()
+        yield svc
+        svc._cache.close()
+        svc._model = previous
+
+    def test_repeated_clauses_encoded_once(self, cached_embedder):
+        first = cached_embedder.embed_texts(["Rent is due.", "Deposit is refundable.", "Rent is due."])
+        assert cached_embedder._model.calls == [["passage: Rent is due.", "passage: Deposit is refundable."]]
+        assert np.allclose(first[0], first[2])
+
+        hits = REGISTRY.get_sample_value("legalsaathi_embedding_cache_lookups_total", {"result": "memory"}) or 0.0
+        again = cached_embedder.embed_texts(["Deposit is refundable.", "Rent is due."])
+        assert len(cached_embedder._model.calls) == 1
+        assert np.allclose(again, [first[1], first[0]])
+        after = REGISTRY.get_sample_value("legalsaathi_embedding_cache_lookups_total", {"result": "memory"})
+        assert after == hits + 2
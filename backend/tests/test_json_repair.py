@@ -0,0 +1,172 @@
+"""Tests for local JSON repair and the structured-output schemas."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services import ollama_client
+from app.services.llm_schemas import CHANGE_CLASSIFICATION, PUSHBACK_EMAIL, RED_FLAGS, SAFE_CLAUSES
+from app.services.ollama_client import LLMClient, close_http_pool
+from app.utils.json_repair import repair_json
+
+
+class TestRepairJson:
+    def test_valid_json_round_trips(self):
+        assert json.loads(repair_json('{"a": [1, 2]}')) == {"a": [1, 2]}
+
+    def test_trailing_commas(self):
+        assert json.loads(repair_json('{"a": [1, 2,], "b": 3,}')) == {"a": [1, 2], "b": 3}
+
+    def test_surrounding_prose_and_fences(self):
+        text = 'Sure! Here are the flags:\n```json\n[{"x": 1}]\n```\nLet me know if you need more.'
+        assert json.loads(repair_json(text)) == [{"x": 1}]
+
+    def test_single_quotes_and_python_literals(self):
+        text = "{'title': 'Tenant\\'s \"deposit\"', 'ok': True, 'extra': None}"
+        assert json.loads(repair_json(text)) == {"title": 'Tenant\'s "deposit"', "ok": True, "extra": None}
+
+    def test_unbalanced_closer(self):
+        assert json.loads(repair_json('{"a": [1, 2}')) == {"a": [1, 2]}
+
+    def test_truncated_array_drops_partial_element(self):
+        text = '[{"clause_title": "Rent"}, {"clause_title": "Lock-in"}, {"clause_title": "Depo'
+        assert json.loads(repair_json(text)) == [
+            {"clause_title": "Rent"},
+            {"clause_title": "Lock-in"},
+            {"clause_title": "Depo"},
+        ]
+
+    def test_truncated_after_key_rolls_back(self):
+        text = '{"red_flags": [{"severity": "critical"}, {"severity":'
+        assert json.loads(repair_json(text)) == {"red_flags": [{"severity": "critical"}]}
+
+    def test_raw_newline_in_string(self):
+        assert json.loads(repair_json('{"body": "Dear Sir,\nPlease revise."}')) == {
+            "body": "Dear Sir,\nPlease revise."
+        }
+
+    def test_unrecoverable_returns_none(self):
+        assert repair_json("I could not find any red flags.") is None
+
+    def test_bracketed_prose_before_document_is_skipped(self):
+        text = 'Based on clause [3], here are the flags: {"red_flags": [{"severity": "high"},]}'
+        assert json.loads(repair_json(text)) == {"red_flags": [{"severity": "high"}]}
+
+    def test_accept_filters_candidates(self):
+        text = 'See [1] and [2]: {"a": 1'
+        assert json.loads(repair_json(text, accept=lambda v: isinstance(v, dict))) == {"a": 1}
+        assert repair_json("See [1] and [2].", accept=lambda v: isinstance(v, dict)) is None
+
+
+class TestSchemas:
+    def test_red_flags_unwraps_and_defaults(self):
+        flags = RED_FLAGS.validate_python({"red_flags": [{"clause_title": "Lock-in"}, "junk"]})
+        assert len(flags) == 1
+        assert flags[0].clause_title == "Lock-in"
+        assert flags[0].severity == "medium"
+        assert flags[0].replacement_clause is None
+
+    def test_list_without_objects_is_rejected(self):
+        with pytest.raises(Exception):
+            RED_FLAGS.validate_python([3])
+        assert RED_FLAGS.validate_python([]) == []
+
+    def test_single_object_becomes_list(self):
+        assert len(SAFE_CLAUSES.validate_python({"clause_title": "Notice period"})) == 1
+        assert SAFE_CLAUSES.validate_python({"note": "none found"}) == []
+
+    def test_change_classification_defaults(self):
+        change = CHANGE_CLASSIFICATION.validate_json('{"severity": "high"}')
+        assert (change.clause_title, change.change_type, change.severity) == ("Unknown", "modified", "high")
+
+    def test_pushback_requires_body(self):
+        with pytest.raises(Exception):
+            PUSHBACK_EMAIL.validate_json('{"subject": "Re: draft"}')
+
+
+class TestGenerateRepairsJson:
+    @staticmethod
+    def _count(name, call_site):
+        return REGISTRY.get_sample_value(name, {"call_site": call_site}) or 0.0
+
+    @pytest.mark.asyncio
+    async def test_repairable_response_is_not_retried(self):
+        calls = []
+
+        def handler(req):
+            calls.append(req)
+            content = 'Here you go: [{"clause_title": "Rent", "severity": "critical"},]'
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+        before = self._count("legalsaathi_llm_json_retries_avoided_total", "t_repair")
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            text = await LLMClient().generate(
+                "q", temperature=0.9, json_mode=True, call_site="t_repair", schema=RED_FLAGS
+            )
+        finally:
+            await close_http_pool()
+
+        assert len(calls) == 1
+        assert RED_FLAGS.validate_json(text)[0].severity == "critical"
+        assert self._count("legalsaathi_llm_json_retries_avoided_total", "t_repair") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_bracketed_prose_keeps_real_flags(self):
+        content = 'Based on clause [3], here are the flags: {"red_flags": [{"clause_title": "Lock-in"},]}'
+
+        def handler(req):
+            return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            text = await LLMClient().generate(
+                "q", temperature=0.9, json_mode=True, call_site="t_prose", schema=RED_FLAGS
+            )
+        finally:
+            await close_http_pool()
+
+        assert [f.clause_title for f in RED_FLAGS.validate_json(text)] == ["Lock-in"]
+
+    @pytest.mark.asyncio
+    async def test_bracketed_prose_alone_retries(self, monkeypatch):
+        monkeypatch.setattr(ollama_client, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+        replies = iter(["Clause [3] looks fine.", '[{"clause_title": "Rent"}]'])
+
+        def handler(req):
+            return httpx.Response(200, json={"choices": [{"message": {"content": next(replies)}}]})
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            text = await LLMClient().generate(
+                "q", temperature=0.9, json_mode=True, call_site="t_prose_retry", schema=RED_FLAGS
+            )
+        finally:
+            await close_http_pool()
+
+        assert RED_FLAGS.validate_json(text)[0].clause_title == "Rent"
+
+    @pytest.mark.asyncio
+    async def test_schema_mismatch_retries(self, monkeypatch):
+        monkeypatch.setattr(ollama_client, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+        replies = iter(['{"subject": "no body"}', '{"subject": "s", "body": "b"}'])
+
+        def handler(req):
+            return httpx.Response(200, json={"choices": [{"message": {"content": next(replies)}}]})
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            text = await LLMClient().generate(
+                "q", temperature=0.9, json_mode=True, call_site="t_schema", schema=PUSHBACK_EMAIL
+            )
+        finally:
+            await close_http_pool()
+
+        assert PUSHBACK_EMAIL.validate_json(text).body == "b"
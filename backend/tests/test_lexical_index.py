@@ -0,0 +1,70 @@
+"""Tests for the per-session BM25 index and reciprocal rank fusion."""
+
+import time
+
+from app.services.lexical_index import BM25Index, LexicalIndexStore, reciprocal_rank_fusion, tokenize
+
+
+CHUNKS = {
+    "c1": "The tenant shall pay a caution deposit of INR 1,50,000 refundable at the end of tenancy.",
+    "c2": "LOCK-IN PERIOD: The tenant cannot vacate the premises for the first 11 months.",
+    "c3": "The monthly rent shall be INR 25,000 payable on the 1st of every month.",
+    "c4": "Notice under Section 12.3 must be given in writing by either party.",
+}
+
+
+def _index() -> BM25Index:
+    return BM25Index(list(CHUNKS), list(CHUNKS.values()))
+
+
+class TestTokenize:
+    def test_joined_forms_kept_and_split(self):
+        tokens = tokenize("Lock-in under Section 12.3")
+        assert {"lock-in", "lock", "in", "12.3", "12", "3"} <= set(tokens)
+
+
+class TestBM25Index:
+    def test_exact_legal_terms_rank_first(self):
+        index = _index()
+        assert index.search("caution deposit", 2)[0][0] == "c1"
+        assert index.search("lock-in period", 2)[0][0] == "c2"
+        assert index.search("section 12.3", 2)[0][0] == "c4"
+
+    def test_no_shared_terms_no_hits(self):
+        assert _index().search("arbitration seat", 5) == []
+
+    def test_k_limits_results(self):
+        assert len(_index().search("the tenant rent", 1)) == 1
+
+    def test_document_lookup(self):
+        text, meta = BM25Index(["a"], ["hello"], [{"page": 2}]).document("a")
+        assert (text, meta) == ("hello", {"page": 2})
+
+
+class TestReciprocalRankFusion:
+    def test_agreement_beats_single_list(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+        assert fused[0] == "b"
+        assert set(fused) == {"a", "b", "c", "d"}
+
+    def test_lexical_only_hit_is_included(self):
+        assert "x" in reciprocal_rank_fusion([["a", "b"], ["x"]])
+
+
+class TestLexicalIndexStore:
+    def test_lru_bound(self):
+        store = LexicalIndexStore(max_sessions=2, ttl_seconds=60)
+        for sid in ("s1", "s2", "s3"):
+            store.put(sid, _index())
+        assert store.get("s1") is None
+        assert store.get("s3") is not None
+
+    def test_ttl_expiry_and_drop(self):
+        store = LexicalIndexStore(max_sessions=4, ttl_seconds=60)
+        index = _index()
+        store.put("s1", index)
+        index.created_at = time.monotonic() - 61
+        assert store.get("s1") is None
+        store.put("s2", _index())
+        store.drop("s2")
+        assert store.get("s2") is None
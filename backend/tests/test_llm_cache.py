@@ -0,0 +1,123 @@
+"""Tests for the LLM response cache."""
+
+import pytest
+
+from app.security.auto_wipe import AutoWipeService
+from app.security.encryption import EncryptionService
+from app.security.session_manager import Session
+from app.services.llm_cache import LLMResponseCache, get_response_cache, request_fingerprint
+from app.utils.helpers import utcnow
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+class TestFingerprint:
+    def test_stable(self):
+        a = request_fingerprint("m", "sys", "prompt", 0.1, True, 100)
+        b = request_fingerprint("m", "sys", "prompt", 0.1, True, 100)
+        assert a == b
+
+    def test_every_field_matters(self):
+        base = request_fingerprint("m", "sys", "prompt", 0.1, True, 100)
+        assert base != request_fingerprint("m2", "sys", "prompt", 0.1, True, 100)
+        assert base != request_fingerprint("m", "sys2", "prompt", 0.1, True, 100)
+        assert base != request_fingerprint("m", "sys", "prompt2", 0.1, True, 100)
+        assert base != request_fingerprint("m", "sys", "prompt", 0.2, True, 100)
+        assert base != request_fingerprint("m", "sys", "prompt", 0.1, False, 100)
+        assert base != request_fingerprint("m", "sys", "prompt", 0.1, True, 200)
+
+
+class TestLLMResponseCache:
+    @pytest.mark.asyncio
+    async def test_memory_roundtrip(self):
+        cache = LLMResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+        assert await cache.get("k") is None
+        await cache.set("k", "answer")
+        assert await cache.get("k") == "answer"
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_by_entries(self):
+        cache = LLMResponseCache(max_entries=2, max_bytes=1024, ttl_seconds=60)
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        await cache.get("a")
+        await cache.set("c", "3")
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "1"
+        assert await cache.get("c") == "3"
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_by_bytes(self):
+        cache = LLMResponseCache(max_entries=100, max_bytes=10, ttl_seconds=60)
+        await cache.set("a", "12345")
+        await cache.set("b", "12345678")
+        assert await cache.get("a") is None
+        assert cache.stats()["bytes"] == 8
+
+    @pytest.mark.asyncio
+    async def test_redis_entries_are_encrypted(self):
+        redis = FakeRedis()
+        key = EncryptionService.generate_key()
+        cache = LLMResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+        cache.set_redis(redis)
+
+        await cache.set("k", "secret clause answer", session_key=key)
+        assert len(redis.store) == 1
+        assert "secret" not in next(iter(redis.store.values()))
+
+        cache.clear()
+        assert await cache.get("k", session_key=EncryptionService.generate_key()) is None
+        assert await cache.get("k", session_key=key) == "secret clause answer"
+
+    @pytest.mark.asyncio
+    async def test_no_session_key_stays_in_process(self):
+        redis = FakeRedis()
+        cache = LLMResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+        cache.set_redis(redis)
+        await cache.set("k", "value")
+        assert redis.store == {}
+
+    @pytest.mark.asyncio
+    async def test_memory_entries_are_scoped_by_session(self):
+        cache = LLMResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60)
+        a, b = EncryptionService.generate_key(), EncryptionService.generate_key()
+        await cache.set("k", "answer a", session_key=a)
+        await cache.set("k", "answer b", session_key=b)
+        assert cache.evict_session(a) == 1
+        assert await cache.get("k", session_key=a) is None
+        assert await cache.get("k", session_key=b) == "answer b"
+
+
+class FakeSessionManager:
+    def __init__(self, session):
+        self.session = session
+
+    async def get_session(self, session_id):
+        return self.session if self.session and self.session.id == session_id else None
+
+    async def invalidate_session(self, session_id):
+        self.session = None
+        return {"redis_keys_deleted": 1}
+
+
+class TestSessionWipe:
+    @pytest.mark.asyncio
+    async def test_wiped_session_response_is_unreadable(self):
+        key = EncryptionService.generate_key()
+        session = Session("wipe-llm-cache", utcnow(), utcnow(), key)
+        cache = get_response_cache()
+        await cache.set("wipe-k", "clause answer", session_key=key)
+        assert await cache.get("wipe-k", session_key=key) == "clause answer"
+
+        await AutoWipeService(FakeSessionManager(session)).wipe_session_data(session.id)
+
+        assert await cache.get("wipe-k", session_key=key) is None
@@ -0,0 +1,79 @@
+"""Tests for LLM cassette record/replay."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services import ollama_client
+from app.services.llm_cassette import MODE_RECORD, MODE_REPLAY, Cassette, CassetteTransport, prompt_hash
+from app.services.ollama_client import LLMClient, close_http_pool
+from app.utils.exceptions import OllamaError
+
+
+async def _generate(transport: httpx.AsyncBaseTransport, prompt: str, **kwargs) -> str:
+    ollama_client._http_client = httpx.AsyncClient(transport=transport)
+    ollama_client._http_client_loop = asyncio.get_running_loop()
+    try:
+        return await LLMClient().generate(prompt, temperature=0.9, call_site="t_cassette", **kwargs)
+    finally:
+        await close_http_pool()
+
+
+class TestPromptHash:
+    def test_ignores_model_and_sampling(self):
+        base = {"model": "a", "messages": [{"role": "user", "content": "q"}], "temperature": 0.1}
+        assert prompt_hash(base) == prompt_hash(dict(base, model="b", temperature=0.9, max_tokens=5))
+
+    def test_distinguishes_prompt_and_json_mode(self):
+        base = {"messages": [{"role": "user", "content": "q"}]}
+        assert prompt_hash(base) != prompt_hash({"messages": [{"role": "user", "content": "r"}]})
+        assert prompt_hash(base) != prompt_hash(dict(base, response_format={"type": "json_object"}))
+
+
+class TestRecordReplay:
+    @pytest.mark.asyncio
+    async def test_replay_serves_recording_without_network(self, tmp_path, completion):
+        path = str(tmp_path / "cassette.jsonl")
+        answer = completion("recorded answer", usage={"prompt_tokens": 3, "completion_tokens": 1})
+        live = httpx.MockTransport(lambda req: httpx.Response(200, json=answer))
+        recorder = CassetteTransport(Cassette(path), MODE_RECORD, inner=live)
+        assert await _generate(recorder, "what is the notice period?") == "recorded answer"
+
+        replayer = CassetteTransport(Cassette(path), MODE_REPLAY, latency=0.0)
+        assert await _generate(replayer, "what is the notice period?") == "recorded answer"
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_recorded(self, tmp_path):
+        path = str(tmp_path / "cassette.jsonl")
+        live = httpx.MockTransport(lambda req: httpx.Response(400, json={"error": {}}))
+        with pytest.raises(OllamaError):
+            await _generate(CassetteTransport(Cassette(path), MODE_RECORD, inner=live), "q")
+        assert len(Cassette(path)) == 0
+
+    @pytest.mark.asyncio
+    async def test_replay_uses_synthetic_latency(self, tmp_path):
+        cassette = Cassette(str(tmp_path / "cassette.jsonl"))
+        body = {"messages": [{"role": "user", "content": "q"}]}
+        cassette.append({
+            "key": prompt_hash(body),
+            "status": 200,
+            "content_type": "application/json",
+            "body": '{"choices": [{"message": {"content": "ok"}}]}',
+            "latency": 30.0,
+        })
+        transport = CassetteTransport(cassette, MODE_REPLAY, latency=0.05)
+        start = time.perf_counter()
+        resp = await transport.handle_async_request(
+            httpx.Request("POST", "http://x/v1/chat/completions", json=body)
+        )
+        assert resp.status_code == 200
+        assert 0.05 <= time.perf_counter() - start < 5
+
+    @pytest.mark.asyncio
+    async def test_replay_miss_fails_loudly(self, tmp_path):
+        replayer = CassetteTransport(Cassette(str(tmp_path / "empty.jsonl")), MODE_REPLAY, latency=0.0)
+        with pytest.raises(OllamaError) as exc:
+            await _generate(replayer, "never recorded")
+        assert exc.value.status_code == 404
@@ -0,0 +1,202 @@
+"""Tests for the OpenRouter LLM client."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from config import settings
+from app.services import llm_cache, ollama_client
+from app.services.llm_cache import LLMResponseCache
+from app.services.ollama_client import (
+    LLMClient,
+    ThinkingStripper,
+    close_http_pool,
+    get_http_client,
+    open_http_pool,
+    pool_stats,
+)
+from app.utils.exceptions import OllamaError
+
+
+class TestSharedPool:
+    @pytest.mark.asyncio
+    async def test_clients_share_one_pool(self):
+        await open_http_pool()
+        try:
+            assert LLMClient().client is LLMClient().client
+            assert LLMClient().client is get_http_client()
+        finally:
+            await close_http_pool()
+
+    @pytest.mark.asyncio
+    async def test_close_resets_pool(self):
+        client = await open_http_pool()
+        await close_http_pool()
+        assert client.is_closed
+        assert ollama_client._http_client is None
+        assert get_http_client() is not client
+        await close_http_pool()
+
+    @pytest.mark.asyncio
+    async def test_instance_close_keeps_pool_open(self):
+        client = await open_http_pool()
+        await LLMClient().close()
+        assert not client.is_closed
+        await close_http_pool()
+
+    def test_loop_change_closes_stale_client(self):
+        stale = asyncio.run(open_http_pool())
+
+        async def on_new_loop():
+            client = get_http_client()
+            await asyncio.sleep(0)  # let the stale close run
+            return client
+
+        fresh = asyncio.run(on_new_loop())
+        try:
+            assert fresh is not stale
+            assert stale.is_closed
+        finally:
+            asyncio.run(close_http_pool())
+
+    def test_pool_stats_without_pool(self):
+        stats = pool_stats()
+        assert stats["open_connections"] == 0
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_for_a_pool_slot_is_timed(self, monkeypatch, metric):
+        monkeypatch.setattr(settings, "LLM_MAX_CONNECTIONS", 1)
+        ollama_client._reset_pool_gate()
+        waits = metric("legalsaathi_llm_pool_wait_seconds_count")
+        first, second = ollama_client._PoolSlot(), ollama_client._PoolSlot()
+        await first.__aenter__()
+        waiting = asyncio.create_task(second.__aenter__())
+        await asyncio.sleep(0.05)
+        assert pool_stats()["waiting"] == 1
+        await first.__aexit__(None, None, None)
+        await waiting
+        assert pool_stats()["waiting"] == 0
+        assert pool_stats()["in_flight"] == 1
+        await second.__aexit__(None, None, None)
+        assert metric("legalsaathi_llm_pool_wait_seconds_count") == waits + 2
+        assert metric("legalsaathi_llm_pool_wait_seconds_sum") >= 0.05
+        ollama_client._reset_pool_gate()
+
+    @pytest.mark.asyncio
+    async def test_pool_slot_wait_times_out(self, monkeypatch, metric):
+        monkeypatch.setattr(settings, "LLM_MAX_CONNECTIONS", 1)
+        monkeypatch.setattr(settings, "LLM_POOL_TIMEOUT", 0.01)
+        ollama_client._reset_pool_gate()
+        timeouts = metric("legalsaathi_llm_pool_timeouts_total")
+        async with ollama_client._PoolSlot():
+            with pytest.raises(httpx.PoolTimeout):
+                async with ollama_client._PoolSlot():
+                    pass
+        assert metric("legalsaathi_llm_pool_timeouts_total") == timeouts + 1
+        assert pool_stats()["in_flight"] == 0
+        ollama_client._reset_pool_gate()
+
+
+class TestThinkingStripper:
+    def _run(self, chunks):
+        stripper = ThinkingStripper()
+        out = "".join(stripper.feed(c) for c in chunks)
+        return out + stripper.flush()
+
+    def test_matches_batch_strip(self):
+        text = "<think>reasoning here</think>\n\nThe deposit is INR 50,000."
+        assert self._run([text]) == LLMClient._strip_thinking(text)
+
+    def test_tags_split_across_chunks(self):
+        chunks = ["<thi", "nk>secret ", "plan</th", "ink>", "Answer", ": yes"]
+        assert self._run(chunks) == "Answer: yes"
+
+    def test_single_character_chunks(self):
+        text = "Before <think>hidden</think> after"
+        assert self._run(list(text)) == "Before  after"
+
+    def test_text_that_looks_like_tag_prefix(self):
+        assert self._run(["a < b", " and <t", "able>"]) == "a < b and <table>"
+
+    def test_unterminated_think_is_dropped(self):
+        assert self._run(["ok <think>never closed"]) == "ok "
+
+
+def _install_mock_transport(handler):
+    """Point the shared pool at an in-process mock transport."""
+    ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    ollama_client._http_client_loop = asyncio.get_running_loop()
+
+
+class TestGenerate:
+    @pytest.mark.asyncio
+    async def test_strips_thinking_and_returns_content(self, completion):
+        _install_mock_transport(lambda req: httpx.Response(200, json=completion("<think>x</think>YES")))
+        try:
+            assert await LLMClient().generate("q", temperature=0.9) == "YES"
+        finally:
+            await close_http_pool()
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self, monkeypatch, completion):
+        monkeypatch.setattr(ollama_client, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+        calls = []
+
+        def handler(req):
+            calls.append(req)
+            if len(calls) == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, json=completion("ok"))
+
+        _install_mock_transport(handler)
+        try:
+            assert await LLMClient().generate("q", temperature=0.9, call_site="test_retry") == "ok"
+            assert len(calls) == 2
+        finally:
+            await close_http_pool()
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        calls = []
+
+        def handler(req):
+            calls.append(req)
+            return httpx.Response(400)
+
+        _install_mock_transport(handler)
+        try:
+            with pytest.raises(OllamaError):
+                await LLMClient().generate("q", temperature=0.9)
+            assert len(calls) == 1
+        finally:
+            await close_http_pool()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_sessions_do_not_share_a_flight(self, monkeypatch, completion):
+        monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+        cache = LLMResponseCache(max_entries=10, max_bytes=4096, ttl_seconds=60)
+        monkeypatch.setattr(llm_cache, "_cache", cache)
+        calls = []
+
+        async def handler(req):
+            calls.append(req)
+            answer = f"answer {len(calls)}"
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json=completion(answer))
+
+        _install_mock_transport(handler)
+        try:
+            a, b = await asyncio.gather(
+                LLMClient().generate("same prompt", temperature=0.0, session_key="key-a"),
+                LLMClient().generate("same prompt", temperature=0.0, session_key="key-b"),
+            )
+        finally:
+            await close_http_pool()
+        assert len(calls) == 2
+        assert a != b
+        assert len(cache._lru) == 2
+        fingerprint = next(iter(cache._lru)).split(":", 1)[1]
+        assert await cache.get(fingerprint, "key-a") == a
+        assert await cache.get(fingerprint, "key-b") == b
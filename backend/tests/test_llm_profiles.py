@@ -0,0 +1,51 @@
+"""Tests for per-call-site generation profiles."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from config import settings
+from app.services import ollama_client
+from app.services.llm_profiles import get_profile, profile_for
+from app.services.ollama_client import LLMClient, close_http_pool
+
+
+class TestProfiles:
+    def test_call_sites_map_to_profiles(self):
+        assert profile_for("red_flags").name == "deep"
+        assert profile_for("blindspot").name == "yes_no"
+        assert profile_for("unmapped_site").name == settings.LLM_DEFAULT_PROFILE
+
+    def test_empty_model_means_default_model(self):
+        assert get_profile("deep").model == settings.OPENROUTER_MODEL
+
+    def test_unknown_profile_falls_back(self):
+        assert get_profile("no_such_profile").name == settings.LLM_DEFAULT_PROFILE
+
+
+class TestGenerateUsesProfile:
+    @pytest.mark.asyncio
+    async def test_payload_follows_call_site_profile(self):
+        sent = []
+
+        def handler(req):
+            sent.append(json.loads(req.content))
+            return httpx.Response(200, json={"choices": [{"message": {"content": "YES"}}]})
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            await LLMClient().generate("q", temperature=0.9, call_site="blindspot")
+            await LLMClient().generate("q", temperature=0.9, max_tokens=50, call_site="red_flags")
+        finally:
+            await close_http_pool()
+
+        yes_no, deep = get_profile("yes_no"), get_profile("deep")
+        assert sent[0]["model"] == yes_no.model
+        assert sent[0]["max_tokens"] == yes_no.max_tokens
+        assert sent[0]["reasoning"] == {"enabled": False}
+        assert sent[1]["model"] == deep.model
+        assert sent[1]["max_tokens"] == 50  # explicit argument beats the profile
+        assert "reasoning" not in sent[1]
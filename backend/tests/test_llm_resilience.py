@@ -0,0 +1,115 @@
+"""Tests for LLM circuit breaker, adaptive timeouts and retry budget."""
+
+from datetime import timedelta
+
+import pytest
+
+from config import settings
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+    RetryBudget,
+    backoff_delay,
+    parse_retry_after,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+)
+from app.utils.helpers import utcnow
+
+
+class TestCircuitBreaker:
+    @pytest.fixture(autouse=True)
+    def _breaker(self, clock):
+        self.clock = clock
+        self.breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=10, probe_interval=2, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        for _ in range(3):
+            assert self.breaker.allow()
+            self.breaker.record_failure()
+        assert self.breaker.state == STATE_OPEN
+        assert not self.breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        assert self.breaker.state == STATE_CLOSED
+
+    def test_half_open_single_probe_then_close(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 10
+        assert self.breaker.state == STATE_HALF_OPEN
+        assert self.breaker.allow()
+        assert not self.breaker.allow()  # only one probe per interval
+        self.breaker.record_success()
+        assert self.breaker.state == STATE_CLOSED
+
+    def test_failed_probe_reopens(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 10
+        assert self.breaker.allow()
+        self.breaker.record_failure()
+        assert self.breaker.state == STATE_OPEN
+
+
+class TestLatencyTracker:
+    def test_default_until_warm(self):
+        tracker = LatencyTracker()
+        tracker.observe("blindspot", 1.0)
+        assert tracker.timeout_for("blindspot") == settings.LLM_TIMEOUT
+
+    def test_adapts_to_percentile(self):
+        tracker = LatencyTracker()
+        for _ in range(settings.LLM_TIMEOUT_MIN_SAMPLES):
+            tracker.observe("blindspot", 8.0)
+        expected = min(max(8.0 * settings.LLM_TIMEOUT_MULTIPLIER, settings.LLM_TIMEOUT_MIN), settings.LLM_TIMEOUT)
+        assert tracker.timeout_for("blindspot") == pytest.approx(expected)
+        assert tracker.timeout_for("red_flags") == settings.LLM_TIMEOUT
+
+    def test_clamped_to_minimum(self):
+        tracker = LatencyTracker()
+        for _ in range(settings.LLM_TIMEOUT_MIN_SAMPLES):
+            tracker.observe("fast", 0.1)
+        assert tracker.timeout_for("fast") == settings.LLM_TIMEOUT_MIN
+
+    def test_ceiling_caps_cold_and_warm_timeouts(self):
+        tracker = LatencyTracker()
+        assert tracker.timeout_for("classify", ceiling=30) == 30
+        for _ in range(settings.LLM_TIMEOUT_MIN_SAMPLES):
+            tracker.observe("classify", 60.0)
+        assert tracker.timeout_for("classify", ceiling=30) == 30
+
+
+class TestRetryBudget:
+    def test_budget_limits_retries(self):
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        assert budget.try_spend()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+        budget.record_request()
+        budget.record_request()
+        assert budget.try_spend()
+
+
+class TestBackoff:
+    def test_parse_retry_after_seconds(self):
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("garbage") is None
+
+    def test_parse_retry_after_http_date(self):
+        when = (utcnow() + timedelta(seconds=30)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+        assert 25 <= parse_retry_after(when) <= 30
+
+    def test_retry_after_is_honoured(self):
+        delay = backoff_delay(0, retry_after=5)
+        assert 5 <= delay <= 5 + settings.LLM_BACKOFF_BASE_SECONDS
+
+    def test_jitter_bounded(self):
+        for attempt in range(10):
+            assert 0 <= backoff_delay(attempt) <= settings.LLM_BACKOFF_MAX_SECONDS
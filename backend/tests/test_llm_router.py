@@ -0,0 +1,141 @@
+"""Tests for multi-backend routing and hedged LLM requests."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from config import settings
+from app.services import llm_router, ollama_client
+from app.services.llm_router import Backend, BackendRouter
+from app.services.ollama_client import LLMClient, close_http_pool
+from app.utils.exceptions import OllamaError
+
+
+class TestBackendRouter:
+    def test_configured_order_is_preferred(self):
+        router = BackendRouter([Backend("a", "http://a"), Backend("b", "http://b")])
+        assert [b.name for b in router.ranked()] == ["a", "b"]
+
+    def test_unhealthy_backend_moves_back(self):
+        a, b = Backend("a", "http://a"), Backend("b", "http://b")
+        for _ in range(4):
+            a.record_failure()
+        assert a.health < settings.LLM_BACKEND_MIN_HEALTH
+        assert [x.name for x in BackendRouter([a, b]).ranked()] == ["b", "a"]
+
+    def test_demoted_backend_ranked_first_again_after_recovering(self, clock):
+        a, b = Backend("a", "http://a", clock=clock), Backend("b", "http://b", clock=clock)
+        for _ in range(4):
+            a.record_failure()
+        router = BackendRouter([a, b])
+        assert [x.name for x in router.ranked()] == ["b", "a"]
+
+        clock.now += settings.LLM_BACKEND_HEALTH_HALF_LIFE_SECONDS  # no failures meanwhile
+        assert a.health >= settings.LLM_BACKEND_MIN_HEALTH
+        assert [x.name for x in router.ranked()] == ["a", "b"]
+
+    def test_open_breaker_is_skipped(self):
+        a, b = Backend("a", "http://a"), Backend("b", "http://b")
+        for _ in range(settings.LLM_BREAKER_FAILURE_THRESHOLD):
+            a.breaker.record_failure()
+        assert [x.name for x in BackendRouter([a, b]).ranked()] == ["b"]
+
+    def test_avoid_demotes_last_failed(self):
+        a, b = Backend("a", "http://a"), Backend("b", "http://b")
+        assert [x.name for x in BackendRouter([a, b]).ranked(avoid=a)] == ["b", "a"]
+
+    def test_model_mapping_and_auth(self):
+        backend = Backend("x", "http://x/", api_key="k", models={"qwen/qwen3-235b-a22b": "Qwen3-235B"})
+        assert backend.base_url == "http://x"
+        assert backend.model_for("qwen/qwen3-235b-a22b") == "Qwen3-235B"
+        assert backend.model_for("other") == "other"
+        assert backend.headers() == {"Authorization": "Bearer k"}
+        assert Backend("stub", "http://stub").headers() == {}
+
+
+class TestHedging:
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self, monkeypatch, completion):
+        primary, secondary = Backend("slow", "http://slow"), Backend("fast", "http://fast")
+        for _ in range(settings.LLM_TIMEOUT_MIN_SAMPLES):
+            primary.latency.observe("t_hedge", 0.02)
+        monkeypatch.setattr(llm_router, "_router", BackendRouter([primary, secondary]))
+        primary_cancelled = asyncio.Event()
+
+        async def handler(req):
+            if req.url.host == "slow":
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    primary_cancelled.set()
+                    raise
+                return httpx.Response(200, json=completion("slow"))
+            return httpx.Response(200, json=completion("fast"))
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            assert await LLMClient().generate("q", temperature=0.9, call_site="t_hedge") == "fast"
+            await asyncio.wait_for(primary_cancelled.wait(), 1)
+        finally:
+            await close_http_pool()
+
+    @pytest.mark.asyncio
+    async def test_retry_falls_back_to_next_backend(self, monkeypatch, completion):
+        monkeypatch.setattr(ollama_client, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+        monkeypatch.setattr(
+            llm_router, "_router", BackendRouter([Backend("down", "http://down"), Backend("up", "http://up")])
+        )
+        hosts = []
+
+        def handler(req):
+            hosts.append(req.url.host)
+            if req.url.host == "down":
+                return httpx.Response(503)
+            return httpx.Response(200, json=completion("ok"))
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            assert await LLMClient().generate("q", temperature=0.9, call_site="t_fallback") == "ok"
+        finally:
+            await close_http_pool()
+        assert hosts == ["down", "up"]
+
+    @pytest.mark.asyncio
+    async def test_dropped_connection_is_retried_and_counted(self, monkeypatch, completion):
+        monkeypatch.setattr(ollama_client, "backoff_delay", lambda attempt, retry_after=None: 0.0)
+        down, up = Backend("down", "http://down"), Backend("up", "http://up")
+        monkeypatch.setattr(llm_router, "_router", BackendRouter([down, up]))
+
+        def handler(req):
+            if req.url.host == "down":
+                raise httpx.RemoteProtocolError("Server disconnected without sending a response.", request=req)
+            return httpx.Response(200, json=completion("ok"))
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            assert await LLMClient().generate("q", temperature=0.9, call_site="t_dropped") == "ok"
+        finally:
+            await close_http_pool()
+        assert down.health < 1.0
+
+    @pytest.mark.asyncio
+    async def test_stream_read_error_is_wrapped_and_counted(self, monkeypatch):
+        backend = Backend("flaky", "http://flaky")
+        monkeypatch.setattr(llm_router, "_router", BackendRouter([backend]))
+
+        def handler(req):
+            raise httpx.ReadError("connection reset by peer", request=req)
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        try:
+            with pytest.raises(OllamaError):
+                async for _ in LLMClient().generate_streaming("q"):
+                    pass
+        finally:
+            await close_http_pool()
+        assert backend.health < 1.0
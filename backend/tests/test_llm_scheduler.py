@@ -0,0 +1,168 @@
+"""Tests for the priority-aware LLM scheduler."""
+
+import asyncio
+
+import pytest
+
+from app.services.llm_scheduler import (
+    LLMScheduler,
+    TokenBucket,
+    priority_scope,
+    current_priority,
+    PRIORITY_ANALYSIS,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+)
+
+
+class TestTokenBucket:
+    def test_burst_then_paced(self, clock):
+        bucket = TokenBucket(rate_per_minute=60, burst=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(1.0)
+
+    def test_refills_over_time(self, clock):
+        bucket = TokenBucket(rate_per_minute=60, burst=1, clock=clock)
+        bucket.reserve()
+        clock.now += 1.0
+        assert bucket.reserve() == 0
+
+    def test_pause_blocks_even_when_disabled(self, clock):
+        bucket = TokenBucket(rate_per_minute=0, burst=1, clock=clock)
+        bucket.pause(3)
+        assert bucket.reserve() == pytest.approx(3.0)
+
+
+class TestLLMScheduler:
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        sched = LLMScheduler(max_concurrency=2, rate_per_minute=0)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            async with sched.slot(PRIORITY_ANALYSIS):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job() for _ in range(6)))
+        assert peak == 2
+        assert sched.stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_served_before_queued_analysis(self):
+        sched = LLMScheduler(max_concurrency=1, rate_per_minute=0)
+        order = []
+        gate = asyncio.Event()
+
+        async def job(name, priority):
+            async with sched.slot(priority):
+                order.append(name)
+                await gate.wait()
+
+        first = asyncio.create_task(job("first", PRIORITY_ANALYSIS))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(job("background", PRIORITY_BACKGROUND)),
+            asyncio.create_task(job("analysis", PRIORITY_ANALYSIS)),
+            asyncio.create_task(job("chat", PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *waiters)
+        assert order == ["first", "chat", "analysis", "background"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        sched = LLMScheduler(max_concurrency=1, rate_per_minute=0)
+        gate = asyncio.Event()
+
+        async def holder():
+            async with sched.slot():
+                await gate.wait()
+
+        async def waiter():
+            async with sched.slot():
+                pass
+
+        h = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        w = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        w.cancel()
+        gate.set()
+        await h
+        with pytest.raises(asyncio.CancelledError):
+            await w
+        assert sched.stats()["active"] == 0
+        assert sched.stats()["queued"][PRIORITY_ANALYSIS] == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_free_while_waiting_for_a_token(self):
+        sched = LLMScheduler(max_concurrency=1, rate_per_minute=0)
+        sched.throttle(0.05)  # e.g. after a 429
+        entered = asyncio.Event()
+
+        async def job():
+            async with sched.slot():
+                entered.set()
+
+        task = asyncio.create_task(job())
+        await asyncio.sleep(0.01)
+        assert not entered.is_set()
+        assert sched.stats()["active"] == 0
+        await task
+        assert entered.is_set() and sched.stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_token_not_queued_behind_paced_backlog(self):
+        sched = LLMScheduler(max_concurrency=8, rate_per_minute=1200, burst=10)  # one token per 50 ms
+
+        async def job(priority):
+            async with sched.slot(priority):
+                await asyncio.sleep(0.01)
+
+        backlog = [asyncio.create_task(job(PRIORITY_BACKGROUND)) for _ in range(30)]
+        await asyncio.sleep(0.1)  # burst spent, the rest being paced
+        start = asyncio.get_running_loop().time()
+        await job(PRIORITY_INTERACTIVE)
+        waited = asyncio.get_running_loop().time() - start
+
+        assert waited < 0.15  # next token, not the ~1 s the background backlog still needs
+        assert sum(t.done() for t in backlog) < 20
+        for task in backlog:
+            task.cancel()
+        await asyncio.gather(*backlog, return_exceptions=True)
+        assert sched.stats()["active"] == 0
+        assert sched.stats()["pacing"][PRIORITY_BACKGROUND] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_while_paced_refunds_token(self):
+        sched = LLMScheduler(max_concurrency=1, rate_per_minute=60, burst=1)
+
+        async def job():
+            async with sched.slot():
+                pass
+
+        await job()  # spends the only token
+        task = asyncio.create_task(job())
+        await asyncio.sleep(0.01)
+        assert sched.stats()["active"] == 0
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert sched.stats()["active"] == 0
+        assert sched.bucket._tokens == pytest.approx(0.0, abs=0.05)
+
+    def test_priority_scope(self):
+        assert current_priority() == PRIORITY_ANALYSIS
+        with priority_scope(PRIORITY_INTERACTIVE):
+            assert current_priority() == PRIORITY_INTERACTIVE
+        assert current_priority() == PRIORITY_ANALYSIS
+        with pytest.raises(ValueError):
+            with priority_scope("urgent"):
+                pass
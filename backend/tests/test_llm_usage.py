@@ -0,0 +1,82 @@
+"""Tests for LLM token accounting and prompt compaction."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from config import settings
+from app.services import ollama_client
+from app.services.indian_acts_lookup import get_acts_context_for_prompt
+from app.services.llm_usage import (
+    contract_type_scope,
+    current_contract_type,
+    estimate_prompt_tokens,
+    record_usage,
+)
+from app.services.ollama_client import LLMClient, close_http_pool
+
+
+class TestRecordUsage:
+    def test_prefers_reported_usage(self, metric):
+        with contract_type_scope("rental"):
+            before = metric("legalsaathi_llm_tokens_total", call_site="t_usage", contract_type="rental", kind="prompt")
+            result = record_usage(
+                "t_usage", {"prompt_tokens": 1200, "completion_tokens": 300, "cost": 0.002}, 999, 999
+            )
+        assert result == (1200, 300, 0.002)
+        assert metric(
+            "legalsaathi_llm_tokens_total", call_site="t_usage", contract_type="rental", kind="prompt"
+        ) == before + 1200
+        assert metric("legalsaathi_llm_cost_usd_total", call_site="t_usage", contract_type="rental") >= 0.002
+
+    def test_falls_back_to_estimates_and_prices(self):
+        prompt, completion, cost = record_usage("t_estimate", None, 1_000_000, 0)
+        assert (prompt, completion) == (1_000_000, 0)
+        assert cost == pytest.approx(settings.LLM_PRICE_PROMPT_PER_MTOK)
+
+    def test_contract_type_defaults_to_unknown(self):
+        assert current_contract_type() == "unknown"
+        with contract_type_scope("loan"):
+            assert current_contract_type() == "loan"
+        assert current_contract_type() == "unknown"
+
+    def test_prompt_estimate_counts_every_message(self):
+        one = estimate_prompt_tokens([{"role": "user", "content": "a" * 400}])
+        two = estimate_prompt_tokens([{"role": "system", "content": "a" * 400}, {"role": "user", "content": "a" * 400}])
+        assert one >= 100
+        assert two == 2 * one
+
+
+class TestCompactActsContext:
+    def test_compact_drops_urls_and_ministries(self):
+        full = get_acts_context_for_prompt("rental")
+        compact = get_acts_context_for_prompt("rental", compact=True)
+        assert "Reference:" not in compact
+        assert "Ministry:" not in compact
+        assert len(compact) <= len(full)
+
+
+class TestGenerateRecordsUsage:
+    @pytest.mark.asyncio
+    async def test_usage_from_openrouter_is_recorded(self, metric):
+        sent = []
+
+        def handler(req):
+            sent.append(req)
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "ok"}}],
+                "usage": {"prompt_tokens": 42, "completion_tokens": 7, "cost": 0.0001},
+            })
+
+        ollama_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        ollama_client._http_client_loop = asyncio.get_running_loop()
+        labels = {"call_site": "t_generate", "contract_type": "nda", "kind": "completion"}
+        before = metric("legalsaathi_llm_tokens_total", **labels)
+        try:
+            with contract_type_scope("nda"):
+                assert await LLMClient().generate("q", temperature=0.9, call_site="t_generate") == "ok"
+        finally:
+            await close_http_pool()
+        assert metric("legalsaathi_llm_tokens_total", **labels) == before + 7
+        assert b'"usage"' in sent[0].content
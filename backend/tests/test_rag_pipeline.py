@@ -0,0 +1,542 @@
+"""Tests for the RAG pipeline (stand-in embedding model, vector store and LLM — no Chroma, no Ollama)."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+
+from config import settings
+from app.api.deps import get_session
+from app.api.routes import query as query_route
+from app.models.internal import ParsedDocument, RetrievedChunk
+from app.security.session_manager import Session
+from app.services import answer_cache as answer_cache_module
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.embedder import EmbeddingService
+from app.services.lexical_index import get_lexical_indexes
+from app.services.rag_pipeline import RAGPipeline
+from app.utils.helpers import CHARS_PER_TOKEN, estimate_tokens
+from tests.test_embedder import _FakeModel
+
+
+class FakeVectorStore:
+    """In-memory stand-in for VectorStore: rows per session, ranked by dot product."""
+
+    def __init__(self):
+        self.rows = {}  # session_id -> [(chunk_id, text, metadata, vector)]
+        self.queries = 0
+
+    async def add_chunks(self, session_id, chunks, embeddings, document=None):
+        rows = self.rows.setdefault(session_id, [])
+        for chunk, vector in zip(chunks, embeddings):
+            meta = {"clause_number": chunk.clause_number or "", "page": chunk.page or 0, "index": chunk.index}
+            rows.append((chunk.chunk_id, chunk.text, {**meta, **(document or {})}, np.asarray(vector)))
+        return len(rows)
+
+    async def get_documents(self, session_id):
+        rows = list(reversed(self.rows.get(session_id, [])))  # Chroma promises no order
+        return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]
+
+    async def query(self, session_id, query_embedding, n_results=6, where=None):
+        return (await self.query_many(session_id, np.atleast_2d(query_embedding), n_results, where))[0]
+
+    async def query_many(self, session_id, query_embeddings, n_results=6, where=None):
+        self.queries += 1
+        rows = self.rows.get(session_id, [])
+        results = []
+        for q in query_embeddings:
+            scored = sorted(rows, key=lambda r: -float(r[3] @ q))[:n_results]
+            results.append([
+                RetrievedChunk(
+                    text=text,
+                    distance=1.0 - float(vector @ q),
+                    chunk_id=cid,
+                    clause_number=meta.get("clause_number"),
+                    page=meta.get("page"),
+                    metadata=meta,
+                )
+                for cid, text, meta, vector in scored
+            ])
+        return results
+
+
+class FakeLLM:
+    """Stand-in LLMClient: records prompts and answers with a fixed reply, streamed in parts."""
+
+    def __init__(self, parts=("The deposit ", "is refundable.")):
+        self.parts = parts
+        self.prompts = []
+
+    async def generate(self, prompt, system_prompt="", **kwargs):
+        self.prompts.append(prompt)
+        return "".join(self.parts)
+
+    async def generate_streaming(self, prompt, system_prompt="", **kwargs):
+        self.prompts.append(prompt)
+        for part in self.parts:
+            yield part
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "HYBRID_RETRIEVAL_ENABLED", False)
+    monkeypatch.setattr(settings, "WHOLE_DOCUMENT_ENABLED", False)
+    monkeypatch.setattr(settings, "ANSWER_CACHE_ENABLED", False)
+    embedder = EmbeddingService()
+    previous = embedder._model
+    embedder._model = _FakeModel()
+    embedder.close()
+    yield RAGPipeline(FakeVectorStore(), embedder, FakeLLM())
+    embedder.close()
+    embedder._model = previous
+
+
+class TestIngestion:
+    @pytest.mark.asyncio
+    async def test_chunks_embedded_in_token_budget_batches_through_executor(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_MICROBATCH_MAX", 32)
+        monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 64)
+        text = "\n".join(f"{i}. The Tenant shall meet obligation {i}. " + "Details apply. " * (i % 4) for i in range(1, 101))
+        doc = ParsedDocument(text=text, markdown=text, mime_type="text/plain")
+
+        result = await pipeline.ingest_document("ingest-session", doc)
+
+        calls = pipeline.embedder._model.calls
+        assert result.chunks_stored == 100
+        assert max(len(c) for c in calls) == 64  # wider than one executor micro-batch
+        encoded = [t.count("Details") for call in calls for t in call]
+        assert encoded == sorted(encoded, reverse=True)
+        rows = pipeline.vs.rows["ingest-session"]
+        assert len(rows) == 100
+        for _, text, _, vector in rows:
+            assert vector.dtype == np.float32
+            assert np.allclose(vector, _FakeModel().encode([f"passage: {text}"])[0])
+
+
+def _doc(*clauses):
+    text = "\n".join(clauses)
+    return ParsedDocument(text=text, markdown=text, mime_type="text/plain")
+
+
+class TestLexicalRebuild:
+    @pytest.mark.asyncio
+    async def test_rebuilt_index_is_in_document_order(self, pipeline):
+        session = "rebuild-order"
+        await pipeline.ingest_document(session, _doc("1. Rent is due monthly.", "2. Deposit is refundable."))
+        await pipeline.ingest_document(session, _doc("1. Addendum: pets allowed.", "2. Addendum: parking."))
+        get_lexical_indexes().drop(session)  # e.g. ingested by a Celery worker
+
+        index = await pipeline._lexical_index(session)
+
+        assert index.texts == [
+            "1. Rent is due monthly.",
+            "2. Deposit is refundable.",
+            "1. Addendum: pets allowed.",
+            "2. Addendum: parking.",
+        ]
+        assert len({meta["document_id"] for meta in index.metadatas}) == 2
+
+    @pytest.mark.asyncio
+    async def test_ingest_without_an_index_does_not_keep_a_partial_one(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "HYBRID_RETRIEVAL_ENABLED", True)
+        session = "rebuild-partial"
+        await pipeline.ingest_document(session, _doc("1. Rent is due monthly."))
+        get_lexical_indexes().drop(session)  # restart, Celery ingest or LRU eviction
+        await pipeline.ingest_document(session, _doc("1. Addendum: pets allowed."))
+
+        index = await pipeline._lexical_index(session)
+        (fused,) = await pipeline._fuse(session, ["rent"], [[]], 2, None)
+
+        assert index.texts == ["1. Rent is due monthly.", "1. Addendum: pets allowed."]
+        assert [c.text for c in fused] == ["1. Rent is due monthly."]
+
+
+class TestWholeDocument:
+    @pytest.mark.asyncio
+    async def test_built_once_per_index_and_rebuilt_after_ingest(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "WHOLE_DOCUMENT_ENABLED", True)
+        builds = []
+        build = RAGPipeline._build_whole_document
+
+        def counting_build(session_id, index):
+            builds.append(session_id)
+            return build(session_id, index)
+
+        monkeypatch.setattr(RAGPipeline, "_build_whole_document", staticmethod(counting_build))
+        session = "whole-once"
+        await pipeline.ingest_document(session, _doc("1. Rent is due monthly.", "2. Deposit is refundable."))
+
+        first = await pipeline.whole_document(session)
+        second = await pipeline.whole_document(session)
+        assert first == second and len(builds) == 1
+
+        await pipeline.ingest_document(session, _doc("1. Addendum: pets allowed."))
+        third = await pipeline.whole_document(session)
+        assert len(builds) == 2
+        assert [c.text for c in third] == [
+            "1. Rent is due monthly.",
+            "2. Deposit is refundable.",
+            "1. Addendum: pets allowed.",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_both_documents_after_ingest_into_an_empty_store(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "WHOLE_DOCUMENT_ENABLED", True)
+        session = "whole-restart"
+        await pipeline.ingest_document(session, _doc("1. Rent is due monthly.", "2. Deposit is refundable."))
+        get_lexical_indexes().drop(session)  # e.g. the API restarted between uploads
+        await pipeline.ingest_document(session, _doc("1. Addendum: pets allowed."))
+
+        whole = await pipeline.whole_document(session)
+
+        assert [c.text for c in whole] == [
+            "1. Rent is due monthly.",
+            "2. Deposit is refundable.",
+            "1. Addendum: pets allowed.",
+        ]
+
+    @staticmethod
+    def _modes(call_site):
+        return {
+            mode: REGISTRY.get_sample_value("legalsaathi_rag_context_mode_total", {"call_site": call_site, "mode": mode})
+            or 0.0
+            for mode in ("whole_document", "retrieval")
+        }
+
+    @pytest.mark.asyncio
+    async def test_short_contract_sent_whole_without_retrieval(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "WHOLE_DOCUMENT_ENABLED", True)
+        session = "mode-whole"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        pipeline.embedder._model.calls.clear()
+
+        mode, chunks = await pipeline.context(session, "Is the deposit refundable?", call_site="t_mode_whole")
+        many = await pipeline.retrieve_many(session, ["rent?", "deposit?"])
+
+        assert mode == "whole_document"
+        assert [c.text for c in chunks] == list(LEASE)
+        assert many == [chunks, chunks]
+        assert pipeline.vs.queries == 0 and pipeline.embedder._model.calls == []
+        assert self._modes("t_mode_whole") == {"whole_document": 1.0, "retrieval": 0.0}
+
+    @pytest.mark.asyncio
+    async def test_long_contract_or_filter_falls_back_to_retrieval(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "WHOLE_DOCUMENT_ENABLED", True)
+        session = "mode-retrieval"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+
+        filtered, _ = await pipeline.context(session, "rent?", metadata_filter={"page": 0}, call_site="t_mode_ret")
+        monkeypatch.setattr(settings, "WHOLE_DOCUMENT_MAX_TOKENS", 10)
+        await pipeline.ingest_document(session, _doc("4. Pets are not allowed."))  # a fresh index, re-checked
+        too_long, chunks = await pipeline.context(session, "rent?", n_retrieve=2, call_site="t_mode_ret")
+
+        assert filtered == too_long == "retrieval"
+        assert len(chunks) == 2 and pipeline.vs.queries == 2
+        assert self._modes("t_mode_ret") == {"whole_document": 0.0, "retrieval": 2.0}
+
+    @pytest.mark.asyncio
+    async def test_mode_off_always_retrieves(self, pipeline):
+        session = "mode-off"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        assert await pipeline.whole_document(session) is None
+        mode, _ = await pipeline.context(session, "rent?")
+        assert mode == "retrieval"
+
+
+LEASE = ("1. Rent is INR 25,000 per month.", "2. The security deposit is refundable.", "3. Notice period is 3 months.")
+
+
+async def _post_stream(pipeline, session, monkeypatch):
+    """POST /query/stream with the route's services swapped for the pipeline's fakes."""
+    monkeypatch.setattr(query_route, "EmbeddingService", lambda: pipeline.embedder)
+    monkeypatch.setattr(query_route, "VectorStore", lambda: pipeline.vs)
+    monkeypatch.setattr(query_route, "LLMClient", lambda: pipeline.ollama)
+    app = FastAPI()
+    app.include_router(query_route.router)
+    app.dependency_overrides[get_session] = lambda: session
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.post("/query/stream", data={"question": "Is the deposit refundable?"})
+
+
+def _session(session_id):
+    now = datetime.now()
+    return Session(session_id, now, now + timedelta(hours=1), "key")
+
+
+class TestStreamQuery:
+    @pytest.mark.asyncio
+    async def test_sources_then_tokens_then_done(self, pipeline):
+        session = "stream-events"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+
+        events = [e async for e in pipeline.stream_query(session, "Is the deposit refundable?", "system")]
+
+        assert [e["event"] for e in events] == ["sources", "token", "token", "done"]
+        sources = events[0]["data"]
+        assert [s["index"] for s in sources] == [1, 2, 3]
+        assert "".join(e["data"] for e in events[1:3]) == "The deposit is refundable."
+        assert events[-1]["data"]["response_len"] == len("The deposit is refundable.")
+        prompt = pipeline.ollama.prompts[0]
+        assert prompt.endswith("Question:\nIs the deposit refundable?")
+        assert f"[1] (Clause {sources[0]['clause_number']})" in prompt
+
+    @pytest.mark.asyncio
+    async def test_route_streams_server_sent_events(self, pipeline, monkeypatch):
+        session = _session("route-stream")
+        await pipeline.ingest_document(session.id, _doc(*LEASE))
+        resp = await _post_stream(pipeline, session, monkeypatch)
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n")[0] for block in resp.text.strip().split("\n\n")]
+        assert events == ["event: sources", "event: token", "event: token", "event: done"]
+
+    @pytest.mark.asyncio
+    async def test_route_reports_generation_failure_as_error_event(self, pipeline, monkeypatch):
+        session = _session("route-error")
+
+        async def failing_stream(prompt, system_prompt="", **kwargs):
+            raise RuntimeError("ollama down")
+            yield
+
+        monkeypatch.setattr(pipeline.ollama, "generate_streaming", failing_stream)
+        resp = await _post_stream(pipeline, session, monkeypatch)
+
+        assert resp.text.split("\n\n")[-2].startswith("event: error")
+
+    @pytest.mark.asyncio
+    async def test_route_ends_with_error_event_when_deadline_expires(self, pipeline, monkeypatch):
+        session = _session("route-deadline")
+        await pipeline.ingest_document(session.id, _doc(*LEASE))
+
+        async def stalled_stream(prompt, system_prompt="", **kwargs):
+            yield "The deposit"
+            await asyncio.sleep(5)
+            yield " is refundable."
+
+        monkeypatch.setattr(settings, "REQUEST_DEADLINE_SECONDS", 0.2)
+        monkeypatch.setattr(pipeline.ollama, "generate_streaming", stalled_stream)
+        start = time.monotonic()
+        resp = await _post_stream(pipeline, session, monkeypatch)
+
+        assert time.monotonic() - start < 2
+        blocks = resp.text.strip().split("\n\n")
+        assert [b.split("\n")[0] for b in blocks] == ["event: sources", "event: token", "event: error"]
+        assert "deadline exceeded" in blocks[-1]
+
+
+def _chunks(n, chars=400):
+    return [
+        RetrievedChunk(text=f"{i}" + "x" * (chars - 1), distance=0.1 * i, chunk_id=f"c{i}", clause_number=str(i))
+        for i in range(n)
+    ]
+
+
+def _prompt_tokens(system_prompt, question, chunks):
+    return estimate_tokens(system_prompt) + estimate_tokens(RAGPipeline.build_prompt(question, chunks))
+
+
+class TestFitToBudget:
+    SYSTEM = "s" * 400  # 100 tokens
+    COMPACT = "c" * 40  # 10 tokens
+    QUESTION = "What is the notice period?"
+
+    def _fit(self, monkeypatch, budget, chunks, compact=COMPACT):
+        monkeypatch.setattr(settings, "LLM_PROMPT_TOKEN_BUDGET", budget)
+        monkeypatch.setattr(settings, "LLM_MIN_CONTEXT_CHUNKS", 2)
+        return RAGPipeline.fit_to_budget(self.QUESTION, chunks, self.SYSTEM, compact, call_site="t_fit")
+
+    def test_prompt_within_budget_is_untouched(self, monkeypatch):
+        chunks = _chunks(4)
+        system, kept = self._fit(monkeypatch, 10_000, chunks)
+        assert system is self.SYSTEM and kept is chunks
+
+    def test_lowest_ranked_chunks_go_first(self, monkeypatch):
+        chunks = _chunks(4)
+        budget = _prompt_tokens(self.SYSTEM, self.QUESTION, chunks[:2])
+        before = REGISTRY.get_sample_value("legalsaathi_llm_prompt_tokens_trimmed_total", {"call_site": "t_fit"}) or 0.0
+
+        system, kept = self._fit(monkeypatch, budget, chunks)
+
+        assert system is self.SYSTEM
+        assert kept == chunks[:2]
+        trimmed = _prompt_tokens(self.SYSTEM, self.QUESTION, chunks) - budget
+        after = REGISTRY.get_sample_value("legalsaathi_llm_prompt_tokens_trimmed_total", {"call_site": "t_fit"})
+        assert after == before + trimmed
+
+    def test_compact_prompt_before_dropping_below_minimum(self, monkeypatch):
+        chunks = _chunks(4)
+        budget = _prompt_tokens(self.COMPACT, self.QUESTION, chunks[:2])
+        system, kept = self._fit(monkeypatch, budget, chunks)
+        assert system is self.COMPACT and kept == chunks[:2]
+
+    def test_last_chunk_truncated_but_question_kept(self, monkeypatch):
+        chunks = _chunks(4)
+        budget = _prompt_tokens(self.COMPACT, self.QUESTION, chunks[:1]) - 50
+        system, kept = self._fit(monkeypatch, budget, chunks)
+
+        assert system is self.COMPACT
+        assert len(kept) == 1 and chunks[0].text.startswith(kept[0].text)
+        assert len(kept[0].text) == len(chunks[0].text) - 50 * CHARS_PER_TOKEN
+        assert chunks[0].text == "0" + "x" * 399  # the caller's chunk is not modified
+        assert RAGPipeline.build_prompt(self.QUESTION, kept).endswith(self.QUESTION)
+        assert _prompt_tokens(system, self.QUESTION, kept) <= budget
+
+    def test_without_compact_prompt_chunks_drop_to_one(self, monkeypatch):
+        chunks = _chunks(4)
+        budget = _prompt_tokens(self.SYSTEM, self.QUESTION, chunks[:1])
+        system, kept = self._fit(monkeypatch, budget, chunks, compact=None)
+        assert system is self.SYSTEM and kept == chunks[:1]
+
+
+class TestRetrieveMany:
+    QUESTIONS = ["What is the rent?", "Is the deposit refundable?", "How long is the notice period?"]
+
+    @pytest.mark.asyncio
+    async def test_one_embed_and_one_query_for_all_questions(self, pipeline):
+        session = "retrieve-many"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        pipeline.embedder._model.calls.clear()
+
+        batched = await pipeline.retrieve_many(session, self.QUESTIONS, n_retrieve=2)
+
+        assert pipeline.vs.queries == 1
+        assert pipeline.embedder._model.calls == [[f"query: {q}" for q in self.QUESTIONS]]
+        for question, chunks in zip(self.QUESTIONS, batched):
+            single = await pipeline.retrieve(session, question, n_retrieve=2)
+            assert [c.chunk_id for c in chunks] == [c.chunk_id for c in single]
+
+    @pytest.mark.asyncio
+    async def test_no_questions_touch_nothing(self, pipeline):
+        assert await pipeline.retrieve_many("retrieve-none", []) == []
+        assert pipeline.vs.queries == 0 and pipeline.embedder._model.calls == []
+
+    @pytest.mark.asyncio
+    async def test_query_with_chunks_skips_retrieval(self, pipeline):
+        session = "query-many"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        batched = await pipeline.retrieve_many(session, self.QUESTIONS, n_retrieve=1)
+        queries = pipeline.vs.queries
+
+        answers = [
+            await pipeline.query(session, question, "system", chunks=chunks)
+            for question, chunks in zip(self.QUESTIONS, batched)
+        ]
+
+        assert answers == ["The deposit is refundable."] * 3
+        assert pipeline.vs.queries == queries
+        for prompt, chunks in zip(pipeline.ollama.prompts, batched):
+            assert f"[1] (Clause {chunks[0].clause_number}): {chunks[0].text}" in prompt
+
+
+class TestHybridFusion:
+    @staticmethod
+    def _hits(pipeline, session, *positions):
+        rows = pipeline.vs.rows[session]
+        return [
+            RetrievedChunk(text=rows[p][1], distance=0.2, chunk_id=rows[p][0], metadata=rows[p][2]) for p in positions
+        ]
+
+    @pytest.mark.asyncio
+    async def test_lexical_only_hit_joins_by_reciprocal_rank(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "HYBRID_RETRIEVAL_ENABLED", True)
+        session = "fuse-rrf"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        dense = self._hits(pipeline, session, 0, 1)  # the notice clause is missed by the dense search
+        before = REGISTRY.get_sample_value("legalsaathi_hybrid_lexical_only_hits_total") or 0.0
+
+        (fused,) = await pipeline._fuse(session, ["notice"], [dense], 3, None)
+
+        # 1/(k+1) for the first dense hit and for the only BM25 hit: ties keep dense first.
+        assert [c.text for c in fused] == [LEASE[0], LEASE[2], LEASE[1]]
+        assert fused[0] is dense[0] and fused[2] is dense[1]
+        assert fused[1].distance == 1.0 and fused[1].chunk_id == pipeline.vs.rows[session][2][0]
+        assert REGISTRY.get_sample_value("legalsaathi_hybrid_lexical_only_hits_total") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_cut_to_n_retrieve_per_question(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "HYBRID_RETRIEVAL_ENABLED", True)
+        session = "fuse-cut"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        dense = [self._hits(pipeline, session, 0, 1), self._hits(pipeline, session, 1, 0)]
+
+        fused = await pipeline._fuse(session, ["notice", "deposit"], dense, 2, None)
+
+        assert [[c.text for c in chunks] for chunks in fused] == [[LEASE[0], LEASE[2]], [LEASE[1], LEASE[0]]]
+
+    @pytest.mark.asyncio
+    async def test_metadata_filter_stays_dense_only(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "HYBRID_RETRIEVAL_ENABLED", True)
+        session = "fuse-filtered"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        dense = self._hits(pipeline, session, 0, 1)
+
+        (fused,) = await pipeline._fuse(session, ["notice"], [dense], 3, {"page": 1})
+
+        assert fused == dense
+
+
+@pytest.fixture
+def answer_cache(monkeypatch):
+    monkeypatch.setattr(settings, "ANSWER_CACHE_ENABLED", True)
+    # The stand-in model only tells texts apart by length: hit on an exact repeat only.
+    cache = SemanticAnswerCache(max_sessions=4, max_entries=8, ttl_seconds=60, threshold=0.999999)
+    monkeypatch.setattr(answer_cache_module, "_cache", cache)
+    return cache
+
+
+class TestAnswerCache:
+    QUESTION = "Is the deposit refundable?"
+
+    @pytest.mark.asyncio
+    async def test_repeat_question_served_from_cache(self, pipeline, answer_cache):
+        session = "answers-hit"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+
+        first = await pipeline.query(session, self.QUESTION, "system", cache_answer=True)
+        second = await pipeline.query(session, self.QUESTION, "system", cache_answer=True)
+
+        assert first == second == "The deposit is refundable."
+        assert len(pipeline.ollama.prompts) == 1 and pipeline.vs.queries == 1
+
+    @pytest.mark.asyncio
+    async def test_other_question_or_scope_misses(self, pipeline, answer_cache):
+        session = "answers-miss"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+
+        await pipeline.query(session, self.QUESTION, "system", cache_answer=True)
+        await pipeline.query(session, "Rent?", "system", cache_answer=True)
+        await pipeline.query(session, self.QUESTION, "Respond in Hindi.", cache_answer=True)
+        await pipeline.query(session, self.QUESTION, "system")  # not a user-facing question
+
+        assert len(pipeline.ollama.prompts) == 4
+
+    @pytest.mark.asyncio
+    async def test_ingest_invalidates_session_answers(self, pipeline, answer_cache):
+        session = "answers-invalidated"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+        await pipeline.query(session, self.QUESTION, "system", cache_answer=True)
+
+        await pipeline.ingest_document(session, _doc("4. Addendum: the deposit is not refundable."))
+        await pipeline.query(session, self.QUESTION, "system", cache_answer=True)
+
+        assert len(pipeline.ollama.prompts) == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_hit_replays_answer_and_sources(self, pipeline, answer_cache):
+        session = "answers-stream"
+        await pipeline.ingest_document(session, _doc(*LEASE))
+
+        first = [e async for e in pipeline.stream_query(session, self.QUESTION, "system", cache_answer=True)]
+        replay = [e async for e in pipeline.stream_query(session, self.QUESTION, "system", cache_answer=True)]
+
+        assert len(pipeline.ollama.prompts) == 1
+        assert [e["event"] for e in replay] == ["sources", "token", "done"]
+        assert replay[0]["data"] == first[0]["data"]
+        assert replay[1]["data"] == "The deposit is refundable."
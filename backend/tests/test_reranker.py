@@ -0,0 +1,61 @@
+"""Tests for the cross-encoder reranker (with a stand-in model)."""
+
+import threading
+
+import pytest
+from prometheus_client import REGISTRY
+
+from config import settings
+from app.services.reranker import CrossEncoderReranker
+
+
+class _FakeCrossEncoder:
+    """Scores a pair by how many question words appear in the passage."""
+
+    def __init__(self):
+        self.batches = []
+        self.threads = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(list(pairs))
+        self.threads.append(threading.current_thread())
+        return [float(sum(w in text.lower() for w in q.lower().split())) for q, text in pairs]
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    svc = CrossEncoderReranker()
+    monkeypatch.setattr(svc, "_model", _FakeCrossEncoder())
+    monkeypatch.setattr(svc, "_scores", type(svc._scores)())
+    return svc
+
+
+class TestCrossEncoderReranker:
+    @pytest.mark.asyncio
+    async def test_scores_in_one_batch_off_the_event_loop(self, reranker):
+        scores = await reranker.scores("caution deposit", ["a", "b"], ["rent is due", "caution deposit refund"])
+        assert scores[1] > scores[0]
+        assert len(reranker._model.batches) == 1
+        assert reranker._model.threads[0] is not threading.main_thread()
+
+    @pytest.mark.asyncio
+    async def test_cached_scores_are_not_recomputed(self, reranker):
+        hits_before = REGISTRY.get_sample_value("legalsaathi_rerank_score_cache_total", {"result": "hit"}) or 0.0
+        await reranker.scores("notice period", ["a", "b"], ["x", "y"])
+        await reranker.scores("notice period", ["a", "b", "c"], ["x", "y", "notice"])
+        assert reranker._model.batches[1] == [("notice period", "notice")]
+        hits = REGISTRY.get_sample_value("legalsaathi_rerank_score_cache_total", {"result": "hit"}) or 0.0
+        assert hits == hits_before + 2
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self, reranker, monkeypatch):
+        monkeypatch.setattr(settings, "RERANK_CACHE_MAX_ENTRIES", 2)
+        await reranker.scores("q", ["a", "b", "c"], ["x", "y", "z"])
+        assert len(reranker._scores) == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_model_returns_none(self, monkeypatch):
+        svc = CrossEncoderReranker()
+        monkeypatch.setattr(svc, "_model", None)
+        monkeypatch.setattr(svc, "_load_failed", True)
+        assert await svc.scores("q", ["a"], ["x"]) is None
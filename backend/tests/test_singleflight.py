@@ -0,0 +1,109 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestAsyncSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = AsyncSingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        assert results == ["result"] * 5
+        assert calls == 1
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        flights = AsyncSingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return calls
+
+        await asyncio.gather(flights.do("a", work), flights.do("b", work))
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_waiters(self):
+        flights = AsyncSingleFlight("test")
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(flights.do("k", boom), flights.do("k", boom), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_leader_cancel_keeps_work_for_followers(self):
+        flights = AsyncSingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "done"
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_cancel_cancels_work(self):
+        flights = AsyncSingleFlight("test")
+        started = asyncio.Event()
+        finished = False
+
+        async def work():
+            nonlocal finished
+            started.set()
+            await asyncio.sleep(1)
+            finished = True
+
+        task = asyncio.create_task(flights.do("k", work))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        assert not finished
+        assert flights.in_flight() == 0
+
+
+class TestThreadSingleFlight:
+    def test_threads_share_one_execution(self):
+        flights = SingleFlight("test")
+        calls = 0
+        results = []
+
+        def work():
+            nonlocal calls
+            calls += 1
+            time.sleep(0.05)
+            return [1.0, 2.0]
+
+        threads = [threading.Thread(target=lambda: results.append(flights.do("k", work))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert calls == 1
+        assert results == [[1.0, 2.0]] * 4